@@ -0,0 +1,106 @@
+"""Throughput benchmark for the micro-batched inference engine.
+
+Simulates N cameras uploading at once: each client thread pushes images through
+a BatchInferenceEngine and we report images/second and per-image latency for
+every (batch size, wait window) combination.
+
+    python benchmarks/bench_batching.py --weights fire_s.pt --clients 16
+    python benchmarks/bench_batching.py --weights fire_s.onnx --clients 16
+    python benchmarks/bench_batching.py --synthetic   # no model weights needed
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fire_detection_app.batching import BatchInferenceEngine
+
+
+def load_predictor(args):
+    if args.synthetic:
+        # Fixed per-call overhead plus per-image work, roughly the shape of a CPU forward pass
+        weights = np.random.rand(args.imgsz, args.imgsz).astype(np.float32)
+
+        def predict_batch(images):
+            time.sleep(args.call_overhead_ms / 1000.0)
+            stacked = np.stack([img[:, :, 0] for img in images]).astype(np.float32)
+            return list(stacked @ weights)
+        return predict_batch
+
+    from fire_inference import load_backend
+    return load_backend(args.weights, args.backend, imgsz=args.imgsz).predict
+
+
+def run_case(predict_batch, images, clients, per_client, batch_size, wait_ms):
+    engine = BatchInferenceEngine(predict_batch, max_batch_size=batch_size, max_wait_ms=wait_ms)
+    engine.infer(images[0])  # warm up the dispatcher and the model
+    engine.images_processed = engine.batches_run = 0
+
+    latencies = []
+    lock = threading.Lock()
+
+    def client(offset):
+        local = []
+        for i in range(per_client):
+            start = time.perf_counter()
+            engine.infer(images[(offset + i) % len(images)])
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'avg_batch': engine.stats()['avg_batch_size'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--weights', default='fire_s.pt', help='.pt weights or an exported .onnx model')
+    parser.add_argument('--backend', default='auto', choices=['auto', 'ultralytics', 'onnxruntime'])
+    parser.add_argument('--synthetic', action='store_true',
+                        help='Use a synthetic CPU workload instead of the YOLO model')
+    parser.add_argument('--call-overhead-ms', type=float, default=20.0,
+                        help='Fixed cost per forward pass in synthetic mode')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent uploading cameras')
+    parser.add_argument('--per-client', type=int, default=8, help='Images sent by each client')
+    parser.add_argument('--batch-sizes', default='1,2,4,8,16')
+    parser.add_argument('--wait-ms', default='0,2,5,10,20')
+    args = parser.parse_args()
+
+    predict_batch = load_predictor(args)
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 255, (args.imgsz, args.imgsz, 3), dtype=np.uint8) for _ in range(8)]
+
+    print(f"{args.clients} concurrent clients x {args.per_client} images, CPU only")
+    print(f"{'batch':>5} {'wait_ms':>7} {'img/s':>8} {'p50_ms':>8} {'p95_ms':>8} {'avg_batch':>9}")
+    for batch_size in [int(b) for b in args.batch_sizes.split(',')]:
+        for wait_ms in [float(w) for w in args.wait_ms.split(',')]:
+            if batch_size == 1 and wait_ms > 0:
+                continue  # waiting is pointless without batching
+            result = run_case(predict_batch, images, args.clients, args.per_client,
+                              batch_size, wait_ms)
+            print(f"{batch_size:>5} {wait_ms:>7.1f} {result['throughput']:>8.1f} "
+                  f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['avg_batch']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
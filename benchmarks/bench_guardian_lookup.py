@@ -0,0 +1,96 @@
+"""Benchmark nearest-guardian selection against a large UserProfile table.
+
+Builds a throwaway test database, fills it with synthetic guardians spread
+around a few population centres and times three ways of picking a wave:
+
+  random   the old ``order_by('?')[:5]`` selection
+  scan     load every available profile and sort by distance
+  geohash  geo.nearest() over the indexed geohash column
+
+    python benchmarks/bench_guardian_lookup.py --profiles 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'firewatch.settings')
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+
+from fire_detection_app.geo import encode_geohash, haversine_km, nearest
+from fire_detection_app.models import UserProfile
+
+CENTRES = [(36.75, 3.06), (35.69, -0.63), (36.36, 6.61), (31.63, -8.0), (48.85, 2.35)]
+
+
+def populate(count, batch_size=5000):
+    rng = random.Random(0)
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        users = User.objects.bulk_create(
+            [User(username=f"guardian_{start + i}") for i in range(size)]
+        )
+        profiles = []
+        for user in users:
+            lat, lon = rng.choice(CENTRES)
+            lat += rng.gauss(0, 0.5)
+            lon += rng.gauss(0, 0.5)
+            profiles.append(UserProfile(
+                user=user, latitude=lat, longitude=lon,
+                geohash=encode_geohash(lat, lon),
+                is_available=rng.random() < 0.8
+            ))
+        UserProfile.objects.bulk_create(profiles)
+
+
+def time_queries(label, fn, points):
+    start = time.perf_counter()
+    for lat, lon in points:
+        fn(lat, lon)
+    elapsed = (time.perf_counter() - start) / len(points)
+    print(f"{label:>8}: {elapsed * 1000:8.2f} ms/wave")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('-k', type=int, default=5)
+    args = parser.parse_args()
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        start = time.perf_counter()
+        populate(args.profiles)
+        print(f"Inserted {args.profiles} profiles in {time.perf_counter() - start:.1f}s")
+
+        available = UserProfile.objects.filter(is_available=True)
+        rng = random.Random(1)
+        points = [(lat + rng.gauss(0, 0.3), lon + rng.gauss(0, 0.3))
+                  for lat, lon in (rng.choice(CENTRES) for _ in range(args.queries))]
+
+        # Same answers as a full scan, checked before timing anything
+        for lat, lon in points[:5]:
+            scanned = sorted(available, key=lambda p: haversine_km(lat, lon, p.latitude, p.longitude))
+            assert [p.id for p in nearest(available, lat, lon, args.k)] == [p.id for p in scanned[:args.k]]
+
+        time_queries('random', lambda lat, lon: list(available.order_by('?')[:args.k]), points)
+        time_queries('scan', lambda lat, lon: sorted(
+            available, key=lambda p: haversine_km(lat, lon, p.latitude, p.longitude))[:args.k],
+            points[:5])
+        time_queries('geohash', lambda lat, lon: nearest(available, lat, lon, args.k), points)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
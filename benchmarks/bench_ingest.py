@@ -0,0 +1,114 @@
+"""Benchmark alert ingestion: one frame per request vs bulk bundles.
+
+Builds a throwaway test database and pushes the same synthetic JPEG frames
+through the API views, either one POST /api/fire-alerts/ per frame or as
+bundles to POST /api/fire-alerts/bulk/. Requests go through the full DRF
+stack (multipart parsing, image validation, storage writes, detection job
+inserts) but not over a socket, so the numbers are an upper bound on what
+the server side can absorb.
+
+    python benchmarks/bench_ingest.py --alerts 500 --bundle-sizes 5 10 25
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'firewatch.settings')
+
+import django
+
+django.setup()
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment
+from PIL import Image
+from rest_framework.test import APIRequestFactory
+
+from fire_detection_app.models import Camera, DetectionJob, FireAlert
+from fire_detection_app.views import FireAlertViewSet
+
+
+def make_frame(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 80, 0)).save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def ingest_single(camera, frame, count):
+    view = FireAlertViewSet.as_view({'post': 'create'})
+    factory = APIRequestFactory()
+    for i in range(count):
+        request = factory.post('/api/fire-alerts/', {
+            'camera': camera.id,
+            'image': SimpleUploadedFile(f"frame_{i}.jpg", frame, content_type='image/jpeg'),
+            'latitude': camera.latitude,
+            'longitude': camera.longitude,
+        }, format='multipart')
+        response = view(request)
+        assert response.status_code == 201, response.data
+
+
+def ingest_bulk(camera, frame, count, bundle_size):
+    view = FireAlertViewSet.as_view({'post': 'bulk'})
+    factory = APIRequestFactory()
+    for start in range(0, count, bundle_size):
+        size = min(bundle_size, count - start)
+        request = factory.post('/api/fire-alerts/bulk/', {
+            'camera': camera.id,
+            'images': [SimpleUploadedFile(f"frame_{start + i}.jpg", frame, content_type='image/jpeg')
+                       for i in range(size)],
+        }, format='multipart')
+        response = view(request)
+        assert response.status_code == 201, response.data
+
+
+def run(label, fn, count):
+    FireAlert.objects.all().delete()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    assert FireAlert.objects.count() == count
+    assert DetectionJob.objects.count() == count
+    print(f"{label:>12}: {count / elapsed:8.1f} alerts/s  ({elapsed * 1000 / count:.2f} ms/alert)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--alerts', type=int, default=500)
+    parser.add_argument('--bundle-sizes', type=int, nargs='+', default=[5, 10, 25, 50])
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    args = parser.parse_args()
+
+    frame = make_frame(args.width, args.height)
+    print(f"{args.alerts} alerts, {len(frame) / 1024:.0f} KB frames")
+
+    setup_test_environment()  # Lets the request factory's 'testserver' host through
+    workdir = tempfile.mkdtemp()
+    if connection.vendor == 'sqlite':
+        # Keep the database files (and the one opened before the test database) out of the repository
+        connection.settings_dict['NAME'] = os.path.join(workdir, 'bench.sqlite3')
+        connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'test_bench.sqlite3')
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(MEDIA_ROOT=os.path.join(workdir, 'media')):
+            camera = Camera.objects.create(name='bench', location_name='Bench',
+                                           latitude=36.75, longitude=3.06)
+            run('single', lambda: ingest_single(camera, frame, args.alerts), args.alerts)
+            for size in args.bundle_sizes:
+                run(f"bulk x{size}", lambda: ingest_bulk(camera, frame, args.alerts, size), args.alerts)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        connection.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
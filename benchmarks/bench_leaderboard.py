@@ -0,0 +1,114 @@
+"""Benchmark the skip-list leaderboard against sorting the profile table.
+
+Loads --profiles synthetic guardians into the in-memory leaderboard and times
+top-N pages, "my position" lookups and point updates. For comparison it fills
+a throwaway test database with --sql-profiles guardians and times what a view
+without the leaderboard would run: ``ORDER BY guardian_points DESC LIMIT n``
+for the page and ``COUNT(*) WHERE guardian_points > mine`` for a position.
+
+    python benchmarks/bench_leaderboard.py --profiles 1000000 --sql-profiles 100000
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'firewatch.settings')
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Q
+
+from fire_detection_app.leaderboard import Leaderboard
+from fire_detection_app.models import UserProfile
+
+
+def points_for(rng):
+    # Long tail: most guardians have a few hundred points, a few have thousands
+    return int(rng.paretovariate(1.2) * 100)
+
+
+def time_op(label, fn, repeats):
+    start = time.perf_counter()
+    for i in range(repeats):
+        fn(i)
+    elapsed = (time.perf_counter() - start) / repeats
+    print(f"{label:>28}: {elapsed * 1e6:10.1f} us")
+
+
+def bench_memory(count, queries):
+    rng = random.Random(0)
+    rows = [(user_id, points_for(rng)) for user_id in range(1, count + 1)]
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    board = Leaderboard()
+    start = time.perf_counter()
+    board.load(rows)
+    print(f"Loaded {count} guardians in {time.perf_counter() - start:.1f}s "
+          f"(+{(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024:.0f} MB peak RSS)")
+
+    users = [rng.randrange(1, count + 1) for _ in range(queries)]
+    time_op('leaderboard top 10', lambda i: board.top(10), queries)
+    time_op('leaderboard page at 500k', lambda i: board.top(10, count // 2), queries)
+    time_op('leaderboard my position', lambda i: board.rank(users[i]), queries)
+    time_op('leaderboard award points', lambda i: board.update(users[i], board._points[users[i]] + 15), queries)
+
+
+def populate(count, batch_size=5000):
+    rng = random.Random(0)
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        users = User.objects.bulk_create(
+            [User(username=f"guardian_{start + i}") for i in range(size)]
+        )
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, guardian_points=points_for(rng)) for user in users
+        ])
+
+
+def bench_sql(count, queries):
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        populate(count)
+        profiles = list(UserProfile.objects.values_list('user_id', 'guardian_points'))
+        rng = random.Random(1)
+        sample = [rng.choice(profiles) for _ in range(queries)]
+        print(f"SQL over {count} profiles:")
+
+        def top(i):
+            list(UserProfile.objects.order_by('-guardian_points', 'user_id')
+                 .values_list('user_id', 'guardian_points')[:10])
+
+        def position(i):
+            user_id, points = sample[i]
+            UserProfile.objects.filter(
+                Q(guardian_points__gt=points) | Q(guardian_points=points, user_id__lt=user_id)
+            ).count()
+
+        time_op('ORDER BY ... LIMIT 10', top, queries)
+        time_op('COUNT(*) ahead of me', position, queries)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', type=int, default=1000000)
+    parser.add_argument('--sql-profiles', type=int, default=100000, help='0 to skip the SQL comparison')
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    bench_memory(args.profiles, args.queries)
+    if args.sql_profiles:
+        bench_sql(args.sql_profiles, min(args.queries, 200))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Latency vs small-object recall of full-frame, tiled and ROI inference.
+
+Fits the cost model (fixed overhead + per-image cost of a batched call) on
+the chosen backend and prints what each configuration should cost on a frame
+of --frame-size. With --images it also runs every configuration on labelled
+high-resolution frames and reports measured latency with recall on small
+objects (longest side under --small-px) and on all objects.
+
+Labels are YOLO text files (``class cx cy w h``, normalised) with the same
+stem as each image, either beside it or in a sibling ``labels/`` folder.
+
+    python benchmarks/bench_tiling.py --weights fire_m.onnx --frame-size 2028x1520
+    python benchmarks/bench_tiling.py --weights fire_m.onnx --images highres/images --tiles 480 640
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fire_inference import load_backend
+from fire_inference.tiling import CostModel, TiledDetector
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def load_labelled(folder):
+    """(image path, ground-truth xyxy boxes in pixels) for every labelled image"""
+    samples = []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        stem = os.path.splitext(name)[0]
+        candidates = [os.path.join(folder, stem + '.txt'),
+                      os.path.join(folder, '..', 'labels', stem + '.txt')]
+        label = next((path for path in candidates if os.path.exists(path)), None)
+        if label is None:
+            continue
+        image = cv2.imread(os.path.join(folder, name))
+        height, width = image.shape[:2]
+        boxes = []
+        with open(label) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 5:
+                    continue
+                cx, cy, w, h = (float(v) for v in parts[1:5])
+                boxes.append([(cx - w / 2) * width, (cy - h / 2) * height,
+                              (cx + w / 2) * width, (cy + h / 2) * height])
+        samples.append((os.path.join(folder, name), np.array(boxes, dtype=np.float32).reshape(-1, 4)))
+    return samples
+
+
+def iou_matrix(a, b):
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def evaluate(detect, samples, small_px, conf_threshold, iou_threshold=0.3):
+    found = total = small_found = small_total = false_positives = 0
+    latencies = []
+    for path, truth in samples:
+        frame = cv2.imread(path)
+        start = time.perf_counter()
+        detections = detect(frame)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        boxes = detections.xyxy[detections.conf > conf_threshold]
+        matches = iou_matrix(truth, boxes) >= iou_threshold
+        hit = matches.any(axis=1)
+        small = np.maximum(truth[:, 2] - truth[:, 0], truth[:, 3] - truth[:, 1]) < small_px
+        found += hit.sum()
+        total += len(truth)
+        small_found += hit[small].sum()
+        small_total += small.sum()
+        false_positives += (~matches.any(axis=0)).sum() if len(boxes) else 0
+    return {
+        'latency_ms': float(np.median(latencies)),
+        'recall': found / total if total else float('nan'),
+        'small_recall': small_found / small_total if small_total else float('nan'),
+        'false_positives': int(false_positives),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--weights', default='fire_m.onnx')
+    parser.add_argument('--backend', default='auto', choices=['auto', 'ultralytics', 'onnxruntime'])
+    parser.add_argument('--imgsz', type=int, default=640, help='Model input size')
+    parser.add_argument('--frame-size', default='2028x1520', help='WxH used for the cost table')
+    parser.add_argument('--tiles', type=int, nargs='+', default=[480, 640, 960])
+    parser.add_argument('--overlap', type=float, default=0.2)
+    parser.add_argument('--max-rois', type=int, default=4)
+    parser.add_argument('--images', default=None, help='Folder of labelled high-resolution frames')
+    parser.add_argument('--small-px', type=int, default=32)
+    parser.add_argument('--conf', type=float, default=0.5, help='Alert threshold used for recall')
+    args = parser.parse_args()
+
+    backend = load_backend(args.weights, args.backend, imgsz=args.imgsz)
+    cost = CostModel.fit(backend, args.imgsz)
+    print(f"Cost model: {cost.overhead_ms:.1f} ms per call + {cost.per_image_ms:.1f} ms per image")
+
+    configs = [('full', None)]
+    configs += [('tiles', tile) for tile in args.tiles]
+    configs += [('roi', tile) for tile in args.tiles]
+
+    width, height = (int(v) for v in args.frame_size.lower().split('x'))
+    samples = load_labelled(args.images) if args.images else []
+    if args.images:
+        print(f"{len(samples)} labelled frames, {sum(len(t) for _, t in samples)} objects")
+
+    print(f"\n{'mode':>6} {'tile':>5} {'images':>6} {'est ms':>8} {'min obj':>8}"
+          + (f" {'ms':>8} {'small R':>8} {'recall':>7} {'FP':>5}" if samples else ''))
+    for mode, tile in configs:
+        plan = cost.plan(width, height, mode, tile or args.imgsz, args.overlap, max_rois=args.max_rois)
+        line = (f"{mode:>6} {tile or '-':>5} {plan['images']:>6} {plan['latency_ms']:8.1f} "
+                f"{plan['min_object_px']:6.0f}px")
+        if samples:
+            detect = backend if mode == 'full' else TiledDetector(
+                backend, mode=mode, tile=tile, overlap=args.overlap, max_rois=args.max_rois)
+            result = evaluate(detect, samples, args.small_px, args.conf)
+            line += (f" {result['latency_ms']:8.1f} {result['small_recall']:8.3f} "
+                     f"{result['recall']:7.3f} {result['false_positives']:>5}")
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
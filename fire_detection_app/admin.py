@@ -1,21 +1,36 @@
 from django.contrib import admin
-from .models import UserProfile, FireAlert, Verification
+from .models import UserProfile, FireAlert, Incident, Verification, DetectionJob, ScheduledWave
 
 # Register your models here.
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
-    list_display = ['user', 'guardian_points', 'created_at']
+    list_display = ['user', 'guardian_points', 'accuracy', 'response_time_avg', 'created_at']
     search_fields = ['user__username']
 
 @admin.register(FireAlert)
 class FireAlertAdmin(admin.ModelAdmin):
-    list_display = ['id', 'reporter', 'status', 'votes_yes', 'votes_no', 'created_at']
-    list_filter = ['status']
+    list_display = ['id', 'reporter', 'status', 'detection_status', 'votes_yes', 'votes_no', 'created_at']
+    list_filter = ['status', 'detection_status']
     search_fields = ['reporter__username']
 
+@admin.register(Incident)
+class IncidentAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'alert_count', 'primary_alert', 'first_seen', 'last_seen']
+    list_filter = ['status']
+
 @admin.register(Verification)
 class VerificationAdmin(admin.ModelAdmin):
     list_display = ['alert', 'verifier', 'vote', 'created_at']
     list_filter = ['vote']
     search_fields = ['verifier__username', 'alert__id']
+
+@admin.register(DetectionJob)
+class DetectionJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'alert', 'status', 'attempts', 'worker', 'created_at']
+    list_filter = ['status']
+
+@admin.register(ScheduledWave)
+class ScheduledWaveAdmin(admin.ModelAdmin):
+    list_display = ['id', 'alert', 'wave', 'due_at', 'status']
+    list_filter = ['status', 'wave']
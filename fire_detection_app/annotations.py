@@ -0,0 +1,174 @@
+"""Annotated alert images, rendered on request from stored box metadata.
+
+Detection only records the boxes (``FireAlert.detections``); the annotated
+JPEG is drawn when someone asks for it. Thumbnails are decoded at reduced
+resolution straight from the JPEG (``IMREAD_REDUCED_COLOR_*``) so a 320-pixel
+preview never materialises the full frame, and every render is kept in a
+size-bounded disk cache, least recently served evicted first.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import cv2
+from django.conf import settings
+
+BOX_COLOR = (0, 0, 255)
+_REDUCED_READS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                  (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+def detection_metadata(detections, shape):
+    """Boxes to store on the alert, with the size of the frame they refer to"""
+    height, width = shape[:2]
+    return {
+        'width': width,
+        'height': height,
+        'boxes': [{'box': [round(float(v), 1) for v in box[:4]], 'confidence': round(conf, 4)}
+                  for box, conf, _ in detections],
+    }
+
+
+def read_image(path, width=None, source_width=None):
+    """Decode an image, letting libjpeg downscale by 2/4/8 when a thumbnail is all we need"""
+    if width and source_width:
+        for factor, flag in _REDUCED_READS:
+            if source_width / factor >= width:
+                return cv2.imread(path, flag)
+    return cv2.imread(path)
+
+
+def render(path, metadata, width=None, quality=85):
+    """JPEG bytes of the image at ``path`` with the boxes drawn, at most ``width`` pixels wide"""
+    image = read_image(path, width, metadata.get('width'))
+    if image is None:
+        raise FileNotFoundError(path)
+    if width and image.shape[1] > width:
+        height = round(image.shape[0] * width / image.shape[1])
+        image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+
+    # Boxes are in the detection frame's pixels; the decoded image may be smaller
+    scale = image.shape[1] / (metadata.get('width') or image.shape[1])
+    thickness = max(1, round(2 * scale))
+    font_scale = max(0.4, 0.9 * scale)
+    for entry in metadata.get('boxes', []):
+        x1, y1, x2, y2 = (int(v * scale) for v in entry['box'])
+        cv2.rectangle(image, (x1, y1), (x2, y2), BOX_COLOR, thickness)
+        cv2.putText(image, f"{entry['confidence']:.2f}", (x1, max(y1 - 10 * thickness, 10)),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, BOX_COLOR, thickness)
+
+    ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError(f"Could not encode render of {path}")
+    return encoded.tobytes()
+
+
+class RenderCache:
+    """Directory of rendered JPEGs capped at ``max_bytes``.
+
+    A hit refreshes the file's mtime; when a write takes the directory over the
+    cap, the oldest files are removed until it is back under 90% of it. The
+    running size is re-measured on every eviction, so several processes can
+    share the directory.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, data):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self.measure()[0]
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self.evict(keep=path)
+        return path
+
+    def measure(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.jpg'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sum(size for _, size, _ in entries), entries
+
+    def evict(self, keep=None):
+        total, entries = self.measure()
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._size = total
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = RenderCache(
+            getattr(settings, 'ANNOTATION_CACHE_DIR', os.path.join(settings.MEDIA_ROOT, 'renders')),
+            getattr(settings, 'ANNOTATION_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+        )
+    return _cache
+
+
+def thumbnail_width(requested):
+    """Snap a requested width to the smallest configured size that covers it (None for full size)"""
+    if not requested:
+        return None
+    widths = sorted(getattr(settings, 'ANNOTATION_THUMBNAIL_WIDTHS', [320, 640, 1280]))
+    for width in widths:
+        if width >= requested:
+            return width
+    return None
+
+
+def open_annotated_image(alert, width=None):
+    """Open the cached render of an alert's boxes, rendering it on a miss"""
+    metadata = json.dumps(alert.detections, sort_keys=True)
+    version = hashlib.sha1(f"{alert.image.name}:{metadata}".encode()).hexdigest()[:12]
+    key = f"alert_{alert.id}_{width or 'full'}_{version}.jpg"
+
+    cache = get_cache()
+    path = cache.get(key)
+    if path is not None:
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            pass  # Evicted by another process in between
+    data = render(alert.image.path, alert.detections, width,
+                  getattr(settings, 'ANNOTATION_JPEG_QUALITY', 85))
+    return open(cache.put(key, data), 'rb')
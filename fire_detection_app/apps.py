@@ -6,3 +6,9 @@ class FireDetectionAppConfig(AppConfig):
 
     def ready(self):
         import fire_detection_app.signals
+        from django.conf import settings
+
+        # Off by default so migrate, shell and web workers never load the model
+        if getattr(settings, 'FIRE_DETECTION_PRELOAD_MODEL', False):
+            from .model_registry import preload_model
+            preload_model()
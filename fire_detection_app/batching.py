@@ -0,0 +1,103 @@
+"""Micro-batching front end for the detection model.
+
+Inference workers each submit one image; a single dispatcher thread gathers
+whatever arrives within ``max_wait_ms`` (up to ``max_batch_size`` images), runs
+one forward pass over the whole batch and hands every caller its own result.
+Under a burst of camera uploads this amortises the per-call overhead of the
+model across the batch instead of paying it once per alert.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _InferenceRequest:
+    __slots__ = ('image', 'future')
+
+    def __init__(self, image):
+        self.image = image
+        self.future = Future()
+
+
+class BatchInferenceEngine:
+    """Collects concurrent inference requests into batched model calls"""
+
+    def __init__(self, predict_batch, max_batch_size=8, max_wait_ms=5.0):
+        # predict_batch takes a list of images and returns one result per image
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.images_processed = 0
+        self.batches_run = 0
+
+    def submit(self, image):
+        """Queue an image and return a Future for its result"""
+        self._ensure_started()
+        request = _InferenceRequest(image)
+        self._requests.put(request)
+        return request.future
+
+    def infer(self, image, timeout=None):
+        """Run inference on one image, sharing a batch with concurrent callers"""
+        return self.submit(image).result(timeout)
+
+    def stats(self):
+        return {
+            'images_processed': self.images_processed,
+            'batches_run': self.batches_run,
+            'avg_batch_size': (self.images_processed / self.batches_run
+                               if self.batches_run else 0.0),
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _collect_batch(self):
+        # Block for the first request, then wait at most max_wait for company
+        batch = [self._requests.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._requests.get_nowait())
+                else:
+                    batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Drop requests their callers cancelled; the rest can no longer be cancelled
+            batch = [request for request in self._collect_batch()
+                     if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            error = None
+            try:
+                results = list(self.predict_batch([request.image for request in batch]))
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Model returned {len(results)} results for {len(batch)} images")
+            except Exception as e:
+                error = e
+
+            # Every caller gets exactly one outcome, so none of them waits forever
+            for i, request in enumerate(batch):
+                if request.future.done():
+                    continue
+                if error is None:
+                    request.future.set_result(results[i])
+                else:
+                    request.future.set_exception(error)
+            self.images_processed += len(batch)
+            self.batches_run += 1
@@ -0,0 +1,101 @@
+import logging
+import time
+
+import cv2
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+
+from .annotations import detection_metadata
+from .batching import BatchInferenceEngine
+from .image_hash import dhash, to_hex
+from .incidents import assign_incident
+from .models import ScheduledWave
+from .model_registry import get_model
+from .result_cache import DetectionCache
+from .verification import start_verification_process
+
+logger = logging.getLogger(__name__)
+
+# Concurrent inference workers share batched forward passes on the model,
+# which is only loaded once the first batch arrives
+engine = BatchInferenceEngine(
+    lambda images: get_model().predict(images),
+    max_batch_size=getattr(settings, 'INFERENCE_BATCH_SIZE', 8),
+    max_wait_ms=getattr(settings, 'INFERENCE_BATCH_WAIT_MS', 5.0)
+)
+
+# Near-identical re-uploads from a camera reuse the previous result
+result_cache = DetectionCache(
+    max_entries=getattr(settings, 'DETECTION_CACHE_SIZE', 1024),
+    ttl_seconds=getattr(settings, 'DETECTION_CACHE_TTL_SECONDS', 300),
+    max_distance=getattr(settings, 'DETECTION_CACHE_MAX_DISTANCE', 3)
+)
+
+
+def infer_cached(img, camera_id, image_hash):
+    """Model result for an image, or the cached one of a near-identical frame from the same camera"""
+    use_cache = camera_id is not None and result_cache.max_entries > 0
+    if use_cache:
+        detections = result_cache.lookup(camera_id, image_hash)
+        if detections is not None:
+            return detections
+
+    start = time.perf_counter()
+    detections = engine.infer(img)
+    if use_cache:
+        result_cache.store(camera_id, image_hash, detections, time.perf_counter() - start)
+    return detections
+
+
+def resume_verification(alert):
+    """Start verification for an incident's primary alert if a failed run didn't get that far"""
+    if alert.status != 'pending' or alert.incident.primary_alert_id != alert.id:
+        return
+    # The first wave always schedules the next one, so that row marks a started verification
+    if ScheduledWave.objects.filter(alert=alert).exists():
+        return
+    if alert.verification_deadline is None:
+        alert.verification_deadline = timezone.now() + timedelta(minutes=5)
+        alert.save(update_fields=['verification_deadline'])
+    start_verification_process(alert)
+
+
+def detect_fire(alert):
+    """Run fire detection on an alert's image and start verification on a hit"""
+    if alert.incident_id is not None:
+        # A retried job whose earlier run already clustered the alert
+        resume_verification(alert)
+        return
+
+    img = cv2.imread(alert.image.path)
+    image_hash = dhash(img)
+    alert.image_hash = to_hex(image_hash)
+    detections = infer_cached(img, alert.camera_id, image_hash)
+
+    if len(detections) > 0:
+        max_conf = detections.max_confidence
+
+        if max_conf > 0.5:  # Confidence threshold
+            # Only the boxes are stored; the annotated image is rendered when requested
+            alert.detections = detection_metadata(detections, img.shape)
+            alert.detection_confidence = max_conf
+            alert.detection_status = 'completed'
+
+            # Another camera (or an earlier frame) may already have reported this fire
+            incident, created = assign_incident(alert)
+            if not created:
+                logger.info("Alert %s joined incident %s (%s alerts)", alert.id, incident.id, incident.alert_count)
+                return
+
+            alert.verification_deadline = timezone.now() + timedelta(minutes=5)
+            alert.save(update_fields=['verification_deadline'])
+
+            # Start verification process
+            start_verification_process(alert)
+            return
+
+        alert.detection_confidence = max_conf
+
+    alert.detection_status = 'completed'
+    alert.save()
@@ -0,0 +1,229 @@
+"""Publish/subscribe used to push verification requests to guardians.
+
+``InProcessBroker`` fans messages out to subscribers living in the same
+process: each subscriber is an asyncio queue owned by a streaming response.
+Waves are usually dispatched by the inference workers or the scheduler, which
+are separate processes from the ASGI server, so ``DatabaseBroker`` stands in
+for a real broker: publish writes a BrokerMessage row, and one poller thread
+per subscribing process relays new rows to its local subscribers. The class is
+picked with the ``FIRE_DETECTION_EVENT_BROKER`` setting.
+"""
+import asyncio
+import queue
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+def verification_channel(user_id):
+    return f"verifications.{user_id}"
+
+
+class Subscription:
+    """A subscriber's mailbox, read from the event loop that created it"""
+
+    def __init__(self, channel, loop=None):
+        self.channel = channel
+        self.loop = loop or asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def deliver(self, message):
+        # Called from any thread; hand the message to the subscriber's loop
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+        except RuntimeError:
+            pass  # The loop has closed; the subscriber is gone
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class BlockingSubscription:
+    """A subscriber's mailbox read by a thread, for streams served over WSGI"""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.queue = queue.Queue()
+
+    def deliver(self, message):
+        self.queue.put(message)
+
+    def get(self, timeout=None):
+        """The next message; raises queue.Empty after ``timeout`` seconds"""
+        return self.queue.get(timeout=timeout)
+
+
+class InProcessBroker:
+    """Fans messages out to subscribers in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, channel, loop=None):
+        """Start receiving a channel's messages on an event loop (the running one by default)"""
+        return self._add(Subscription(channel, loop))
+
+    def subscribe_blocking(self, channel):
+        """Start receiving a channel's messages in a BlockingSubscription"""
+        return self._add(BlockingSubscription(channel))
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscriptions.setdefault(subscription.channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.channel, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscriptions.pop(subscription.channel, None)
+
+    def publish(self, channel, message):
+        self._deliver(channel, message)
+
+    def publish_many(self, messages):
+        """Publish a list of (channel, message) pairs"""
+        for channel, message in messages:
+            self.publish(channel, message)
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+
+class DatabaseBroker(InProcessBroker):
+    """Relays messages between processes through the BrokerMessage table.
+
+    Ids are handed out when a row is inserted, not when its transaction
+    commits, so a message with a lower id can become visible after a higher
+    one was already relayed. Ids skipped over are remembered as gaps and looked
+    up again on every poll until they appear or ``gap_seconds`` pass (ids
+    taken by a rolled back transaction never appear).
+    """
+
+    def __init__(self, poll_interval=0.5, retention_seconds=3600, gap_seconds=60):
+        super().__init__()
+        self.poll_interval = poll_interval
+        self.retention = timedelta(seconds=retention_seconds)
+        self.gap_seconds = gap_seconds
+        self._poller = None
+        self._poller_lock = threading.Lock()
+
+    def publish(self, channel, message):
+        self.publish_many([(channel, message)])
+
+    def publish_many(self, messages):
+        from .models import BrokerMessage
+        BrokerMessage.objects.bulk_create([
+            BrokerMessage(channel=channel, payload=message) for channel, message in messages
+        ])
+
+    def _add(self, subscription):
+        self._ensure_poller()
+        return super()._add(subscription)
+
+    def _ensure_poller(self):
+        if self._poller is not None:
+            return
+        with self._poller_lock:
+            if self._poller is None:
+                from .models import BrokerMessage
+                # Only relay messages published from now on
+                last_id = BrokerMessage.objects.order_by('-id').values_list('id', flat=True).first() or 0
+                self._poller = threading.Thread(target=self._poll, args=(last_id,), daemon=True)
+                self._poller.start()
+
+    def fetch(self, last_id, gaps):
+        """Messages after ``last_id`` or filling one of ``gaps``, and the new last id.
+
+        ``gaps`` maps each skipped id to when it was first skipped and is
+        updated in place.
+        """
+        from .models import BrokerMessage
+
+        now = time.monotonic()
+        for missing, seen in list(gaps.items()):
+            if now - seen > self.gap_seconds:
+                del gaps[missing]
+
+        new = Q(id__gt=last_id)
+        if gaps:
+            new |= Q(id__in=list(gaps))
+        messages = list(BrokerMessage.objects.filter(new).order_by('id'))
+        for message in messages:
+            if message.id > last_id:
+                for missing in range(last_id + 1, message.id):
+                    gaps[missing] = now
+                last_id = message.id
+            else:
+                gaps.pop(message.id, None)
+        return messages, last_id
+
+    def _poll(self, last_id):
+        from .models import BrokerMessage
+
+        polls = 0
+        gaps = {}
+        while True:
+            close_old_connections()
+            try:
+                messages, last_id = self.fetch(last_id, gaps)
+                for message in messages:
+                    self._deliver(message.channel, message.payload)
+
+                polls += 1
+                if polls % 120 == 0:
+                    BrokerMessage.objects.filter(created_at__lt=timezone.now() - self.retention).delete()
+            except Exception as e:
+                print(f"Error polling broker messages: {e}")
+                connection.close()
+            time.sleep(self.poll_interval)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker configured by FIRE_DETECTION_EVENT_BROKER"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = import_string(getattr(
+                    settings, 'FIRE_DETECTION_EVENT_BROKER',
+                    'fire_detection_app.events.DatabaseBroker'
+                ))
+                _broker = broker_class()
+    return _broker
+
+
+def verification_request_message(alert):
+    return {
+        'type': 'verification_request',
+        'alert_id': alert.id,
+        'latitude': alert.latitude,
+        'longitude': alert.longitude,
+        'confidence': alert.detection_confidence,
+        'image_url': alert.image.url if alert.image else None,
+        'verification_deadline': (alert.verification_deadline.isoformat()
+                                  if alert.verification_deadline else None),
+    }
+
+
+def publish_verification_requests(alert, user_ids):
+    """Tell each selected volunteer about the alert they were asked to verify"""
+    message = verification_request_message(alert)
+    get_broker().publish_many([
+        (verification_channel(user_id), message) for user_id in user_ids
+    ])
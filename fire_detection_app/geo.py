@@ -0,0 +1,154 @@
+"""Geohash helpers for finding guardians close to an alert without PostGIS.
+
+Each located UserProfile stores the geohash of its position in an indexed
+column. A geohash prefix is a rectangular cell and every point inside it shares
+the prefix, so "all profiles in a cell" is a single index range scan. The
+nearest-k search looks at the 3x3 block of cells around the alert, starting
+with small cells and moving to coarser ones until k profiles fall inside the
+radius the block is guaranteed to cover.
+"""
+import math
+
+from django.db.models import Q
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+EARTH_RADIUS_KM = 6371.0
+
+# Sorts after every geohash character, so [cell, cell + '~') is the cell's range
+RANGE_END = '~'
+
+
+def encode_geohash(latitude, longitude, precision=9):
+    """Encode a position as a geohash string"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def geohash_bounds(geohash):
+    """Return (min_lat, min_lon, max_lat, max_lon) of a geohash cell"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lon_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if bit:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def geohash_block(latitude, longitude, precision):
+    """The cell containing a point plus its eight neighbours, and their joint bounds"""
+    min_lat, min_lon, max_lat, max_lon = geohash_bounds(encode_geohash(latitude, longitude, precision))
+    height = max_lat - min_lat
+    width = max_lon - min_lon
+    cells = set()
+    for d_lat in (-1, 0, 1):
+        for d_lon in (-1, 0, 1):
+            lat = (min_lat + max_lat) / 2 + d_lat * height
+            lon = (min_lon + max_lon) / 2 + d_lon * width
+            if -90 <= lat <= 90:
+                lon = (lon + 180) % 360 - 180
+                cells.add(encode_geohash(lat, lon, precision))
+    bounds = (min_lat - height, min_lon - width, max_lat + height, max_lon + width)
+    return sorted(cells), bounds
+
+
+def covered_radius_km(latitude, longitude, bounds):
+    """Distance from a point to the nearest edge of a lat/lon box around it"""
+    min_lat, min_lon, max_lat, max_lon = bounds
+    lat_km = min(latitude - min_lat, max_lat - latitude) * math.pi / 180 * EARTH_RADIUS_KM
+    # Longitude degrees shrink towards the poles; use the widest latitude in the box
+    widest = max(abs(min_lat), abs(max_lat))
+    lon_scale = math.cos(math.radians(min(widest, 90.0)))
+    lon_km = min(longitude - min_lon, max_lon - longitude) * math.pi / 180 * EARTH_RADIUS_KM * lon_scale
+    return max(0.0, min(lat_km, lon_km))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def cells_filter(cells):
+    """Q matching objects whose geohash lies in any of the cells"""
+    in_cells = Q()
+    for cell in cells:
+        # A range rather than startswith, so SQLite can use the index too
+        in_cells |= Q(geohash__gte=cell, geohash__lt=cell + RANGE_END)
+    return in_cells
+
+
+def within(queryset, latitude, longitude, radius_km, max_precision=9):
+    """(distance, object) pairs of a queryset within ``radius_km`` of a point, nearest first.
+
+    Uses the finest 3x3 cell block that still covers the radius, so only
+    objects in a few index ranges are loaded.
+    """
+    for precision in range(max_precision, 0, -1):
+        cells, bounds = geohash_block(latitude, longitude, precision)
+        if covered_radius_km(latitude, longitude, bounds) >= radius_km:
+            break
+    matches = ((haversine_km(latitude, longitude, obj.latitude, obj.longitude), obj)
+               for obj in queryset.filter(cells_filter(cells)))
+    return sorted((match for match in matches if match[0] <= radius_km), key=lambda match: match[0])
+
+
+def nearest(queryset, latitude, longitude, k, max_precision=6):
+    """The k objects of a queryset closest to a point, nearest first.
+
+    The queryset's model needs ``latitude``, ``longitude`` and an indexed
+    ``geohash`` field. Objects without a geohash are never returned.
+    """
+    candidates = []
+    for precision in range(max_precision, 0, -1):
+        cells, bounds = geohash_block(latitude, longitude, precision)
+        candidates = sorted(
+            ((haversine_km(latitude, longitude, obj.latitude, obj.longitude), obj)
+             for obj in queryset.filter(cells_filter(cells))),
+            key=lambda candidate: candidate[0]
+        )
+        # Anything outside the block is further away than this radius, so the
+        # first k candidates are final once the k-th is within it
+        radius = covered_radius_km(latitude, longitude, bounds)
+        if len(candidates) >= k and candidates[k - 1][0] <= radius:
+            break
+    return [obj for _, obj in candidates[:k]]
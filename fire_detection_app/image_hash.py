@@ -0,0 +1,30 @@
+"""Perceptual image hashes, computed with OpenCV and NumPy.
+
+A difference hash (dHash) shrinks the image to 9x8 grey pixels and keeps one
+bit per horizontally adjacent pair: whether brightness increases. Frames of the
+same scene hash to values a few bits apart despite JPEG noise, exposure drift
+or a growing smoke plume, while a different view flips about half the bits.
+"""
+import cv2
+import numpy as np
+
+
+def dhash(image, size=8):
+    """64-bit (for size 8) difference hash of a BGR or greyscale image, as an int"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def to_hex(value):
+    return f"{value:016x}"
+
+
+def from_hex(text):
+    return int(text, 16)
+
+
+def hamming(a, b):
+    """Number of differing bits between two hashes"""
+    return (a ^ b).bit_count()
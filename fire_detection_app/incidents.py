@@ -0,0 +1,122 @@
+"""Clustering of detected alerts into incidents.
+
+Several cameras watching the same smoke column all report it. Each detected
+alert is matched against the open (or confirmed) incidents that were last seen
+within ``INCIDENT_WINDOW_MINUTES`` and lie within ``INCIDENT_RADIUS_KM``; the
+lookup is a geohash cell range scan on the incident table, so it costs the
+same however long the alert history gets. A match attaches the alert to that
+incident and no new verification waves are sent. Cameras report their own
+position rather than the fire's, so for a second alert from the same camera
+the perceptual image hash must also be close: a camera seeing two fires in
+different directions opens two incidents.
+
+Two alerts for a new fire can arrive together, when neither has an incident
+row to lock yet. So before looking, an alert locks the IncidentLock rows of
+the 3x3 block of geohash cells around it. The cells are at least the incident
+radius wide, so any two alerts close enough to cluster share a locked cell and
+assign their incidents one after the other.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .geo import EARTH_RADIUS_KM, geohash_block, geohash_bounds, within
+from .image_hash import from_hex, hamming
+from .models import FireAlert, Incident, IncidentLock
+
+ACTIVE_STATUSES = ['open', 'confirmed']
+# Lock cells are sized for this latitude; cells get narrower towards the poles
+LOCK_MAX_LATITUDE = 70.0
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def same_scene(alert, incident):
+    """False if the incident already has an alert from this camera showing a different view"""
+    if not alert.camera_id or not alert.image_hash:
+        return True
+    previous = (incident.alerts.filter(camera_id=alert.camera_id)
+                .exclude(image_hash='').order_by('-created_at')
+                .values_list('image_hash', flat=True).first())
+    if previous is None:
+        return True
+    distance = hamming(from_hex(alert.image_hash), from_hex(previous))
+    return distance <= _setting('INCIDENT_HASH_DISTANCE', 12)
+
+
+def lock_precision(radius_km):
+    """The finest geohash precision whose cells are at least ``radius_km`` tall and wide"""
+    km_per_degree = math.pi / 180 * EARTH_RADIUS_KM
+    for precision in range(9, 0, -1):
+        min_lat, min_lon, max_lat, max_lon = geohash_bounds('0' * precision)
+        height = (max_lat - min_lat) * km_per_degree
+        width = (max_lon - min_lon) * km_per_degree * math.cos(math.radians(LOCK_MAX_LATITUDE))
+        if min(height, width) >= radius_km:
+            return precision
+    return 1
+
+
+def lock_area(latitude, longitude):
+    """Lock the cells around a point until the end of the transaction"""
+    cells, _ = geohash_block(latitude, longitude, lock_precision(_setting('INCIDENT_RADIUS_KM', 3.0)))
+    # Inserting is a write, which on SQLite already serialises the transactions
+    IncidentLock.objects.bulk_create([IncidentLock(geohash=cell) for cell in cells], ignore_conflicts=True)
+    # Sorted, so overlapping blocks are always locked in the same order
+    list(IncidentLock.objects.filter(geohash__in=cells).order_by('geohash').select_for_update())
+
+
+def find_incident(alert, now):
+    """The closest active incident the alert duplicates, locked for update, or None"""
+    recent = Incident.objects.filter(
+        status__in=ACTIVE_STATUSES,
+        last_seen__gte=now - timedelta(minutes=_setting('INCIDENT_WINDOW_MINUTES', 60))
+    ).select_for_update()
+    candidates = within(recent, alert.latitude, alert.longitude, _setting('INCIDENT_RADIUS_KM', 3.0))
+    for _, incident in candidates:
+        if same_scene(alert, incident):
+            return incident
+    return None
+
+
+def assign_incident(alert):
+    """Attach a detected alert to the incident it duplicates or open a new one; saves the alert.
+
+    Returns (incident, created). Only a newly created incident should start
+    verification. A duplicate of an already confirmed incident is confirmed too.
+    """
+    now = alert.created_at or timezone.now()
+    with transaction.atomic():
+        lock_area(alert.latitude, alert.longitude)
+        incident = find_incident(alert, now)
+        if incident is None:
+            incident = Incident.objects.create(
+                primary_alert=alert, latitude=alert.latitude, longitude=alert.longitude,
+                first_seen=now, last_seen=now
+            )
+            created = True
+        else:
+            incident.alert_count += 1
+            incident.last_seen = max(incident.last_seen, now)
+            incident.save(update_fields=['alert_count', 'last_seen'])
+            if incident.status == 'confirmed':
+                alert.status = 'confirmed'
+            created = False
+
+        alert.incident = incident
+        alert.save()
+    return incident, created
+
+
+def resolve_incident(alert_id, outcome):
+    """Give the outcome of a verified primary alert to its incident and the alerts attached to it"""
+    incident_id = (Incident.objects.filter(primary_alert_id=alert_id)
+                   .values_list('id', flat=True).first())
+    if incident_id is None:
+        return 0
+    Incident.objects.filter(pk=incident_id).update(status=outcome)
+    return FireAlert.objects.filter(incident_id=incident_id, status='pending').update(status=outcome)
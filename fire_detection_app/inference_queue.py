@@ -0,0 +1,92 @@
+"""Persistent detection queue backed by the DetectionJob table.
+
+Uploads enqueue a job in the same transaction that saves the alert; inference
+workers claim jobs with a conditional UPDATE so two workers never run the same
+alert, even when they share nothing but the database.
+"""
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from datetime import timedelta
+
+from .models import DetectionJob, FireAlert
+
+
+def _max_attempts():
+    return getattr(settings, 'DETECTION_MAX_ATTEMPTS', 3)
+
+
+def _lease_seconds():
+    return getattr(settings, 'DETECTION_JOB_LEASE_SECONDS', 300)
+
+
+def enqueue_detection(alert):
+    """Queue an alert for fire detection"""
+    job, _ = DetectionJob.objects.get_or_create(alert=alert)
+    if alert.detection_status != 'queued':
+        alert.detection_status = 'queued'
+        alert.save(update_fields=['detection_status'])
+    return job
+
+
+def enqueue_detections(alerts):
+    """Queue a batch of freshly inserted alerts with a single INSERT"""
+    return DetectionJob.objects.bulk_create([DetectionJob(alert=alert) for alert in alerts])
+
+
+def claim_next_job(worker_name):
+    """Claim the oldest queued job, or return None if the queue is empty"""
+    while True:
+        job = (DetectionJob.objects
+               .filter(status='queued')
+               .order_by('created_at', 'id')
+               .first())
+        if job is None:
+            return None
+
+        # Only one worker can flip the row from queued to running
+        claimed = DetectionJob.objects.filter(pk=job.pk, status='queued').update(
+            status='running',
+            worker=worker_name,
+            locked_at=timezone.now(),
+            attempts=F('attempts') + 1
+        )
+        if claimed:
+            job.refresh_from_db()
+            FireAlert.objects.filter(pk=job.alert_id).update(detection_status='processing')
+            return job
+
+
+def complete_job(job):
+    """Mark a job as successfully processed"""
+    DetectionJob.objects.filter(pk=job.pk).update(status='done', error='')
+
+
+def fail_job(job, error):
+    """Requeue a failed job, or give up once it has used all its attempts"""
+    if job.attempts < _max_attempts():
+        DetectionJob.objects.filter(pk=job.pk).update(status='queued', error=str(error))
+        FireAlert.objects.filter(pk=job.alert_id).update(detection_status='queued')
+    else:
+        DetectionJob.objects.filter(pk=job.pk).update(status='failed', error=str(error))
+        FireAlert.objects.filter(pk=job.alert_id).update(detection_status='failed')
+
+
+def requeue_stale_jobs():
+    """Return jobs whose worker died mid-run to the queue, or fail them once out of attempts.
+
+    A frame that crashes its worker every time ends up here rather than in
+    fail_job, so the attempts limit is applied the same way. Returns
+    (requeued, failed).
+    """
+    cutoff = timezone.now() - timedelta(seconds=_lease_seconds())
+    stale = DetectionJob.objects.filter(status='running', locked_at__lt=cutoff)
+    counts = []
+    for jobs, status in [(stale.filter(attempts__lt=_max_attempts()), 'queued'),
+                         (stale.filter(attempts__gte=_max_attempts()), 'failed')]:
+        alert_ids = list(jobs.values_list('alert_id', flat=True))
+        counts.append(DetectionJob.objects.filter(
+            alert_id__in=alert_ids, status='running'
+        ).update(status=status, error='Worker lease expired'))
+        FireAlert.objects.filter(pk__in=alert_ids).update(detection_status=status)
+    return tuple(counts)
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from django.db import close_old_connections, connection
+
+from .inference_queue import claim_next_job, complete_job, fail_job, requeue_stale_jobs
+
+
+class InferenceWorkerPool:
+    """Pool of threads that drain the detection queue"""
+
+    def __init__(self, num_workers=2, poll_interval=1.0, name_prefix='inference', requeue_interval=60.0):
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.name_prefix = name_prefix
+        self.requeue_interval = requeue_interval
+        self.stop_event = threading.Event()
+        self.threads = []
+        self._requeue_lock = threading.Lock()
+        self._next_requeue = 0.0
+
+    def start(self):
+        """Recover abandoned jobs and start the worker threads"""
+        self.requeue_stale()
+
+        for i in range(self.num_workers):
+            thread = threading.Thread(
+                target=self._run,
+                args=(f"{self.name_prefix}-{i+1}",),
+                daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Ask the workers to exit once their current job finishes"""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def requeue_stale(self):
+        """Recover jobs of workers that died, here or in another process, at most once per requeue_interval"""
+        with self._requeue_lock:
+            if time.monotonic() < self._next_requeue:
+                return
+            self._next_requeue = time.monotonic() + self.requeue_interval
+        requeued, failed = requeue_stale_jobs()
+        if requeued or failed:
+            print(f"Requeued {requeued} stale detection jobs, failed {failed} out of attempts")
+
+    def _run(self, worker_name):
+        from .detection import detect_fire
+
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                self.requeue_stale()
+                job = claim_next_job(worker_name)
+                if job is None:
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+
+                try:
+                    detect_fire(job.alert)
+                    complete_job(job)
+                except Exception as e:
+                    print(f"[{worker_name}] Detection failed for alert {job.alert_id}: {e}")
+                    fail_job(job, e)
+        finally:
+            connection.close()
@@ -0,0 +1,248 @@
+"""Guardian leaderboard kept in an order-statistic skip list.
+
+Sorting ``UserProfile`` by ``guardian_points`` on every request costs a full
+scan (and "what is my rank" a COUNT over everyone ahead). Instead each process
+keeps every guardian in an indexable skip list ordered by points, highest
+first, with ties broken by user id. Every link stores how many positions it
+skips, so both "the k-th guardian" and "the position of this guardian" take
+O(log n) steps, and a points change is one O(log n) remove plus one insert.
+
+``verify_fire`` applies its own awards right after commit. Changes made by
+other processes are picked up by ``refresh``, which reads only the profiles
+whose indexed ``updated_at`` moved since the last refresh.
+"""
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+MAX_LEVEL = 24
+USER_ID_BITS = 32
+
+
+def encode(points, user_id):
+    """One int that sorts by points descending, then user id ascending"""
+    return (-int(points) << USER_ID_BITS) | user_id
+
+
+def decode(key):
+    return -(key >> USER_ID_BITS), key & ((1 << USER_ID_BITS) - 1)
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        # width[i]: how many positions following next[i] moves forward
+        self.width = [1] * level
+
+
+class IndexableSkipList:
+    """Sorted set of ints with O(log n) insert, remove, rank and select (1-based positions)"""
+
+    def __init__(self, seed=None):
+        self.head = _Node(None, MAX_LEVEL)
+        self.size = 0
+        self._random = random.Random(seed)
+
+    def _level(self):
+        level = 1
+        while level < MAX_LEVEL and self._random.random() < 0.25:
+            level += 1
+        return level
+
+    def _path(self, key):
+        """Last node before ``key`` on every level, and its position"""
+        update = [None] * MAX_LEVEL
+        positions = [0] * MAX_LEVEL
+        node, position = self.head, 0
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            update[level] = node
+            positions[level] = position
+        return update, positions
+
+    def insert(self, key):
+        update, positions = self._path(key)
+        position = positions[0]
+        node = _Node(key, self._level())
+        for level in range(len(node.next)):
+            previous = update[level]
+            skipped = position - positions[level]
+            node.next[level] = previous.next[level]
+            node.width[level] = previous.width[level] - skipped
+            previous.next[level] = node
+            previous.width[level] = skipped + 1
+        for level in range(len(node.next), MAX_LEVEL):
+            update[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        update, _ = self._path(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for level in range(MAX_LEVEL):
+            previous = update[level]
+            if previous.next[level] is node:
+                previous.width[level] += node.width[level] - 1
+                previous.next[level] = node.next[level]
+            else:
+                previous.width[level] -= 1
+        self.size -= 1
+
+    def rank(self, key):
+        """Position of ``key``, or None if absent"""
+        update, positions = self._path(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            return None
+        return positions[0] + 1
+
+    def iter_from(self, position):
+        """Keys from ``position`` onwards"""
+        node, current = self.head, 0
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and current + node.width[level] <= position:
+                current += node.width[level]
+                node = node.next[level]
+        if current != position or node is self.head:
+            return
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+    @classmethod
+    def from_sorted(cls, keys, seed=None):
+        """Build from strictly increasing keys in O(n)"""
+        skiplist = cls(seed)
+        last = [skiplist.head] * MAX_LEVEL
+        last_position = [0] * MAX_LEVEL
+        position = 0
+        for position, key in enumerate(keys, 1):
+            node = _Node(key, skiplist._level())
+            for level in range(len(node.next)):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+        for level in range(MAX_LEVEL):
+            last[level].width[level] = position + 1 - last_position[level]
+        skiplist.size = position
+        return skiplist
+
+    def __len__(self):
+        return self.size
+
+
+class Leaderboard:
+    """Guardian ranking by points, answering top-N and "my rank" in O(log n)"""
+
+    def __init__(self, refresh_interval=2.0, overlap_seconds=60):
+        self.refresh_interval = refresh_interval
+        # Re-read a little before the last refresh: a transaction may commit
+        # an updated_at that is older than the moment we last looked
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self._points = {}
+        self._list = IndexableSkipList()
+        self._lock = threading.RLock()
+        self._synced_at = None
+        self._checked_at = 0.0
+
+    def load(self, rows):
+        """Replace the contents with (user_id, points) rows"""
+        points = dict(rows)
+        keys = sorted(encode(p, user_id) for user_id, p in points.items())
+        with self._lock:
+            self._points = points
+            self._list = IndexableSkipList.from_sorted(keys)
+
+    def update(self, user_id, points):
+        points = int(points)
+        with self._lock:
+            old = self._points.get(user_id)
+            if old == points:
+                return
+            if old is not None:
+                self._list.remove(encode(old, user_id))
+            self._list.insert(encode(points, user_id))
+            self._points[user_id] = points
+
+    def discard(self, user_id):
+        with self._lock:
+            old = self._points.pop(user_id, None)
+            if old is not None:
+                self._list.remove(encode(old, user_id))
+
+    def rank(self, user_id):
+        """1-based position of a guardian, or None if unknown"""
+        with self._lock:
+            points = self._points.get(user_id)
+            if points is None:
+                return None
+            return self._list.rank(encode(points, user_id))
+
+    def entry(self, user_id):
+        """(position, user_id, points) of one guardian, or None"""
+        with self._lock:
+            points = self._points.get(user_id)
+            if points is None:
+                return None
+            return self._list.rank(encode(points, user_id)), user_id, points
+
+    def top(self, limit=10, offset=0):
+        """[(position, user_id, points)] for ``limit`` guardians after ``offset``"""
+        entries = []
+        with self._lock:
+            for key in self._list.iter_from(offset + 1):
+                if len(entries) == limit:
+                    break
+                points, user_id = decode(key)
+                entries.append((offset + len(entries) + 1, user_id, points))
+        return entries
+
+    def __len__(self):
+        return len(self._points)
+
+    def refresh(self, force=False):
+        """Apply profile changes made since the last refresh (all profiles the first time)"""
+        from .models import UserProfile
+
+        with self._lock:
+            if not force and time.monotonic() - self._checked_at < self.refresh_interval:
+                return
+            self._checked_at = time.monotonic()
+            now = timezone.now()
+            if self._synced_at is None:
+                self.load(UserProfile.objects.values_list('user_id', 'guardian_points').iterator())
+            else:
+                changed = UserProfile.objects.filter(
+                    updated_at__gte=self._synced_at - self.overlap
+                ).values_list('user_id', 'guardian_points')
+                for user_id, points in changed:
+                    self.update(user_id, points)
+            self._synced_at = now
+
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+
+def get_leaderboard():
+    """The process-wide leaderboard, brought up to date with the database"""
+    global _leaderboard
+    if _leaderboard is None:
+        with _leaderboard_lock:
+            if _leaderboard is None:
+                _leaderboard = Leaderboard(
+                    refresh_interval=getattr(settings, 'LEADERBOARD_REFRESH_SECONDS', 2.0)
+                )
+    _leaderboard.refresh()
+    return _leaderboard
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import Coalesce, TruncDate
+
+from fire_detection_app.models import UserProfile, Verification
+
+
+def streaks_from_votes(rows):
+    """{verifier_id: (streak, last_day)} from (verifier_id, day) rows, newest day first per verifier"""
+    streaks = {}
+    current, streak, last_day, expected = None, 0, None, None
+    for verifier_id, day in rows:
+        if verifier_id != current:
+            if current is not None:
+                streaks[current] = (streak, last_day)
+            current, streak, last_day, expected = verifier_id, 0, day, day
+        if day == expected:
+            streak += 1
+            expected = day - timedelta(days=1)
+    if current is not None:
+        streaks[current] = (streak, last_day)
+    return streaks
+
+
+class Command(BaseCommand):
+    help = 'Recompute every guardian\'s verification streak from the days their votes were cast'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Profiles written per UPDATE')
+
+    def handle(self, *args, **options):
+        # One query: the distinct days each guardian voted on, newest first. Votes
+        # recorded before voted_at existed count on the day the request was sent
+        rows = (
+            Verification.objects.filter(vote__isnull=False)
+            .annotate(day=TruncDate(Coalesce('voted_at', 'created_at')))
+            .values_list('verifier_id', 'day')
+            .distinct()
+            .order_by('verifier_id', '-day')
+        )
+        streaks = streaks_from_votes(rows.iterator())
+
+        with transaction.atomic():
+            UserProfile.objects.update(current_streak=0, last_active_day=None)
+            profiles = []
+            for profile in UserProfile.objects.only('id', 'user_id').iterator():
+                if profile.user_id in streaks:
+                    profile.current_streak, profile.last_active_day = streaks[profile.user_id]
+                    profiles.append(profile)
+            UserProfile.objects.bulk_update(
+                profiles, ['current_streak', 'last_active_day'], batch_size=options['batch_size']
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled streaks for {len(profiles)} guardians"))
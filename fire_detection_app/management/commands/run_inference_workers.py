@@ -0,0 +1,61 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from fire_detection_app.inference_workers import InferenceWorkerPool
+from fire_detection_app.model_registry import preload_model
+
+
+class Command(BaseCommand):
+    help = 'Run the background fire detection workers that drain the detection queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=getattr(settings, 'INFERENCE_WORKERS', 2),
+                            help='Number of inference worker threads')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait between polls of an empty queue')
+        parser.add_argument('--requeue-interval', type=float, default=60.0,
+                            help='Seconds between checks for jobs whose worker died')
+        parser.add_argument('--no-preload', action='store_true',
+                            help='Load the model on the first job instead of at startup')
+        parser.add_argument('--stats-interval', type=float, default=60.0,
+                            help='Seconds between batching and result cache stats lines (0 to disable)')
+
+    def handle(self, *args, **options):
+        if not options['no_preload']:
+            preload_model()
+
+        pool = InferenceWorkerPool(
+            num_workers=options['workers'],
+            poll_interval=options['poll_interval'],
+            requeue_interval=options['requeue_interval']
+        )
+        pool.start()
+        self.stdout.write(self.style.SUCCESS(
+            f"Started {options['workers']} inference workers"))
+
+        from fire_detection_app.detection import engine, result_cache
+
+        interval = options['stats_interval']
+        last_report = time.monotonic()
+        last_lookups = 0
+        try:
+            while True:
+                time.sleep(1)
+                if interval and time.monotonic() - last_report >= interval:
+                    last_report = time.monotonic()
+                    cache = result_cache.stats()
+                    if cache['lookups'] != last_lookups:
+                        last_lookups = cache['lookups']
+                        batching = engine.stats()
+                        self.stdout.write(
+                            f"Inference: {batching['images_processed']} images in "
+                            f"{batching['batches_run']} batches (avg {batching['avg_batch_size']:.1f}); "
+                            f"result cache: {cache['hits']}/{cache['lookups']} hits "
+                            f"({cache['hit_rate']:.0%}), {cache['saved_inference_seconds']:.1f}s inference saved, "
+                            f"{cache['entries']} entries")
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping inference workers...")
+            pool.stop()
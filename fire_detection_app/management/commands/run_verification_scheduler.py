@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from fire_detection_app.scheduler import VerificationScheduler
+
+
+class Command(BaseCommand):
+    help = 'Run the scheduler that sends follow-up verification waves when they are due'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Longest time to sleep before checking for newly scheduled waves')
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Maximum number of waves to dispatch per tick')
+
+    def handle(self, *args, **options):
+        scheduler = VerificationScheduler(
+            poll_interval=options['poll_interval'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS("Verification scheduler started"))
+
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping verification scheduler...")
+            scheduler.stop()
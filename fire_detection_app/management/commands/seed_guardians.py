@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from fire_detection_app.models import UserProfile
+
+# rank, starting points, count
+SIMULATION_GUARDIANS = [
+    ('rookie', 0, 5),
+    ('trusted', 500, 5),
+    ('expert', 1000, 3),
+    ('master', 2000, 2),
+]
+
+
+class Command(BaseCommand):
+    help = 'Create the ranked test guardians used by the user simulator'
+
+    def handle(self, *args, **options):
+        created = 0
+        with transaction.atomic():
+            for rank, points, count in SIMULATION_GUARDIANS:
+                for i in range(count):
+                    user, is_new = User.objects.get_or_create(username=f"{rank}_{i+1}")
+                    # The profile is created by the post_save signal; updated_at is
+                    # set so a running server's leaderboard picks up the points
+                    UserProfile.objects.filter(user=user).update(
+                        rank=rank, guardian_points=points, is_available=True,
+                        updated_at=timezone.now()
+                    )
+                    created += is_new
+
+        self.stdout.write(self.style.SUCCESS(f"Seeded {created} new guardians"))
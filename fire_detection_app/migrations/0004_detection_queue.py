@@ -0,0 +1,43 @@
+# Generated by Django 5.0 on 2026-10-18 02:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mark_existing_alerts_detected(apps, schema_editor):
+    # Alerts uploaded before the queue existed were detected inline
+    FireAlert = apps.get_model('fire_detection_app', 'FireAlert')
+    FireAlert.objects.update(detection_status='completed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fire_detection_app', '0003_camera_firealert_fire_size_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='firealert',
+            name='detection_status',
+            field=models.CharField(choices=[('queued', 'Queued for Detection'), ('processing', 'Detection Running'), ('completed', 'Detection Completed'), ('failed', 'Detection Failed')], default='queued', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_alerts_detected, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='DetectionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('locked_at', models.DateTimeField(null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('alert', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='detection_job', to='fire_detection_app.firealert')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='detectionjob_status_created')],
+            },
+        ),
+    ]
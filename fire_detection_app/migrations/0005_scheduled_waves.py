@@ -0,0 +1,29 @@
+# Generated by Django 5.0 on 2026-10-18 02:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fire_detection_app', '0004_detection_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledWave',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wave', models.IntegerField()),
+                ('due_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('dispatched', 'Dispatched'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('alert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_waves', to='fire_detection_app.firealert')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'due_at'], name='scheduledwave_status_due')],
+                'unique_together': {('alert', 'wave')},
+            },
+        ),
+    ]
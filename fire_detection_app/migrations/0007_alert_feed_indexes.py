@@ -0,0 +1,31 @@
+# Generated by Django 5.0 on 2026-10-18 02:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fire_detection_app', '0006_guardian_location'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='firealert',
+            index=models.Index(fields=['created_at', 'id'], name='firealert_feed'),
+        ),
+        migrations.AddIndex(
+            model_name='firealert',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='firealert_status_feed'),
+        ),
+        migrations.AddIndex(
+            model_name='firealert',
+            index=models.Index(fields=['camera', 'created_at', 'id'], name='firealert_camera_feed'),
+        ),
+        migrations.AddIndex(
+            model_name='firealert',
+            index=models.Index(fields=['latitude', 'longitude'], name='firealert_position'),
+        ),
+    ]
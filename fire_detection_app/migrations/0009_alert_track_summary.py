@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fire_detection_app', '0008_broker_messages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='firealert',
+            name='track_summary',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fire_detection_app', '0009_alert_track_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='firealert',
+            name='detections',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0 on 2026-10-18 03:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fire_detection_app', '0010_alert_detections'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='firealert',
+            name='image_hash',
+            field=models.CharField(blank=True, max_length=16),
+        ),
+        migrations.CreateModel(
+            name='Incident',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('open', 'Awaiting Verification'), ('confirmed', 'Fire Confirmed'), ('false_alarm', 'False Alarm')], default='open', max_length=20)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('geohash', models.CharField(blank=True, max_length=12)),
+                ('alert_count', models.IntegerField(default=1)),
+                ('first_seen', models.DateTimeField()),
+                ('last_seen', models.DateTimeField()),
+                ('primary_alert', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='fire_detection_app.firealert')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='firealert',
+            name='incident',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='alerts', to='fire_detection_app.incident'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['status', 'geohash', 'last_seen'], name='incident_lookup'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fire_detection_app', '0013_profile_streaks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='accuracy',
+            field=models.FloatField(default=0.5),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='response_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='response_histogram',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='response_time_m2',
+            field=models.FloatField(default=0),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-18 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fire_detection_app', '0014_guardian_response_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentLock',
+            fields=[
+                ('geohash', models.CharField(max_length=12, primary_key=True, serialize=False)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fire_detection_app', '0015_incident_locks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verification',
+            name='voted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
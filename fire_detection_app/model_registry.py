@@ -0,0 +1,60 @@
+"""Process-wide registry of detection models, loaded on first use.
+
+Importing ultralytics pulls in torch, which costs seconds and hundreds of MB;
+only processes that actually run inference should pay for it. Models are
+loaded through fire_inference with the backend named by
+``FIRE_DETECTION_BACKEND``, cached per weights file and shared by every thread
+in the process.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+_models = {}
+_load_times = {}
+_lock = threading.Lock()
+_default_weights = None
+
+
+def default_weights():
+    """FIRE_DETECTION_MODEL, or the quantized model once it has passed the accuracy floor"""
+    global _default_weights
+    if _default_weights is None:
+        from fire_inference.evaluate import choose_weights
+        _default_weights = choose_weights(
+            getattr(settings, 'FIRE_DETECTION_MODEL', 'fire_s.pt'),
+            getattr(settings, 'FIRE_DETECTION_QUANTIZED_MODEL', None),
+            getattr(settings, 'FIRE_DETECTION_ACCURACY_FLOOR', {})
+        )
+    return _default_weights
+
+
+def get_model(weights=None):
+    """Return the model for a weights file, loading it the first time it is asked for"""
+    weights = weights or default_weights()
+    model = _models.get(weights)
+    if model is not None:
+        return model
+
+    with _lock:
+        # Another thread may have loaded it while we waited for the lock
+        model = _models.get(weights)
+        if model is None:
+            start = time.perf_counter()
+            from fire_inference import load_backend
+            model = load_backend(weights, getattr(settings, 'FIRE_DETECTION_BACKEND', 'auto'))
+            _load_times[weights] = time.perf_counter() - start
+            _models[weights] = model
+            print(f"Loaded detection model {weights} in {_load_times[weights]:.2f}s")
+    return model
+
+
+def preload_model(weights=None):
+    """Load a model eagerly so the first request doesn't wait for it"""
+    get_model(weights)
+
+
+def loaded_models():
+    """Weights files loaded in this process with their load time in seconds"""
+    return dict(_load_times)
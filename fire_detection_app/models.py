@@ -1,8 +1,12 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
+from bisect import bisect_left
 from datetime import timedelta
 
+from .geo import encode_geohash
+
 RANKS = [
     ('rookie', 'Rookie Guardian'),
     ('trusted', 'Trusted Guardian'),
@@ -11,6 +15,11 @@ RANKS = [
     ('legend', 'Legendary Guardian'),
 ]
 
+# Upper bounds (seconds) of the response time histogram; the last bucket is open
+RESPONSE_TIME_BUCKETS = [10, 30, 60, 120, 300, 600]
+# How many responses the prior response time counts for in expected_response_time
+RESPONSE_PRIOR_WEIGHT = 3
+
 class Camera(models.Model):
     name = models.CharField(max_length=100)
     location_name = models.CharField(max_length=200)
@@ -46,6 +55,20 @@ class FireAlert(models.Model):
         ('medium', 'Medium Fire'),
         ('large', 'Large Fire')
     ], null=True, blank=True)
+    detection_status = models.CharField(max_length=20, choices=[
+        ('queued', 'Queued for Detection'),
+        ('processing', 'Detection Running'),
+        ('completed', 'Detection Completed'),
+        ('failed', 'Detection Failed')
+    ], default='queued')
+    # Edge tracker's evidence for the fire (hits, duration, growth), when the camera sends it
+    track_summary = models.JSONField(null=True, blank=True)
+    # Model boxes and the frame size they refer to; annotated images are rendered from these
+    detections = models.JSONField(null=True, blank=True)
+    # 64-bit difference hash of the image (hex), to tell one camera's scenes apart
+    image_hash = models.CharField(max_length=16, blank=True)
+    incident = models.ForeignKey('Incident', on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='alerts')
 
     def is_verification_expired(self):
         if not self.verification_deadline:
@@ -55,6 +78,110 @@ class FireAlert(models.Model):
     def __str__(self):
         return f"Fire Alert {self.id} - {self.status}"
 
+    class Meta:
+        # Match the feed's (created_at, id) keyset order under each filter
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='firealert_feed'),
+            models.Index(fields=['status', 'created_at', 'id'], name='firealert_status_feed'),
+            models.Index(fields=['camera', 'created_at', 'id'], name='firealert_camera_feed'),
+            models.Index(fields=['latitude', 'longitude'], name='firealert_position'),
+        ]
+
+class Incident(models.Model):
+    """One fire event, reported by every alert that clusters with it in space and time.
+
+    Only the primary alert goes through verification; duplicates from other
+    cameras (or later frames from the same one) attach to the incident and take
+    its outcome.
+    """
+    status = models.CharField(max_length=20, choices=[
+        ('open', 'Awaiting Verification'),
+        ('confirmed', 'Fire Confirmed'),
+        ('false_alarm', 'False Alarm')
+    ], default='open')
+    primary_alert = models.ForeignKey(FireAlert, on_delete=models.SET_NULL, null=True,
+                                      related_name='+')
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    geohash = models.CharField(max_length=12, blank=True)
+    alert_count = models.IntegerField(default=1)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+
+    def save(self, *args, **kwargs):
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Incident {self.id} - {self.status} ({self.alert_count} alerts)"
+
+    class Meta:
+        # Cluster lookup: open incidents in a few geohash cells, seen recently
+        indexes = [
+            models.Index(fields=['status', 'geohash', 'last_seen'], name='incident_lookup'),
+        ]
+
+class IncidentLock(models.Model):
+    """A geohash cell locked while an alert in or next to it looks for its incident"""
+    geohash = models.CharField(max_length=12, primary_key=True)
+
+    def __str__(self):
+        return f"Incident lock {self.geohash}"
+
+class DetectionJob(models.Model):
+    """Persistent queue entry for running fire detection on an uploaded alert"""
+    alert = models.OneToOneField(FireAlert, on_delete=models.CASCADE, related_name='detection_job')
+    status = models.CharField(max_length=20, choices=[
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed')
+    ], default='queued')
+    attempts = models.IntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Detection Job {self.id} for Alert {self.alert_id} - {self.status}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='detectionjob_status_created'),
+        ]
+
+class ScheduledWave(models.Model):
+    """A verification wave waiting for its due time, kept in the DB so restarts resume it"""
+    alert = models.ForeignKey(FireAlert, on_delete=models.CASCADE, related_name='scheduled_waves')
+    wave = models.IntegerField()
+    due_at = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=[
+        ('pending', 'Pending'),
+        ('dispatched', 'Dispatched'),
+        ('cancelled', 'Cancelled')
+    ], default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Wave {self.wave} for Alert {self.alert_id} due {self.due_at}"
+
+    class Meta:
+        unique_together = ('alert', 'wave')
+        indexes = [
+            models.Index(fields=['status', 'due_at'], name='scheduledwave_status_due'),
+        ]
+
+class BrokerMessage(models.Model):
+    """A published event, relayed to subscribers in other processes by DatabaseBroker"""
+    channel = models.CharField(max_length=100)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Message {self.id} on {self.channel}"
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     guardian_points = models.IntegerField(default=0)
@@ -66,6 +193,28 @@ class UserProfile(models.Model):
     last_verification = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
     fcm_token = models.CharField(max_length=255, null=True, blank=True)  # For Firebase notifications
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
+    # Lets each process's leaderboard pick up only the profiles changed since it last looked
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Consecutive days on which the guardian voted, ending on last_active_day
+    current_streak = models.IntegerField(default=0)
+    last_active_day = models.DateField(null=True, blank=True)
+    # Running response time statistics (Welford); response_time_avg is the mean
+    response_count = models.IntegerField(default=0)
+    response_time_m2 = models.FloatField(default=0)
+    response_histogram = models.JSONField(default=list)
+    # Exponentially weighted share of votes that matched the alert's outcome
+    accuracy = models.FloatField(default=0.5)
+
+    def save(self, *args, **kwargs):
+        # Keep the indexed geohash in step with the guardian's position
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        super().save(*args, **kwargs)
 
     def update_rank(self):
         points = self.guardian_points
@@ -80,6 +229,43 @@ class UserProfile(models.Model):
         else:
             self.rank = 'rookie'
 
+    def record_activity(self, day):
+        """Extend or restart the streak for a vote cast on ``day``"""
+        if self.last_active_day is None or day > self.last_active_day + timedelta(days=1):
+            self.current_streak = 1
+        elif day == self.last_active_day + timedelta(days=1):
+            self.current_streak += 1
+        else:
+            return  # Already counted that day
+        self.last_active_day = day
+
+    def streak_on(self, day):
+        """Streak as of ``day``: zero unless the guardian voted that day"""
+        return self.current_streak if self.last_active_day == day else 0
+
+    def record_response(self, seconds):
+        """Fold one response time into the running mean, variance and histogram"""
+        self.response_count += 1
+        delta = seconds - self.response_time_avg
+        self.response_time_avg += delta / self.response_count
+        self.response_time_m2 += delta * (seconds - self.response_time_avg)
+
+        histogram = self.response_histogram or [0] * (len(RESPONSE_TIME_BUCKETS) + 1)
+        histogram[bisect_left(RESPONSE_TIME_BUCKETS, seconds)] += 1
+        self.response_histogram = histogram
+
+    @property
+    def response_time_variance(self):
+        if self.response_count < 2:
+            return 0.0
+        return self.response_time_m2 / (self.response_count - 1)
+
+    def expected_response_time(self):
+        """Mean response time, pulled towards the prior while there are few responses"""
+        prior = getattr(settings, 'GUARDIAN_RESPONSE_PRIOR_SECONDS', 60)
+        return ((self.response_count * self.response_time_avg + RESPONSE_PRIOR_WEIGHT * prior)
+                / (self.response_count + RESPONSE_PRIOR_WEIGHT))
+
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
@@ -89,6 +275,7 @@ class Verification(models.Model):
     vote = models.BooleanField(null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     response_time = models.IntegerField(null=True)  # in seconds
+    voted_at = models.DateTimeField(null=True, blank=True)
     points_awarded = models.IntegerField(default=0)
     notification_sent = models.DateTimeField(null=True)
     expired = models.BooleanField(default=False)
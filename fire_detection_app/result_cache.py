@@ -0,0 +1,124 @@
+"""Detection results reused for near-identical frames from the same camera.
+
+A static camera re-uploads almost the same frame after every cooldown. Each
+result is stored under the frame's 64-bit dHash and its camera; a later frame
+whose hash is at most ``max_distance`` bits away gets the stored result instead
+of a model run.
+
+Lookups use multi-index hashing: the hash is cut into ``max_distance + 1``
+chunks, and each chunk value indexes a bucket. Two hashes within
+``max_distance`` bits must agree exactly on at least one chunk (pigeonhole), so
+only entries sharing a bucket with the query are compared. Entries expire after
+``ttl_seconds`` and the least recently used one is dropped once ``max_entries``
+is reached.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from .image_hash import hamming
+
+HASH_BITS = 64
+
+
+class _Entry:
+    __slots__ = ('result', 'stored_at', 'seconds')
+
+    def __init__(self, result, stored_at, seconds):
+        self.result = result
+        self.stored_at = stored_at
+        self.seconds = seconds
+
+
+class DetectionCache:
+    """LRU/TTL cache of detection results keyed by (camera, perceptual hash)"""
+
+    def __init__(self, max_entries=1024, ttl_seconds=300, max_distance=3, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+        chunks = max_distance + 1
+        self._layout = []
+        shift = 0
+        for i in range(chunks):
+            width = HASH_BITS // chunks + (1 if i < HASH_BITS % chunks else 0)
+            self._layout.append((shift, (1 << width) - 1))
+            shift += width
+
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+    def _bucket_keys(self, camera, value):
+        return [(camera, i, (value >> shift) & mask) for i, (shift, mask) in enumerate(self._layout)]
+
+    def _remove(self, key):
+        del self._entries[key]
+        for bucket_key in self._bucket_keys(*key):
+            bucket = self._buckets[bucket_key]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[bucket_key]
+
+    def lookup(self, camera, value):
+        """The result stored for the closest hash within ``max_distance``, or None"""
+        now = self.clock()
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for bucket_key in self._bucket_keys(camera, value):
+                candidates |= self._buckets.get(bucket_key, set())
+
+            best, best_distance = None, None
+            for key in candidates:
+                if now - self._entries[key].stored_at > self.ttl_seconds:
+                    self._remove(key)
+                    continue
+                distance = hamming(key[1], value)
+                if distance <= self.max_distance and (best is None or distance < best_distance):
+                    best, best_distance = key, distance
+
+            if best is None:
+                return None
+            self._entries.move_to_end(best)
+            entry = self._entries[best]
+            self.hits += 1
+            self.saved_seconds += entry.seconds
+            return entry.result
+
+    def store(self, camera, value, result, seconds=0.0):
+        """Remember a result and how long the model took to produce it"""
+        key = (camera, value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(result, self.clock(), seconds)
+            for bucket_key in self._bucket_keys(camera, value):
+                self._buckets.setdefault(bucket_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.lookups if self.lookups else 0.0,
+            'evictions': self.evictions,
+            'saved_inference_seconds': round(self.saved_seconds, 3),
+        }
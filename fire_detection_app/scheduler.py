@@ -0,0 +1,86 @@
+"""Due-time scheduler that advances alerts through their verification waves.
+
+ScheduledWave rows form a priority queue ordered by ``due_at`` (indexed
+together with ``status``), so the scheduler only ever reads the head of the
+queue. Nothing is held in memory between ticks: a restarted scheduler simply
+picks up every pending wave, including ones that became due while it was down.
+An entry is claimed and its wave dispatched in one transaction, so a crash or
+an error in between leaves it pending for the next try.
+"""
+import threading
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import ScheduledWave
+from .verification import run_wave
+
+
+class VerificationScheduler:
+    """Runs ScheduledWave entries once they are due"""
+
+    def __init__(self, poll_interval=5.0, batch_size=50):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.stop_event = threading.Event()
+
+    def run_due_waves(self):
+        """Dispatch every wave whose due time has passed, oldest first"""
+        due = (ScheduledWave.objects
+               .filter(status='pending', due_at__lte=timezone.now())
+               .select_related('alert')
+               .order_by('due_at', 'id')[:self.batch_size])
+
+        dispatched = 0
+        for entry in due:
+            try:
+                with transaction.atomic():
+                    # Claim the entry so a second scheduler can't run the same wave
+                    claimed = ScheduledWave.objects.filter(
+                        pk=entry.pk, status='pending'
+                    ).update(status='dispatched')
+                    if not claimed:
+                        continue
+
+                    if run_wave(entry.alert, entry.wave):
+                        dispatched += 1
+                    else:
+                        ScheduledWave.objects.filter(pk=entry.pk).update(status='cancelled')
+            except Exception as e:
+                # The claim was rolled back; try again after the poll interval
+                print(f"Error dispatching wave {entry.wave} for alert {entry.alert_id}: {e}")
+                ScheduledWave.objects.filter(pk=entry.pk, status='pending').update(
+                    due_at=timezone.now() + timedelta(seconds=self.poll_interval)
+                )
+        return dispatched
+
+    def seconds_until_next_wave(self):
+        """Time until the head of the queue is due, capped at the poll interval"""
+        next_wave = (ScheduledWave.objects
+                     .filter(status='pending')
+                     .order_by('due_at')
+                     .values_list('due_at', flat=True)
+                     .first())
+        if next_wave is None:
+            return self.poll_interval
+        remaining = (next_wave - timezone.now()).total_seconds()
+        return max(0, min(remaining, self.poll_interval))
+
+    def run_forever(self):
+        """Tick until stop() is called"""
+        while not self.stop_event.is_set():
+            close_old_connections()
+            try:
+                dispatched = self.run_due_waves()
+                if dispatched:
+                    print(f"Dispatched {dispatched} verification waves")
+                # Work may remain if the batch was full, so only sleep when idle
+                if dispatched < self.batch_size:
+                    self.stop_event.wait(self.seconds_until_next_wave())
+            except Exception as e:
+                print(f"Error in verification scheduler: {e}")
+                self.stop_event.wait(self.poll_interval)
+
+    def stop(self):
+        self.stop_event.set()
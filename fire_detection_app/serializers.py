@@ -1,5 +1,13 @@
+import json
+
+from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import FireAlert, UserProfile, Verification, Camera
+from rest_framework.reverse import reverse
+from .leaderboard import get_leaderboard
+from .models import RESPONSE_TIME_BUCKETS, FireAlert, UserProfile, Verification, Camera
+
+RESPONSE_TIME_BUCKET_LABELS = ([f"<={bound}s" for bound in RESPONSE_TIME_BUCKETS]
+                               + [f">{RESPONSE_TIME_BUCKETS[-1]}s"])
 
 class CameraSerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,11 +16,33 @@ class CameraSerializer(serializers.ModelSerializer):
                  'is_active', 'last_check', 'created_at']
         read_only_fields = ['last_check', 'created_at']
 
+class JSONStringField(serializers.JSONField):
+    """JSON field that also accepts the JSON-encoded strings multipart forms carry"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            if not data:
+                return None
+            try:
+                data = json.loads(data)
+            except ValueError:
+                self.fail('invalid')
+        return super().to_internal_value(data)
+
+def annotated_image_url(alert, request):
+    """Rendered annotation endpoint, or the stored file for alerts detected before boxes were kept"""
+    if alert.detections:
+        return reverse('firealert-annotated', args=[alert.pk], request=request)
+    if alert.annotated_image:
+        return request.build_absolute_uri(alert.annotated_image.url)
+    return None
+
 class FireAlertSerializer(serializers.ModelSerializer):
     reporter_name = serializers.CharField(source='reporter.username', read_only=True)
     camera_name = serializers.CharField(source='camera.name', read_only=True)
-    annotated_image = serializers.ImageField(read_only=True)
+    annotated_image = serializers.SerializerMethodField()
     time_remaining = serializers.SerializerMethodField()
+    track_summary = JSONStringField(required=False, allow_null=True)
 
     class Meta:
         model = FireAlert
@@ -20,11 +50,16 @@ class FireAlertSerializer(serializers.ModelSerializer):
                  'latitude', 'longitude', 'reporter_name', 'status', 
                  'detection_confidence', 'votes_yes', 'votes_no', 
                  'created_at', 'verification_deadline', 'time_remaining',
-                 'weather_data', 'fire_size']
+                 'weather_data', 'fire_size', 'detection_status', 'track_summary',
+                 'detections', 'incident']
         read_only_fields = ['camera_name', 'reporter_name', 'status', 
                            'detection_confidence', 'votes_yes', 'votes_no', 
                            'created_at', 'verification_deadline', 'time_remaining',
-                           'weather_data', 'fire_size']
+                           'weather_data', 'fire_size', 'detection_status', 'detections',
+                           'incident']
+
+    def get_annotated_image(self, obj):
+        return annotated_image_url(obj, self.context['request'])
 
     def get_time_remaining(self, obj):
         if obj.verification_deadline:
@@ -34,45 +69,58 @@ class FireAlertSerializer(serializers.ModelSerializer):
         return None
 
 class UserProfileSerializer(serializers.ModelSerializer):
+    # Guardians are identified by their user id everywhere (votes, streams, URLs)
+    id = serializers.IntegerField(source='user_id', read_only=True)
     username = serializers.CharField(source='user.username', read_only=True)
     rank_display = serializers.CharField(source='get_rank_display', read_only=True)
     verification_stats = serializers.SerializerMethodField()
+    leaderboard_position = serializers.SerializerMethodField()
 
     class Meta:
         model = UserProfile
-        fields = ['username', 'guardian_points', 'rank', 'rank_display',
+        fields = ['id', 'username', 'guardian_points', 'rank', 'rank_display',
                  'badges', 'correct_verifications', 'response_time_avg',
-                 'is_available', 'verification_stats', 'created_at']
+                 'is_available', 'verification_stats', 'leaderboard_position',
+                 'created_at', 'latitude', 'longitude']
         read_only_fields = ['guardian_points', 'rank', 'badges', 
                            'correct_verifications', 'response_time_avg']
 
+    def get_leaderboard_position(self, obj):
+        return get_leaderboard().rank(obj.user_id)
+
     def get_verification_stats(self, obj):
         return {
-            'total_verifications': obj.correct_verifications,
-            'avg_response_time': f"{obj.response_time_avg:.1f}s" if obj.response_time_avg else "N/A",
+            'total_verifications': obj.response_count,
+            'correct_verifications': obj.correct_verifications,
+            'accuracy': round(obj.accuracy, 3),
+            'avg_response_time': f"{obj.response_time_avg:.1f}s" if obj.response_count else "N/A",
+            'response_time_stddev': round(obj.response_time_variance ** 0.5, 1),
+            'response_time_histogram': dict(zip(RESPONSE_TIME_BUCKET_LABELS, obj.response_histogram)),
             'current_streak': self.get_verification_streak(obj)
         }
 
     def get_verification_streak(self, obj):
         from django.utils import timezone
-        from datetime import timedelta
-        
-        # Count consecutive days with verifications
-        streak = 0
-        current_date = timezone.now().date()
-        
-        while True:
-            if Verification.objects.filter(
-                verifier=obj.user,
-                created_at__date=current_date,
-                vote__isnull=False
-            ).exists():
-                streak += 1
-                current_date -= timedelta(days=1)
-            else:
-                break
-        
-        return streak
+
+        # Kept on the profile as votes come in; see UserProfile.record_activity
+        return obj.streak_on(timezone.localdate())
+
+class UserProfileCreateSerializer(UserProfileSerializer):
+    """Registration; every guardian starts as a rookie with no points"""
+    username = serializers.CharField(source='user.username', max_length=150)
+
+    def validate_username(self, value):
+        if User.objects.filter(username=value).exists():
+            raise serializers.ValidationError('A user with that username already exists.')
+        return value
+
+    def create(self, validated_data):
+        user = User.objects.create(username=validated_data.pop('user')['username'])
+        profile = user.userprofile  # Created by the post_save signal
+        for field, value in validated_data.items():
+            setattr(profile, field, value)
+        profile.save()
+        return profile
 
 class VerificationSerializer(serializers.ModelSerializer):
     verifier_name = serializers.CharField(source='verifier.username', read_only=True)
@@ -93,8 +141,7 @@ class VerificationSerializer(serializers.ModelSerializer):
             'confidence': obj.alert.detection_confidence,
             'status': obj.alert.status,
             'image_url': self.context['request'].build_absolute_uri(obj.alert.image.url),
-            'annotated_url': (self.context['request'].build_absolute_uri(obj.alert.annotated_image.url) 
-                            if obj.alert.annotated_image else None)
+            'annotated_url': annotated_image_url(obj.alert, self.context['request'])
         }
 
     def get_time_remaining(self, obj):
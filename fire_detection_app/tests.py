@@ -1,3 +1,1039 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from unittest.mock import patch
+from PIL import Image
+from rest_framework.test import APIRequestFactory
+
+from . import annotations, detection
+from . import leaderboard as leaderboard_module
+from .batching import BatchInferenceEngine
+from .events import DatabaseBroker, InProcessBroker, verification_channel
+from .geo import haversine_km, nearest
+from .inference_queue import claim_next_job, enqueue_detections, fail_job, requeue_stale_jobs
+from .inference_workers import InferenceWorkerPool
+from .models import Camera, DetectionJob, FireAlert, Incident, ScheduledWave, UserProfile, Verification
+from .result_cache import DetectionCache
+from .scheduler import VerificationScheduler
+from .serializers import UserProfileSerializer
+from .verification import request_verification_wave
+from . import views
+
+
+def create_alert(**kwargs):
+    fields = {'image': 'alerts/test.jpg', 'latitude': 36.75, 'longitude': 3.06}
+    fields.update(kwargs)
+    return FireAlert.objects.create(**fields)
+
+
+def create_verifiers(alert, count, prefix='verifier'):
+    users = []
+    for i in range(count):
+        user = User.objects.create(username=f"{prefix}_{alert.id}_{i}")
+        Verification.objects.create(alert=alert, verifier=user,
+                                    notification_sent=timezone.now())
+        users.append(user)
+    return users
+
+
+def post_vote(alert, user, vote):
+    request = APIRequestFactory().post('/api/verify-fire/', {
+        'alert_id': alert.id, 'user_id': user.id, 'vote': vote
+    }, format='json')
+    return views.verify_fire(request)
+
+
+class VerifyFireTests(TestCase):
+    def test_votes_update_counters_and_resolve(self):
+        alert = create_alert()
+        users = create_verifiers(alert, 3)
+
+        responses = [post_vote(alert, user, vote)
+                     for user, vote in zip(users, [True, False, True])]
+
+        alert.refresh_from_db()
+        self.assertEqual((alert.votes_yes, alert.votes_no), (2, 1))
+        self.assertEqual(alert.status, 'confirmed')
+        self.assertEqual([r.data['alert_resolved'] for r in responses], [False, False, True])
+
+    def test_double_vote_is_rejected(self):
+        alert = create_alert()
+        user = create_verifiers(alert, 1)[0]
+
+        self.assertEqual(post_vote(alert, user, True).status_code, 200)
+        self.assertEqual(post_vote(alert, user, True).status_code, 400)
+
+        alert.refresh_from_db()
+        self.assertEqual(alert.votes_yes, 1)
+
+    def test_vote_does_not_count_verifications(self):
+        alert = create_alert(votes_yes=1, votes_no=1)
+        user = create_verifiers(alert, 1)[0]
+
+        # The tally comes from the alert's counters, not from counting Verification rows
+        response = post_vote(alert, user, False)
+
+        alert.refresh_from_db()
+        self.assertTrue(response.data['alert_resolved'])
+        self.assertEqual(alert.status, 'false_alarm')
+
+
+class ConcurrentVoteTests(TransactionTestCase):
+    def test_exactly_one_vote_resolves_the_alert(self):
+        alert = create_alert()
+        users = create_verifiers(alert, 8)
+        barrier = threading.Barrier(len(users))
+        responses = []
+
+        def vote(user):
+            try:
+                barrier.wait()
+                responses.append(post_vote(alert, user, True))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=vote, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        alert.refresh_from_db()
+        self.assertEqual([r.status_code for r in responses], [200] * len(users))
+        self.assertEqual(alert.votes_yes, len(users))
+        self.assertEqual(alert.status, 'confirmed')
+        self.assertEqual(sum(r.data['alert_resolved'] for r in responses), 1)
+
+
+class VerificationSchedulerTests(TestCase):
+    def setUp(self):
+        self.alert = create_alert()
+        for i in range(2):
+            user = User.objects.create(username=f"rookie_{i}")
+            UserProfile.objects.filter(user=user).update(last_verification=timezone.now() - timedelta(hours=1))
+        # Left behind by a scheduler that stopped before it was due
+        self.entry = ScheduledWave.objects.create(alert=self.alert, wave=2,
+                                                  due_at=timezone.now() - timedelta(minutes=5))
+
+    def test_restarted_scheduler_dispatches_overdue_waves(self):
+        self.assertEqual(VerificationScheduler().run_due_waves(), 1)
+
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, 'dispatched')
+        self.assertEqual(Verification.objects.filter(alert=self.alert).count(), 2)
+        self.assertTrue(ScheduledWave.objects.filter(alert=self.alert, wave=3, status='pending').exists())
+
+    def test_failed_dispatch_is_rolled_back_and_retried(self):
+        scheduler = VerificationScheduler(poll_interval=5)
+        with patch.object(ScheduledWave.objects, 'get_or_create', side_effect=RuntimeError('db went away')):
+            self.assertEqual(scheduler.run_due_waves(), 0)
+
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, 'pending')
+        self.assertGreater(self.entry.due_at, timezone.now())
+        # The wave's verification requests were rolled back with the claim
+        self.assertFalse(Verification.objects.filter(alert=self.alert).exists())
+
+        ScheduledWave.objects.filter(pk=self.entry.pk).update(due_at=timezone.now())
+        self.assertEqual(scheduler.run_due_waves(), 1)
+        self.assertEqual(Verification.objects.filter(alert=self.alert).count(), 2)
+
+@override_settings(DETECTION_MAX_ATTEMPTS=2, DETECTION_JOB_LEASE_SECONDS=300)
+class DetectionQueueTests(TestCase):
+    def test_claims_oldest_job_once(self):
+        first, second = create_alert(), create_alert()
+        enqueue_detections([first, second])
+
+        job = claim_next_job('worker-a')
+        self.assertEqual((job.alert_id, job.attempts, job.worker), (first.id, 1, 'worker-a'))
+        self.assertEqual(FireAlert.objects.get(pk=first.id).detection_status, 'processing')
+        self.assertEqual(claim_next_job('worker-b').alert_id, second.id)
+        self.assertIsNone(claim_next_job('worker-c'))
+
+    def test_failed_job_is_retried_until_out_of_attempts(self):
+        alert = create_alert()
+        enqueue_detections([alert])
+
+        fail_job(claim_next_job('w'), 'boom')
+        self.assertEqual(DetectionJob.objects.get(alert=alert).status, 'queued')
+        fail_job(claim_next_job('w'), 'boom')
+        self.assertEqual(DetectionJob.objects.get(alert=alert).status, 'failed')
+        self.assertEqual(FireAlert.objects.get(pk=alert.id).detection_status, 'failed')
+
+    def test_expired_lease_requeues_or_fails_by_attempts(self):
+        retry, exhausted, fresh = create_alert(), create_alert(), create_alert()
+        enqueue_detections([retry, exhausted, fresh])
+        for _ in range(3):
+            claim_next_job('dead-worker')
+        DetectionJob.objects.filter(alert=exhausted).update(attempts=2)
+        DetectionJob.objects.exclude(alert=fresh).update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(), (1, 1))
+        statuses = dict(DetectionJob.objects.values_list('alert_id', 'status'))
+        self.assertEqual(statuses, {retry.id: 'queued', exhausted.id: 'failed', fresh.id: 'running'})
+
+
+@override_settings(DETECTION_MAX_ATTEMPTS=2, DETECTION_JOB_LEASE_SECONDS=300)
+class InferenceWorkerPoolTests(TransactionTestCase):
+    def run_pool_until(self, condition, detect, after_start=lambda: None):
+        pool = InferenceWorkerPool(num_workers=2, poll_interval=0.02, requeue_interval=0.05)
+        with patch('fire_detection_app.detection.detect_fire', side_effect=detect):
+            pool.start()
+            try:
+                after_start()
+                deadline = time.monotonic() + 5
+                while not condition() and time.monotonic() < deadline:
+                    time.sleep(0.02)
+            finally:
+                pool.stop()
+
+    def test_workers_complete_jobs_and_give_up_on_failing_ones(self):
+        good, bad = create_alert(), create_alert()
+        enqueue_detections([good, bad])
+
+        def detect(alert):
+            if alert.id == bad.id:
+                raise ValueError('corrupt frame')
+
+        self.run_pool_until(lambda: not DetectionJob.objects.filter(status__in=['queued', 'running']).exists(),
+                            detect)
+
+        jobs = {job.alert_id: job for job in DetectionJob.objects.all()}
+        self.assertEqual(jobs[good.id].status, 'done')
+        self.assertEqual((jobs[bad.id].status, jobs[bad.id].attempts), ('failed', 2))
+
+    def test_running_pool_recovers_jobs_of_dead_workers(self):
+        def worker_elsewhere_dies():
+            DetectionJob.objects.create(alert=create_alert(), status='running', attempts=1,
+                                        locked_at=timezone.now() - timedelta(hours=1))
+
+        # The job goes stale after the pool started, so only the periodic check can find it
+        self.run_pool_until(lambda: DetectionJob.objects.filter(status='done').exists(), lambda alert: None,
+                            after_start=worker_elsewhere_dies)
+
+        job = DetectionJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('done', 2))
+
+class NearestGuardianTests(TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        for i in range(200):
+            user = User.objects.create(username=f"guardian_{i}")
+            profile = user.userprofile
+            profile.latitude = 36.75 + rng.uniform(-2, 2)
+            profile.longitude = 3.06 + rng.uniform(-2, 2)
+            profile.last_verification = timezone.now() - timedelta(hours=1)
+            profile.save()
+
+    def test_nearest_matches_full_scan(self):
+        profiles = UserProfile.objects.all()
+        for lat, lon in [(36.75, 3.06), (35.0, 1.2), (38.7, 5.0)]:
+            scanned = sorted(profiles, key=lambda p: haversine_km(lat, lon, p.latitude, p.longitude))
+            self.assertEqual([p.id for p in nearest(profiles, lat, lon, 5)],
+                             [p.id for p in scanned[:5]])
+
+    def test_wave_notifies_closest_guardians(self):
+        alert = create_alert(latitude=36.0, longitude=2.5)
+        expected = nearest(UserProfile.objects.all(), alert.latitude, alert.longitude, 5)
+
+        request_verification_wave(alert)
+
+        notified = set(Verification.objects.filter(alert=alert).values_list('verifier_id', flat=True))
+        self.assertEqual(notified, {p.user_id for p in expected})
+
+    def test_regular_waves_include_trusted_guardians(self):
+        alert = create_alert(latitude=36.0, longitude=2.5)
+        UserProfile.objects.update(rank='trusted')
+
+        request_verification_wave(alert)
+
+        self.assertEqual(Verification.objects.filter(alert=alert).count(), 5)
+
+    def test_guardians_locked_by_another_wave_are_replaced(self):
+        from . import verification
+
+        alert = create_alert(latitude=36.0, longitude=2.5)
+        closest = nearest(UserProfile.objects.all(), alert.latitude, alert.longitude, 5)
+        claim = verification.claim_guardians
+        locked_elsewhere = []
+
+        def claim_all_but_first(available, candidates):
+            # The first candidate of the first round is held by a concurrent wave
+            if not locked_elsewhere:
+                locked_elsewhere.append(candidates[0])
+                candidates = candidates[1:]
+            return claim(available, candidates)
+
+        with patch.object(verification, 'claim_guardians', side_effect=claim_all_but_first):
+            request_verification_wave(alert)
+
+        notified = set(Verification.objects.filter(alert=alert).values_list('verifier_id', flat=True))
+        self.assertEqual(len(notified), 5)
+        self.assertNotIn(locked_elsewhere[0].user_id, notified)
+        self.assertTrue(notified & {p.user_id for p in closest})
+
+
+class VerificationWaveQueryTests(TestCase):
+    def create_experts(self, count):
+        for i in range(count):
+            user = User.objects.create(username=f"expert_{count}_{i}")
+            UserProfile.objects.filter(user=user).update(
+                rank='expert',
+                last_verification=timezone.now() - timedelta(hours=1)
+            )
+
+    def dispatch_ranked_wave(self, experts):
+        self.create_experts(experts)
+        alert = create_alert()
+        with CaptureQueriesContext(connection) as queries:
+            request_verification_wave(alert, is_ranked=True)
+        self.assertEqual(Verification.objects.filter(alert=alert).count(), experts)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_wave_size(self):
+        small = self.dispatch_ranked_wave(3)
+        # The first wave's experts are now busy, so only the new ones are picked
+        large = self.dispatch_ranked_wave(40)
+        self.assertEqual(small, large)
+
+    def test_wave_claims_volunteers(self):
+        self.create_experts(4)
+        alert = create_alert()
+
+        request_verification_wave(alert, is_ranked=True)
+
+        self.assertFalse(UserProfile.objects.filter(rank='expert', is_available=True).exists())
+        # A second alert finds nobody left to claim
+        self.assertFalse(request_verification_wave(create_alert(), is_ranked=True))
+
+
+class ListQueryBudgetTests(TestCase):
+    def create_alerts(self, count):
+        camera = Camera.objects.create(name='cam', location_name='Forest',
+                                       latitude=36.75, longitude=3.06)
+        for i in range(count):
+            reporter = User.objects.create(username=f"reporter_{camera.id}_{i}")
+            alert = create_alert(camera=camera, reporter=reporter)
+            create_verifiers(alert, 2, prefix=f"list_{camera.id}")
+
+    def list_queries(self, viewset, count):
+        self.create_alerts(count)
+        request = APIRequestFactory().get('/api/')
+        with CaptureQueriesContext(connection) as queries:
+            response = viewset.as_view({'get': 'list'})(request)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_fire_alert_list_query_budget(self):
+        self.assertEqual(self.list_queries(views.FireAlertViewSet, 2), 1)
+        self.assertEqual(self.list_queries(views.FireAlertViewSet, 20), 1)
+
+    def test_verification_list_query_budget(self):
+        self.assertEqual(self.list_queries(views.VerificationViewSet, 2), 1)
+        self.assertEqual(self.list_queries(views.VerificationViewSet, 20), 1)
+
+
+class AlertFeedTests(TestCase):
+    def list_alerts(self, url):
+        response = views.FireAlertViewSet.as_view({'get': 'list'})(APIRequestFactory().get(url))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_cursor_walks_every_alert_once(self):
+        created = [create_alert().id for _ in range(7)]
+
+        seen = []
+        url = '/api/fire-alerts/?page_size=3'
+        while url:
+            page = self.list_alerts(url)
+            seen += [alert['id'] for alert in page['results']]
+            url = page['next']
+
+        self.assertEqual(seen, sorted(created, reverse=True))
+
+    def test_filters(self):
+        inside = create_alert(latitude=36.7, longitude=3.0)
+        create_alert(latitude=36.7, longitude=3.0, status='confirmed')
+        create_alert(latitude=48.8, longitude=2.3)
+
+        page = self.list_alerts('/api/fire-alerts/?status=pending&bbox=2.5,36.0,3.5,37.0')
+
+        self.assertEqual([alert['id'] for alert in page['results']], [inside.id])
+
+    def test_malformed_filters_are_rejected(self):
+        view = views.FireAlertViewSet.as_view({'get': 'list'})
+        tampered = 'eWVzdGVyZGF5fDc='  # 'yesterday|7'
+        for query, field in [('camera=abc', 'camera'), ('incident=1.5', 'incident'), ('since=yesterday', 'since'),
+                             ('cursor=not-a-cursor', 'cursor'), (f'cursor={tampered}', 'cursor')]:
+            response = view(APIRequestFactory().get(f'/api/fire-alerts/?{query}'))
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(field, response.data)
+
+
+class VerificationPushTests(TestCase):
+    def test_wave_pushes_only_to_selected_volunteers(self):
+        selected = User.objects.create(username='selected')
+        UserProfile.objects.filter(user=selected).update(
+            rank='expert', last_verification=timezone.now() - timedelta(hours=1))
+        bystander = User.objects.create(username='bystander')
+        alert = create_alert()
+
+        broker = InProcessBroker()
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        selected_inbox = broker.subscribe(verification_channel(selected.id), loop)
+        bystander_inbox = broker.subscribe(verification_channel(bystander.id), loop)
+
+        with patch('fire_detection_app.events._broker', broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                request_verification_wave(alert, is_ranked=True)
+
+        message = loop.run_until_complete(asyncio.wait_for(selected_inbox.get(), 1))
+        self.assertEqual(message['alert_id'], alert.id)
+        self.assertTrue(bystander_inbox.queue.empty())
+
+    def test_stream_delivers_events_under_wsgi(self):
+        user = User.objects.create(username='listener')
+        alert = create_alert()
+        Verification.objects.create(alert=alert, verifier=user, notification_sent=timezone.now())
+        broker = InProcessBroker()
+
+        with patch('fire_detection_app.events._broker', broker):
+            response = self.client.get(f'/api/verifications/stream/{user.id}/')
+            chunks = iter(response.streaming_content)
+            # The pending request arrives without waiting for the stream to end
+            self.assertIn(f'"alert_id": {alert.id}', next(chunks).decode())
+
+            broker.publish(verification_channel(user.id), {'type': 'verification_request', 'alert_id': 99})
+            self.assertIn('"alert_id": 99', next(chunks).decode())
+
+    @override_settings(EVENT_STREAM_WSGI_MAX_SECONDS=0.2, EVENT_STREAM_KEEPALIVE_SECONDS=0.05)
+    def test_stream_under_wsgi_ends_after_time_limit(self):
+        user = User.objects.create(username='wsgi_listener')
+        broker = InProcessBroker()
+
+        with patch('fire_detection_app.events._broker', broker):
+            response = self.client.get(f'/api/verifications/stream/{user.id}/')
+            chunks = [chunk.decode() for chunk in response.streaming_content]
+
+        # The worker thread is given back and the client told to reconnect
+        self.assertEqual(chunks[-1], 'retry: 1000\n\n')
+        self.assertIn(': keepalive\n\n', chunks)
+        self.assertEqual(broker._subscriptions, {})
+
+    def test_stream_delivers_events_under_asgi(self):
+        user = User.objects.create(username='async_listener')
+        broker = InProcessBroker()
+
+        async def first_event():
+            response = await self.async_client.get(f'/api/verifications/stream/{user.id}/')
+            chunks = aiter(response.streaming_content)
+            broker.publish(verification_channel(user.id), {'type': 'verification_request', 'alert_id': 7})
+            chunk = await asyncio.wait_for(anext(chunks), 1)
+            await chunks.aclose()
+            return chunk
+
+        with patch('fire_detection_app.events._broker', broker):
+            self.assertIn(b'"alert_id": 7', asyncio.run(first_event()))
+
+    def test_database_broker_relays_messages_committed_out_of_order(self):
+        from .models import BrokerMessage
+
+        broker = DatabaseBroker()
+        first, late, last = [BrokerMessage.objects.create(channel='c', payload={'n': n}) for n in range(3)]
+        late_id = late.id
+        late.delete()  # Not committed yet when the poller first looks
+
+        messages, last_id = broker.fetch(0, gaps := {})
+        self.assertEqual([m.payload['n'] for m in messages], [0, 2])
+        self.assertEqual(list(gaps), [late_id])
+
+        BrokerMessage.objects.create(id=late_id, channel='c', payload={'n': 1})
+        messages, last_id = broker.fetch(last_id, gaps)
+        self.assertEqual([m.payload['n'] for m in messages], [1])
+        self.assertEqual((last_id, gaps), (last.id, {}))
+
+
+class BatchInferenceEngineTests(SimpleTestCase):
+    def test_full_batch_is_sent_without_waiting(self):
+        sizes = []
+        engine = BatchInferenceEngine(lambda images: sizes.append(len(images)) or [i * 2 for i in images],
+                                      max_batch_size=3, max_wait_ms=5000)
+        start = time.monotonic()
+        futures = [engine.submit(i) for i in range(3)]
+
+        self.assertEqual([future.result(timeout=2) for future in futures], [0, 2, 4])
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(sizes, [3])
+
+    def test_partial_batch_is_sent_after_the_wait(self):
+        sizes = []
+        engine = BatchInferenceEngine(lambda images: sizes.append(len(images)) or images,
+                                      max_batch_size=8, max_wait_ms=20)
+
+        self.assertEqual(engine.infer('frame', timeout=2), 'frame')
+        self.assertEqual(sizes, [1])
+
+    def test_model_error_reaches_every_caller_and_engine_keeps_running(self):
+        calls = []
+
+        def predict(images):
+            calls.append(images)
+            if len(calls) == 1:
+                raise ValueError('bad frame')
+            return images
+
+        engine = BatchInferenceEngine(predict, max_batch_size=2, max_wait_ms=1000)
+        futures = [engine.submit(i) for i in range(2)]
+        for future in futures:
+            with self.assertRaisesRegex(ValueError, 'bad frame'):
+                future.result(timeout=2)
+
+        self.assertEqual(engine.infer('next', timeout=2), 'next')
+
+    def test_short_result_list_fails_the_batch_instead_of_hanging(self):
+        engine = BatchInferenceEngine(lambda images: images[:1], max_batch_size=2, max_wait_ms=1000)
+        futures = [engine.submit(i) for i in range(2)]
+
+        for future in futures:
+            with self.assertRaisesRegex(RuntimeError, '1 results for 2 images'):
+                future.result(timeout=2)
+
+def frame_upload(name):
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), (200, 80, 0)).save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class BulkIngestTests(TestCase):
+    def setUp(self):
+        self.camera = Camera.objects.create(name='cam', location_name='Forest',
+                                            latitude=36.75, longitude=3.06)
+
+    def post_bundle(self, data):
+        request = APIRequestFactory().post('/api/fire-alerts/bulk/', data, format='multipart')
+        return views.FireAlertViewSet.as_view({'post': 'bulk'})(request)
+
+    def test_bundle_creates_alerts_and_jobs_together(self):
+        response = self.post_bundle({
+            'camera': self.camera.id,
+            'images': [frame_upload(f"frame_{i}.jpg") for i in range(3)],
+            'latitude': ['36.1', '36.2', '36.3'],
+        })
+
+        self.assertEqual(response.status_code, 201)
+        alerts = FireAlert.objects.filter(camera=self.camera).order_by('id')
+        self.assertEqual([a.latitude for a in alerts], [36.1, 36.2, 36.3])
+        self.assertEqual({a.longitude for a in alerts}, {3.06})
+        self.assertTrue(all(a.image.storage.exists(a.image.name) for a in alerts))
+        self.assertEqual(DetectionJob.objects.filter(alert__in=alerts, status='queued').count(), 3)
+
+    def test_bad_frame_rejects_whole_bundle(self):
+        bad = SimpleUploadedFile('bad.jpg', b'not an image', content_type='image/jpeg')
+        response = self.post_bundle({
+            'camera': self.camera.id,
+            'images': [frame_upload('good.jpg'), bad],
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(1, response.data['images'])
+        self.assertFalse(FireAlert.objects.exists())
+
+    def test_track_summaries_are_stored_per_frame(self):
+        summary = {'track_id': 4, 'hits': 3, 'confirmed_by': 'persistence'}
+        response = self.post_bundle({
+            'camera': self.camera.id,
+            'images': [frame_upload('a.jpg'), frame_upload('b.jpg')],
+            'track_summary': [json.dumps(summary), ''],
+        })
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([alert['track_summary'] for alert in response.data], [summary, None])
+
+    def test_single_upload_parses_track_summary_from_form(self):
+        request = APIRequestFactory().post('/api/fire-alerts/', {
+            'camera': self.camera.id, 'image': frame_upload('c.jpg'),
+            'latitude': 36.7, 'longitude': 3.0,
+            'track_summary': json.dumps({'hits': 5, 'area_growth': 1.8}),
+        }, format='multipart')
+        response = views.FireAlertViewSet.as_view({'post': 'create'})(request)
+
+        self.assertEqual(response.status_code, 201)
+        alert = FireAlert.objects.get(pk=response.data['id'])
+        self.assertEqual(alert.track_summary, {'hits': 5, 'area_growth': 1.8})
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), ANNOTATION_CACHE_DIR=tempfile.mkdtemp())
+class AnnotationTests(TestCase):
+    def setUp(self):
+        annotations._cache = None
+        buffer = io.BytesIO()
+        Image.new('RGB', (1280, 960), (40, 90, 40)).save(buffer, format='JPEG')
+        self.alert = FireAlert.objects.create(
+            image=SimpleUploadedFile('big.jpg', buffer.getvalue(), content_type='image/jpeg'),
+            latitude=36.75, longitude=3.06
+        )
+
+    def get_annotated(self, width=None):
+        params = {'width': width} if width else {}
+        request = APIRequestFactory().get(f'/api/fire-alerts/{self.alert.id}/annotated/', params)
+        return views.FireAlertViewSet.as_view({'get': 'annotated'})(request, pk=self.alert.id)
+
+    def test_detection_stores_boxes_instead_of_an_annotated_file(self):
+        from fire_inference import Detections
+
+        detection.result_cache.clear()
+        with patch.object(detection.engine, 'infer', return_value=Detections([[100, 200, 300, 400]], [0.8])), \
+                patch.object(detection, 'start_verification_process'):
+            detection.detect_fire(self.alert)
+
+        self.alert.refresh_from_db()
+        self.assertEqual(self.alert.detections, {
+            'width': 1280, 'height': 960,
+            'boxes': [{'box': [100.0, 200.0, 300.0, 400.0], 'confidence': 0.8}],
+        })
+        self.assertFalse(self.alert.annotated_image)
+
+    def test_thumbnail_is_rendered_once_and_then_served_from_cache(self):
+        self.alert.detections = {'width': 1280, 'height': 960,
+                                 'boxes': [{'box': [100, 200, 300, 400], 'confidence': 0.8}]}
+        self.alert.save()
+
+        with patch.object(annotations, 'render', wraps=annotations.render) as render:
+            first = self.get_annotated(width=300)
+            second = self.get_annotated(width=320)
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first['Content-Type'], 'image/jpeg')
+        thumbnail = Image.open(io.BytesIO(b''.join(second.streaming_content)))
+        self.assertEqual(thumbnail.size, (320, 240))
+        # The box is drawn in red at the scaled position
+        red, green, _ = thumbnail.getpixel((25, 75))
+        self.assertGreater(red, green + 50)
+        self.assertLess(thumbnail.getpixel((10, 75))[0], 80)
+
+    def test_alert_without_boxes_has_nothing_to_render(self):
+        self.assertEqual(self.get_annotated().status_code, 404)
+
+    def test_cache_evicts_least_recently_served(self):
+        cache = annotations.RenderCache(tempfile.mkdtemp(), max_bytes=2500)
+        for key in ('a.jpg', 'b.jpg'):
+            cache.put(key, b'x' * 1000)
+        os.utime(cache.path('a.jpg'), (0, 0))
+        os.utime(cache.path('b.jpg'), (10, 10))
+        cache.get('a.jpg')  # Served again, so b is now the oldest
+
+        cache.put('c.jpg', b'x' * 1000)
+
+        self.assertIsNotNone(cache.get('a.jpg'))
+        self.assertIsNone(cache.get('b.jpg'))
+        self.assertIsNotNone(cache.get('c.jpg'))
+
+
+def scene_upload(seed):
+    """A JPEG of a random blocky scene; the same seed gives the same scene"""
+    rng = random.Random(seed)
+    image = Image.new('RGB', (8, 6))
+    image.putdata([(rng.randrange(256),) * 3 for _ in range(48)])
+    buffer = io.BytesIO()
+    image.resize((320, 240), Image.NEAREST).save(buffer, format='JPEG')
+    return SimpleUploadedFile(f'scene_{seed}.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), INCIDENT_RADIUS_KM=3.0, INCIDENT_WINDOW_MINUTES=60)
+class IncidentTests(TestCase):
+    def setUp(self):
+        self.north = Camera.objects.create(name='north', location_name='Ridge', latitude=36.75, longitude=3.06)
+        self.east = Camera.objects.create(name='east', location_name='Valley', latitude=36.76, longitude=3.08)
+        self.far = Camera.objects.create(name='far', location_name='Coast', latitude=36.95, longitude=3.60)
+        detection.result_cache.clear()
+
+    def detect(self, camera, seed=1):
+        from fire_inference import Detections
+
+        alert = FireAlert.objects.create(camera=camera, image=scene_upload(seed),
+                                         latitude=camera.latitude, longitude=camera.longitude)
+        with patch.object(detection.engine, 'infer', return_value=Detections([[10, 10, 50, 50]], [0.9])), \
+                patch.object(detection, 'start_verification_process') as start:
+            detection.detect_fire(alert)
+        alert.refresh_from_db()
+        return alert, start.called
+
+    def test_nearby_cameras_share_one_incident_and_one_verification(self):
+        first, first_verified = self.detect(self.north)
+        second, second_verified = self.detect(self.east, seed=2)
+
+        self.assertTrue(first_verified)
+        self.assertFalse(second_verified)
+        self.assertEqual(second.incident_id, first.incident_id)
+        self.assertEqual(first.incident.alert_count, 2)
+        self.assertIsNone(second.verification_deadline)
+
+    def test_distant_or_stale_alerts_open_new_incidents(self):
+        first, _ = self.detect(self.north)
+        far, far_verified = self.detect(self.far)
+        self.assertTrue(far_verified)
+        self.assertNotEqual(far.incident_id, first.incident_id)
+
+        Incident.objects.filter(pk=first.incident_id).update(
+            last_seen=timezone.now() - timedelta(hours=2))
+        later, later_verified = self.detect(self.east)
+        self.assertTrue(later_verified)
+        self.assertNotEqual(later.incident_id, first.incident_id)
+
+    def test_same_camera_needs_the_same_scene(self):
+        first, _ = self.detect(self.north, seed=1)
+        again, again_verified = self.detect(self.north, seed=1)
+        other_view, other_verified = self.detect(self.north, seed=99)
+
+        self.assertFalse(again_verified)
+        self.assertEqual(again.incident_id, first.incident_id)
+        self.assertTrue(other_verified)
+        self.assertNotEqual(other_view.incident_id, first.incident_id)
+
+    def test_retried_job_resumes_verification_once(self):
+        from fire_inference import Detections
+
+        alert = FireAlert.objects.create(camera=self.north, image=scene_upload(1),
+                                         latitude=self.north.latitude, longitude=self.north.longitude)
+        with patch.object(detection.engine, 'infer', return_value=Detections([[10, 10, 50, 50]], [0.9])), \
+                patch.object(detection, 'start_verification_process', side_effect=RuntimeError('database is locked')):
+            with self.assertRaises(RuntimeError):
+                detection.detect_fire(alert)
+
+        # The job is retried with a freshly loaded alert
+        alert = FireAlert.objects.get(pk=alert.pk)
+        with patch.object(detection.engine, 'infer') as infer, \
+                patch.object(detection, 'start_verification_process') as start:
+            detection.detect_fire(alert)
+        start.assert_called_once()
+        infer.assert_not_called()
+        self.assertEqual(alert.incident.alert_count, 1)
+        self.assertIsNotNone(alert.verification_deadline)
+
+        # Once the first wave has gone out, a further retry changes nothing
+        ScheduledWave.objects.create(alert=alert, wave=2, due_at=timezone.now())
+        with patch.object(detection, 'start_verification_process') as start:
+            detection.detect_fire(FireAlert.objects.get(pk=alert.pk))
+        start.assert_not_called()
+        self.assertEqual(Incident.objects.get().alert_count, 1)
+
+    def test_verdict_on_primary_alert_resolves_duplicates(self):
+        first, _ = self.detect(self.north)
+        duplicate, _ = self.detect(self.east)
+        for user in create_verifiers(first, 3):
+            post_vote(first, user, True)
+
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.status, 'confirmed')
+        self.assertEqual(duplicate.incident.status, 'confirmed')
+
+        # Later reports of a confirmed fire are confirmed straight away
+        late, late_verified = self.detect(self.east)
+        self.assertFalse(late_verified)
+        self.assertEqual(late.status, 'confirmed')
+
+
+@override_settings(INCIDENT_RADIUS_KM=3.0, INCIDENT_WINDOW_MINUTES=60)
+class ConcurrentIncidentTests(TransactionTestCase):
+    def test_simultaneous_alerts_for_a_new_fire_open_one_incident(self):
+        from .incidents import assign_incident
+
+        # About 1.9 km apart, on either side of a geohash cell boundary
+        alerts = [create_alert(latitude=36.562, longitude=3.5), create_alert(latitude=36.578, longitude=3.5)]
+        barrier = threading.Barrier(len(alerts))
+        results = []
+
+        def assign(alert):
+            try:
+                barrier.wait()
+                results.append(assign_incident(alert))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=assign, args=(alert,)) for alert in alerts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(Incident.objects.count(), 1)
+        self.assertEqual(sorted(created for _, created in results), [False, True])
+        self.assertEqual(Incident.objects.get().alert_count, 2)
+
+class DetectionCacheTests(TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.cache = DetectionCache(max_entries=3, ttl_seconds=60, max_distance=3, clock=lambda: self.now)
+
+    def test_near_duplicate_from_same_camera_hits(self):
+        self.cache.store(1, 0b1011, 'fire', seconds=0.2)
+
+        self.assertEqual(self.cache.lookup(1, 0b1011 ^ (1 << 40) ^ (1 << 3)), 'fire')  # 2 bits off
+        self.assertIsNone(self.cache.lookup(1, 0b1011 ^ 0xF000F))  # 8 bits off
+        self.assertIsNone(self.cache.lookup(2, 0b1011))  # Other camera
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['lookups']), (1, 3))
+        self.assertAlmostEqual(stats['saved_inference_seconds'], 0.2)
+
+    def test_entries_expire_and_least_recently_used_is_evicted(self):
+        a, b, c, d = 0, 0xFFFFFFFF00000000, 0x00000000FFFFFFFF, 0xFFFFFFFFFFFFFFFF
+        for value in (a, b, c):
+            self.cache.store(1, value, value)
+        self.cache.lookup(1, a)  # Refresh the oldest
+        self.cache.store(1, d, 'new')
+
+        self.assertIsNone(self.cache.lookup(1, b))
+        self.assertEqual(self.cache.lookup(1, a), a)
+
+        self.now = 61
+        self.assertIsNone(self.cache.lookup(1, d))
+        self.assertIsNone(self.cache.lookup(1, a))
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_reupload_of_the_same_frame_skips_the_model(self):
+        from fire_inference import Detections
+
+        detection.result_cache.clear()
+        camera = Camera.objects.create(name='static', location_name='Hill', latitude=36.7, longitude=3.1)
+        alerts = [FireAlert.objects.create(camera=camera, image=scene_upload(7),
+                                           latitude=36.7, longitude=3.1) for _ in range(2)]
+
+        with patch.object(detection.engine, 'infer', return_value=Detections()) as infer:
+            for alert in alerts:
+                detection.detect_fire(alert)
+
+        self.assertEqual(infer.call_count, 1)
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        leaderboard_module._leaderboard = None
+        self.users = []
+        for i, points in enumerate([300, 900, 500, 500]):
+            user = User.objects.create(username=f"lb_{i}")
+            user.userprofile.guardian_points = points
+            user.userprofile.save()
+            self.users.append(user)
+
+    def get_leaderboard(self, **params):
+        request = APIRequestFactory().get('/api/leaderboard/', params)
+        return views.leaderboard(request).data
+
+    def test_top_and_my_position(self):
+        data = self.get_leaderboard(limit=3, user_id=self.users[0].id)
+
+        self.assertEqual(data['total'], 4)
+        self.assertEqual([(r['position'], r['username'], r['guardian_points']) for r in data['results']],
+                         [(1, 'lb_1', 900), (2, 'lb_2', 500), (3, 'lb_3', 500)])
+        self.assertEqual((data['me']['position'], data['me']['username']), (4, 'lb_0'))
+
+    def test_vote_moves_guardian_up_incrementally(self):
+        leaderboard_module.get_leaderboard()  # Loaded before the vote
+        alert = create_alert()
+        Verification.objects.create(alert=alert, verifier=self.users[0],
+                                    notification_sent=timezone.now() - timedelta(seconds=40))
+        profile = self.users[0].userprofile
+        profile.guardian_points = 895
+        profile.save()
+        leaderboard_module._leaderboard._checked_at = time.monotonic()  # No refresh from the database
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post_vote(alert, self.users[0], True)
+
+        self.assertEqual(leaderboard_module._leaderboard.entry(self.users[0].id), (1, self.users[0].id, 905))
+
+    def test_refresh_picks_up_changes_from_other_processes(self):
+        board = leaderboard_module.get_leaderboard()
+        profile = self.users[2].userprofile
+        profile.guardian_points = 1000
+        profile.save()
+
+        board.refresh(force=True)
+
+        self.assertEqual(board.rank(self.users[2].id), 1)
+        self.assertEqual(board.rank(self.users[1].id), 2)
+
+    def test_skip_list_matches_sorted_list(self):
+        rng = random.Random(5)
+        skiplist, expected = leaderboard_module.IndexableSkipList(seed=1), []
+        for _ in range(2000):
+            if expected and rng.random() < 0.4:
+                key = expected.pop(rng.randrange(len(expected)))
+                skiplist.remove(key)
+            else:
+                key = rng.randrange(10 ** 9)
+                if key in expected:
+                    continue
+                skiplist.insert(key)
+                expected.append(key)
+                expected.sort()
+        self.assertEqual(list(skiplist.iter_from(1)), expected)
+        for key in rng.sample(expected, 50):
+            self.assertEqual(skiplist.rank(key), expected.index(key) + 1)
+
+    def test_register_guardian_returns_user_id(self):
+        request = APIRequestFactory().post('/api/profile/', {
+            'username': 'new_guardian', 'guardian_points': 2000, 'rank': 'expert', 'is_available': True
+        }, format='json')
+        response = views.UserProfileViewSet.as_view({'post': 'create'})(request)
+
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(username='new_guardian')
+        self.assertEqual(response.data['id'], user.id)
+        # Points and rank are earned, not chosen at registration
+        self.assertEqual((user.userprofile.guardian_points, user.userprofile.rank), (0, 'rookie'))
+        self.assertEqual(response.data['leaderboard_position'], 5)
+
+    def test_seed_guardians_creates_ranked_profiles(self):
+        call_command('seed_guardians', stdout=io.StringIO())
+        call_command('seed_guardians', stdout=io.StringIO())  # Idempotent
+
+        profile = UserProfile.objects.get(user__username='trusted_1')
+        self.assertEqual((profile.rank, profile.guardian_points), ('trusted', 500))
+        self.assertEqual(UserProfile.objects.filter(user__username__startswith='master_').count(), 2)
+
+    def test_deleted_guardian_leaves_the_leaderboard(self):
+        board = leaderboard_module.get_leaderboard()
+        request = APIRequestFactory().delete(f"/api/profile/{self.users[1].id}/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = views.UserProfileViewSet.as_view({'delete': 'destroy'})(request, user_id=self.users[1].id)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(board.rank(self.users[1].id))
+        self.assertEqual(len(board), 3)
+        self.assertEqual([board.rank(user.id) for user in (self.users[2], self.users[3], self.users[0])],
+                         [1, 2, 3])
+
+
+class VerificationStreakTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='streaker')
+        self.today = timezone.localdate()
+
+    def vote_on_days(self, days_ago):
+        for days in days_ago:
+            alert = create_alert()
+            verification = Verification.objects.create(alert=alert, verifier=self.user,
+                                                       notification_sent=timezone.now(), vote=True)
+            Verification.objects.filter(pk=verification.pk).update(
+                created_at=timezone.now() - timedelta(days=days, minutes=5),
+                voted_at=timezone.now() - timedelta(days=days)
+            )
+
+    def test_record_activity_extends_and_restarts(self):
+        profile = self.user.userprofile
+        for days_ago, expected in [(3, 1), (2, 2), (2, 2), (1, 3), (4, 3), (0, 4)]:
+            profile.record_activity(self.today - timedelta(days=days_ago))
+            self.assertEqual(profile.current_streak, expected)
+        self.assertEqual(profile.streak_on(self.today), 4)
+        self.assertEqual(profile.streak_on(self.today + timedelta(days=1)), 0)
+
+        profile.record_activity(self.today + timedelta(days=3))
+        self.assertEqual(profile.current_streak, 1)
+
+    def test_vote_updates_streak_and_serializer_does_not_query(self):
+        self.vote_on_days([1])
+        call_command('backfill_verification_streaks', stdout=io.StringIO())
+        alert = create_alert()
+        Verification.objects.create(alert=alert, verifier=self.user, notification_sent=timezone.now())
+
+        post_vote(alert, self.user, True)
+
+        profile = UserProfile.objects.get(user=self.user)
+        with self.assertNumQueries(0):
+            streak = UserProfileSerializer().get_verification_streak(profile)
+        self.assertEqual(streak, 2)
+
+    def test_late_vote_counts_on_the_day_it_is_cast(self):
+        self.vote_on_days([1])
+        call_command('backfill_verification_streaks', stdout=io.StringIO())
+        late = create_alert()
+        Verification.objects.create(alert=late, verifier=self.user, notification_sent=timezone.now())
+        Verification.objects.filter(alert=late).update(created_at=timezone.now() - timedelta(days=1))
+        today = create_alert()
+        Verification.objects.create(alert=today, verifier=self.user, notification_sent=timezone.now())
+
+        # Yesterday's request answered today, then one of today's
+        post_vote(late, self.user, True)
+        post_vote(today, self.user, True)
+
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.current_streak, profile.last_active_day), (2, self.today))
+        call_command('backfill_verification_streaks', stdout=io.StringIO())
+        self.assertEqual(UserProfile.objects.get(user=self.user).current_streak, 2)
+
+    def test_backfill_counts_run_ending_on_latest_day(self):
+        self.vote_on_days([0, 0, 1, 2, 4, 5])
+        other = User.objects.create(username='lapsed')
+        other.userprofile.current_streak = 7
+        other.userprofile.save()
+
+        call_command('backfill_verification_streaks', stdout=io.StringIO())
+
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.current_streak, profile.last_active_day), (3, self.today))
+        self.assertEqual(UserProfile.objects.get(user=other).current_streak, 0)
+
+
+class GuardianStatisticsTests(TestCase):
+    def test_running_statistics_match_full_recompute(self):
+        profile = User.objects.create(username='stats').userprofile
+        times = [4.0, 12.5, 31.0, 8.0, 700.0, 45.5]
+        for seconds in times:
+            profile.record_response(seconds)
+
+        self.assertAlmostEqual(profile.response_time_avg, statistics.mean(times))
+        self.assertAlmostEqual(profile.response_time_variance, statistics.variance(times))
+        self.assertEqual(profile.response_histogram, [2, 1, 2, 0, 0, 0, 1])
+
+    def test_votes_record_response_time_and_score_accuracy(self):
+        alert = create_alert()
+        users = create_verifiers(alert, 4)
+        Verification.objects.filter(alert=alert).update(notification_sent=timezone.now() - timedelta(seconds=20))
+
+        for user, vote in zip(users, [True, False, True, False]):
+            post_vote(alert, user, vote)
+
+        verification = Verification.objects.get(alert=alert, verifier=users[0])
+        self.assertEqual(verification.response_time, 20)
+        profiles = [UserProfile.objects.get(user=user) for user in users]
+        self.assertEqual([p.response_count for p in profiles], [1, 1, 1, 1])
+        self.assertAlmostEqual(profiles[0].response_time_avg, 20, places=0)
+        # Scored when the third vote confirmed the alert; the late fourth vote on its own
+        self.assertEqual([p.correct_verifications for p in profiles], [1, 0, 1, 0])
+        for profile, accuracy in zip(profiles, [0.6, 0.4, 0.6, 0.4]):
+            self.assertAlmostEqual(profile.accuracy, accuracy)
+
+    def test_ranked_wave_asks_quickest_guardians_first(self):
+        for name, points, count, avg in [('slow', 5000, 20, 200.0), ('fast', 2000, 20, 8.0), ('new', 3000, 0, 0.0)]:
+            user = User.objects.create(username=name)
+            UserProfile.objects.filter(user=user).update(
+                rank='expert', guardian_points=points, response_count=count, response_time_avg=avg,
+                last_verification=timezone.now() - timedelta(hours=1)
+            )
+        alert = create_alert()
+
+        request_verification_wave(alert, is_ranked=True)
+
+        order = list(Verification.objects.filter(alert=alert).order_by('id')
+                     .values_list('verifier__username', flat=True))
+        self.assertEqual(order, ['fast', 'new', 'slow'])
@@ -5,9 +5,11 @@ from . import views
 router = DefaultRouter()
 router.register(r'cameras', views.CameraViewSet)
 router.register(r'fire-alerts', views.FireAlertViewSet)
+router.register(r'verifications', views.VerificationViewSet)
 router.register(r'profile', views.UserProfileViewSet, basename='profile')
 
 urlpatterns = [
+    path('verifications/stream/<int:user_id>/', views.verification_stream, name='verification-stream'),
     path('', include(router.urls)),
     path('verify-fire/', views.verify_fire, name='verify-fire'),
     path('leaderboard/', views.leaderboard, name='leaderboard'),
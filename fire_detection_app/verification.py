@@ -0,0 +1,172 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.utils import timezone
+from datetime import timedelta
+
+from .events import publish_verification_requests
+from .geo import nearest
+from .incidents import resolve_incident
+from .models import RESPONSE_PRIOR_WEIGHT, FireAlert, ScheduledWave, UserProfile, Verification
+
+FINAL_WAVE = 3
+WAVE_SIZE = 5
+VOTES_TO_RESOLVE = 3  # Consider alert verified after 3 votes
+VOTES_TO_CONFIRM = 2
+
+
+def _wave_interval():
+    return getattr(settings, 'VERIFICATION_WAVE_INTERVAL_SECONDS', 30)
+
+
+def expected_response_time():
+    """UserProfile.expected_response_time as an expression the database can sort by"""
+    prior = getattr(settings, 'GUARDIAN_RESPONSE_PRIOR_SECONDS', 60)
+    return ExpressionWrapper(
+        (F('response_count') * F('response_time_avg') + RESPONSE_PRIOR_WEIGHT * prior)
+        / (F('response_count') + RESPONSE_PRIOR_WEIGHT),
+        output_field=FloatField()
+    )
+
+
+def start_verification_process(alert):
+    """Start the three-wave verification process"""
+    # First wave goes out right away; later waves are left to the scheduler
+    run_wave(alert, 1)
+
+
+def run_wave(alert, wave):
+    """Dispatch one verification wave and schedule the next one"""
+    if alert.status != 'pending':
+        return False  # Alert was verified
+
+    # Waves 1 and 2 try regular users, the final wave goes to ranked users
+    request_verification_wave(alert, is_ranked=(wave == FINAL_WAVE))
+
+    if wave < FINAL_WAVE:
+        ScheduledWave.objects.get_or_create(
+            alert=alert,
+            wave=wave + 1,
+            defaults={'due_at': timezone.now() + timedelta(seconds=_wave_interval())}
+        )
+    return True
+
+
+def wave_candidates(available, alert, count):
+    """The quickest ``count`` of the closest guardians, topped up with ones who haven't shared a location"""
+    nearby_users = nearest(available, alert.latitude, alert.longitude, count * 2)
+    nearby_users = sorted(nearby_users, key=lambda profile: profile.expected_response_time())[:count]
+    if len(nearby_users) < count:
+        nearby_users += list(available.filter(geohash='').annotate(
+            expected_time=expected_response_time()
+        ).order_by('expected_time')[:count - len(nearby_users)])
+    return nearby_users
+
+
+def claim_guardians(available, candidates):
+    """The candidates this transaction could lock, in order; ones another wave holds are skipped"""
+    locked = set(available.filter(
+        id__in=[profile.id for profile in candidates]
+    ).select_for_update(skip_locked=True).values_list('id', flat=True))
+    return [profile for profile in candidates if profile.id in locked]
+
+
+def request_verification_wave(alert, is_ranked=False):
+    """Request verification from a wave of users"""
+    now = timezone.now()
+    with transaction.atomic():
+        # Candidates are chosen without locks; only the chosen rows are locked
+        # afterwards, so a wave for another alert nearby can still claim the rest
+        available = UserProfile.objects.filter(
+            is_available=True,
+            last_verification__lte=now - timedelta(minutes=10)
+        ).exclude(
+            user__verification__alert=alert  # Never ask the same user twice
+        )
+
+        # Get available users based on rank, quickest expected answer first
+        if is_ranked:
+            available = available.filter(rank__in=['expert', 'master'])
+            nearby_users = claim_guardians(available, list(available.annotate(
+                expected_time=expected_response_time()
+            ).order_by('expected_time', '-guardian_points')))
+        else:
+            available = available.filter(rank__in=['rookie', 'trusted'])
+            nearby_users, passed_over = [], set()
+            while len(nearby_users) < WAVE_SIZE:
+                # Guardians claimed by another wave are replaced by the next best
+                candidates = wave_candidates(available.exclude(id__in=passed_over), alert,
+                                             WAVE_SIZE - len(nearby_users))
+                if not candidates:
+                    break
+                nearby_users += claim_guardians(available, candidates)
+                passed_over.update(profile.id for profile in candidates)
+
+        if not nearby_users:
+            return False
+
+        # One INSERT for the whole wave and one UPDATE for the users' availability
+        Verification.objects.bulk_create([
+            Verification(alert=alert, verifier_id=profile.user_id, notification_sent=now)
+            for profile in nearby_users
+        ])
+        UserProfile.objects.filter(
+            id__in=[profile.id for profile in nearby_users]
+        ).update(is_available=False, last_verification=now)
+
+        # Push the request to the selected volunteers once the wave is committed
+        user_ids = [profile.user_id for profile in nearby_users]
+        transaction.on_commit(lambda: publish_verification_requests(alert, user_ids))
+
+    return True
+
+
+def score_votes(alert_id, outcome, verifier_ids=None):
+    """Move the accuracy of the guardians who voted on a resolved alert towards 1 or 0"""
+    alpha = getattr(settings, 'GUARDIAN_ACCURACY_ALPHA', 0.2)
+    votes = Verification.objects.filter(alert_id=alert_id, vote__isnull=False)
+    if verifier_ids is not None:
+        votes = votes.filter(verifier_id__in=verifier_ids)
+    right = votes.filter(vote=(outcome == 'confirmed')).values('verifier_id')
+    wrong = votes.filter(vote=(outcome != 'confirmed')).values('verifier_id')
+
+    # One UPDATE per group, however many guardians voted
+    UserProfile.objects.filter(user_id__in=right).update(
+        accuracy=F('accuracy') * (1 - alpha) + alpha,
+        correct_verifications=F('correct_verifications') + 1
+    )
+    UserProfile.objects.filter(user_id__in=wrong).update(accuracy=F('accuracy') * (1 - alpha))
+
+
+def apply_vote(alert_id, vote, verifier_id=None):
+    """Count a vote on an alert and resolve the alert once enough votes are in.
+
+    Must run inside a transaction. The F() increment locks the alert row until
+    commit, so the counters read back afterwards already include every earlier
+    vote. The status only moves away from 'pending' through a conditional
+    UPDATE, so exactly one vote resolves each alert, and that vote passes the
+    outcome on to the alert's incident and its duplicates and scores everyone
+    who voted so far. A vote arriving after that is scored on its own against
+    the outcome, using ``verifier_id``. Returns the new status if this vote
+    resolved the alert, otherwise None.
+    """
+    counter = 'votes_yes' if vote else 'votes_no'
+    alerts = FireAlert.objects.filter(pk=alert_id)
+    alerts.update(**{counter: F(counter) + 1})
+    votes_yes, votes_no, status = alerts.values_list('votes_yes', 'votes_no', 'status').get()
+
+    if status != 'pending':
+        if verifier_id is not None:
+            score_votes(alert_id, status, [verifier_id])
+        return None
+
+    if votes_yes + votes_no < VOTES_TO_RESOLVE:
+        return None
+
+    outcome = 'confirmed' if votes_yes >= VOTES_TO_CONFIRM else 'false_alarm'
+    resolved = alerts.filter(status='pending').update(status=outcome)
+    if not resolved:
+        return None
+    resolve_incident(alert_id, outcome)
+    score_votes(alert_id, outcome)
+    return outcome
@@ -1,20 +1,31 @@
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets
-from rest_framework.decorators import api_view
+from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField, ImageField
 from rest_framework.response import Response
+from .annotations import open_annotated_image, thumbnail_width
 from .models import Camera, FireAlert, UserProfile, Verification
-from .serializers import CameraSerializer, FireAlertSerializer, UserProfileSerializer
+from .serializers import (CameraSerializer, FireAlertSerializer, JSONStringField,
+                          UserProfileCreateSerializer, UserProfileSerializer,
+                          VerificationSerializer)
+from .events import get_broker, verification_channel, verification_request_message
+from .inference_queue import enqueue_detection, enqueue_detections
+from .leaderboard import get_leaderboard
+from .pagination import KeysetCursorPagination
+from .verification import apply_vote
+from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
-import cv2
-import os
-from django.conf import settings
-import threading
+from django.utils.dateparse import parse_datetime
+import asyncio
+import json
+import queue
 import time
-from ultralytics import YOLO
-
-# Initialize YOLO model
-model = YOLO('fire_s.pt')
 
 class CameraViewSet(viewsets.ModelViewSet):
     queryset = Camera.objects.all()
@@ -25,106 +36,248 @@ class CameraViewSet(viewsets.ModelViewSet):
         print(f"Camera {camera.name} created at {camera.location_name}")
 
 class FireAlertViewSet(viewsets.ModelViewSet):
-    queryset = FireAlert.objects.all()
+    # The serializer reads reporter.username and camera.name for every row
+    queryset = FireAlert.objects.select_related('reporter', 'camera')
     serializer_class = FireAlertSerializer
+    pagination_class = KeysetCursorPagination
+    bulk_max_frames = 50
 
-    def perform_create(self, serializer):
-        alert = serializer.save()
-        self.detect_fire(alert)
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
 
-    def detect_fire(self, alert):
-        img = cv2.imread(alert.image.path)
-        results = model(img)[0]
-        
-        if len(results.boxes) > 0:
-            max_conf = float(results.boxes.conf[0])
-            
-            if max_conf > 0.5:  # Confidence threshold
-                # Create annotated image
-                annotated_img = img.copy()
-                boxes = results.boxes.xyxy.cpu().numpy()
-                for box, conf in zip(boxes, results.boxes.conf):
-                    x1, y1, x2, y2 = map(int, box[:4])
-                    cv2.rectangle(annotated_img, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                    conf_text = f"{conf:.2f}"
-                    cv2.putText(annotated_img, conf_text, (x1, y1-10),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
-                
-                # Save annotated image
-                annotated_path = os.path.join(settings.MEDIA_ROOT, 'alerts',
-                                          f'alert_{alert.id}_annotated.jpg')
-                cv2.imwrite(annotated_path, annotated_img)
-                
-                # Update alert
-                alert.annotated_image = annotated_path
-                alert.detection_confidence = max_conf
-                alert.verification_deadline = timezone.now() + timedelta(minutes=5)
-                alert.save()
-                
-                # Start verification process
-                self.start_verification_process(alert)
-            else:
-                alert.detection_confidence = max_conf
-                alert.save()
-
-    def start_verification_process(self, alert):
-        """Start the three-wave verification process"""
-        # First wave: Try regular users
-        verified = self.request_verification_wave(alert, is_ranked=False)
-        if verified:
-            return
-
-        # Wait 30 seconds for first wave response
-        time.sleep(30)
-        alert.refresh_from_db()
-        if alert.status != 'pending':
-            return  # Alert was verified
-
-        # Second wave: Try new regular users
-        verified = self.request_verification_wave(alert, is_ranked=False)
-        if verified:
-            return
-
-        # Wait 30 seconds for second wave response
-        time.sleep(30)
-        alert.refresh_from_db()
-        if alert.status != 'pending':
-            return  # Alert was verified
-
-        # Final wave: Send to ranked users
-        self.request_verification_wave(alert, is_ranked=True)
-
-    def request_verification_wave(self, alert, is_ranked=False):
-        """Request verification from a wave of users"""
-        # Get available users based on rank
-        if is_ranked:
-            nearby_users = UserProfile.objects.filter(
-                is_available=True,
-                last_verification__lte=timezone.now() - timedelta(minutes=10),
-                rank__in=['expert', 'master']
-            ).order_by('-guardian_points')
-        else:
-            nearby_users = UserProfile.objects.filter(
-                is_available=True,
-                last_verification__lte=timezone.now() - timedelta(minutes=10),
-                rank__in=['rookie', 'guardian']
-            ).order_by('?')[:5]  # Random 5 users
-
-        verifications_created = 0
-        for user_profile in nearby_users:
-            verification = Verification.objects.create(
-                alert=alert,
-                verifier=user_profile.user,
-                notification_sent=timezone.now()
+        params = self.request.query_params
+        status = params.get('status')
+        if status:
+            queryset = queryset.filter(status=status)
+
+        camera = params.get('camera') or params.get('camera_id')
+        if camera:
+            try:
+                queryset = queryset.filter(camera_id=int(camera))
+            except ValueError:
+                raise ValidationError({'camera': 'Expected a camera id'})
+
+        incident = params.get('incident')
+        if incident:
+            try:
+                queryset = queryset.filter(incident_id=int(incident))
+            except ValueError:
+                raise ValidationError({'incident': 'Expected an incident id'})
+
+        since = params.get('since')
+        if since:
+            since_time = parse_datetime(since)
+            if since_time is None:
+                raise ValidationError({'since': 'Expected an ISO 8601 datetime'})
+            queryset = queryset.filter(created_at__gte=since_time)
+
+        bbox = params.get('bbox')
+        if bbox:
+            try:
+                min_lon, min_lat, max_lon, max_lat = map(float, bbox.split(','))
+            except ValueError:
+                raise ValidationError({'bbox': 'Expected min_lon,min_lat,max_lon,max_lat'})
+            queryset = queryset.filter(
+                latitude__gte=min_lat, latitude__lte=max_lat,
+                longitude__gte=min_lon, longitude__lte=max_lon
             )
-            verifications_created += 1
-            
-            # Update user's availability
-            user_profile.is_available = False
-            user_profile.last_verification = timezone.now()
-            user_profile.save()
+        return queryset
+
+    def perform_create(self, serializer):
+        # Detection runs in the inference workers; the client polls detection_status
+        with transaction.atomic():
+            alert = serializer.save()
+            enqueue_detection(alert)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """Ingest several frames from one camera in a single request.
+
+        Multipart form: ``camera``, one or more ``images`` files, and optionally
+        ``latitude``/``longitude`` repeated once per image (they default to the
+        camera's position) and a JSON ``track_summary`` per image. All alerts and their detection jobs are inserted
+        with one bulk INSERT each.
+        """
+        images = request.FILES.getlist('images')
+        if not images:
+            raise ValidationError({'images': 'At least one image is required'})
+        if len(images) > self.bulk_max_frames:
+            raise ValidationError({'images': f'At most {self.bulk_max_frames} images per request'})
+
+        try:
+            camera = Camera.objects.get(pk=request.data.get('camera'))
+        except (Camera.DoesNotExist, ValueError, TypeError):
+            raise ValidationError({'camera': 'Unknown camera'})
 
-        return verifications_created > 0
+        latitudes = self._per_frame(request.data, 'latitude', len(images), camera.latitude)
+        longitudes = self._per_frame(request.data, 'longitude', len(images), camera.longitude)
+        summaries = self._per_frame_json(request.data, 'track_summary', len(images))
+
+        image_field = ImageField()
+        errors = {}
+        for index, image in enumerate(images):
+            try:
+                image_field.run_validation(image)
+            except ValidationError as e:
+                errors[index] = e.detail
+            except DjangoValidationError as e:
+                errors[index] = e.messages
+        if errors:
+            raise ValidationError({'images': errors})
+
+        alerts = [
+            FireAlert(camera=camera, image=image, latitude=lat, longitude=lon, track_summary=summary)
+            for image, lat, lon, summary in zip(images, latitudes, longitudes, summaries)
+        ]
+        with transaction.atomic():
+            # bulk_create still runs FileField.pre_save, which writes each image to storage
+            alerts = FireAlert.objects.bulk_create(alerts)
+            enqueue_detections(alerts)
+
+        serializer = self.get_serializer(alerts, many=True)
+        return Response(serializer.data, status=201)
+
+    @action(detail=True, methods=['get'])
+    def annotated(self, request, pk=None):
+        """The alert image with its detection boxes drawn; ``?width=`` returns a thumbnail"""
+        alert = self.get_object()
+        try:
+            width = thumbnail_width(int(request.query_params.get('width') or 0))
+        except ValueError:
+            raise ValidationError({'width': 'Expected a number of pixels'})
+
+        if not alert.detections:
+            if alert.annotated_image:
+                # Rendered to disk by the detector before boxes were stored
+                return FileResponse(alert.annotated_image.open('rb'), content_type='image/jpeg')
+            return Response({'status': 'error', 'message': 'No detections to annotate'}, status=404)
+
+        try:
+            image = open_annotated_image(alert, width)
+        except FileNotFoundError:
+            return Response({'status': 'error', 'message': 'Alert image is missing'}, status=404)
+        response = FileResponse(image, content_type='image/jpeg')
+        response['Cache-Control'] = 'max-age=86400'
+        return response
+
+    def _per_frame(self, data, name, count, default):
+        values = data.getlist(name) if hasattr(data, 'getlist') else []
+        if not values:
+            return [default] * count
+        if len(values) == 1:
+            values = values * count
+        if len(values) != count:
+            raise ValidationError({name: 'Expected one value, or one per image'})
+        try:
+            return [float(value) for value in values]
+        except ValueError:
+            raise ValidationError({name: 'Expected a number'})
+
+    def _per_frame_json(self, data, name, count):
+        values = data.getlist(name) if hasattr(data, 'getlist') else []
+        if not values:
+            return [None] * count
+        if len(values) != count:
+            raise ValidationError({name: 'Expected one value per image'})
+        field = JSONStringField()
+        try:
+            return [field.to_internal_value(value) for value in values]
+        except ValidationError:
+            raise ValidationError({name: 'Expected JSON'})
+
+class VerificationViewSet(viewsets.ReadOnlyModelViewSet):
+    # Load exactly what VerificationSerializer reads, including the alert's camera
+    queryset = Verification.objects.select_related(
+        'verifier', 'alert', 'alert__camera'
+    ).only(
+        'id', 'alert', 'vote', 'created_at', 'response_time', 'points_awarded',
+        'notification_sent', 'expired', 'verifier__username',
+        'alert__detection_confidence', 'alert__status', 'alert__image',
+        'alert__annotated_image', 'alert__detections', 'alert__verification_deadline',
+        'alert__camera__location_name'
+    )
+    serializer_class = VerificationSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        verifier = self.request.query_params.get('verifier')
+        if verifier:
+            queryset = queryset.filter(verifier_id=verifier)
+        if self.request.query_params.get('pending') in ('1', 'true', 'True'):
+            queryset = queryset.filter(vote__isnull=True, expired=False)
+        return queryset
+
+class UserProfileViewSet(viewsets.ModelViewSet):
+    queryset = UserProfile.objects.select_related('user').order_by('user_id')
+    serializer_class = UserProfileSerializer
+    lookup_field = 'user_id'
+
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return UserProfileCreateSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+
+        rank = self.request.query_params.get('rank')
+        if rank:
+            queryset = queryset.filter(rank=rank)
+        is_available = self.request.query_params.get('is_available')
+        if is_available is not None:
+            queryset = queryset.filter(is_available=BooleanField().to_internal_value(is_available))
+        return queryset
+
+    def perform_create(self, serializer):
+        profile = serializer.save()
+        get_leaderboard().update(profile.user_id, profile.guardian_points)
+
+    def perform_destroy(self, instance):
+        user_id = instance.user_id
+        instance.delete()
+        # Refreshes only pick up changed rows, so a deleted guardian is dropped here
+        transaction.on_commit(lambda: get_leaderboard().discard(user_id))
+
+@api_view(['GET'])
+def leaderboard(request):
+    """Guardians by points, one page at a time, plus the position of ``?user_id=``"""
+    params = request.query_params
+    try:
+        limit = min(max(int(params.get('limit', 10)), 1), 100)
+        offset = max(int(params.get('offset', 0)), 0)
+        user_id = int(params['user_id']) if params.get('user_id') else None
+    except ValueError:
+        raise ValidationError({'detail': 'limit, offset and user_id must be integers'})
+
+    board = get_leaderboard()
+    entries = board.top(limit, offset)
+    me = board.entry(user_id) if user_id is not None else None
+
+    # One query for the names and titles of everyone on the page
+    user_ids = {entry[1] for entry in entries} | ({me[1]} if me else set())
+    profiles = {profile.user_id: profile for profile in
+                UserProfile.objects.filter(user_id__in=user_ids).select_related('user')}
+
+    def row(entry):
+        position, entry_user_id, points = entry
+        profile = profiles.get(entry_user_id)
+        return {
+            'position': position,
+            'user_id': entry_user_id,
+            'username': profile.user.username if profile else None,
+            'rank': profile.rank if profile else None,
+            'guardian_points': points,
+        }
+
+    return Response({
+        'total': len(board),
+        'results': [row(entry) for entry in entries],
+        'me': row(me) if me else None,
+    })
 
 @api_view(['POST'])
 def verify_fire(request):
@@ -139,47 +292,48 @@ def verify_fire(request):
             vote__isnull=True  # Only allow unvoted verifications
         )
         
-        # Record the vote
-        verification.vote = vote
-        verification.vote_time = timezone.now()
-        verification.save()
-        
-        # Update user profile
-        user_profile = UserProfile.objects.get(user_id=user_id)
-        user_profile.is_available = True
-        
-        # Award points based on speed and rank
-        time_taken = (verification.vote_time - verification.notification_sent).total_seconds()
-        speed_bonus = max(0, 30 - time_taken)  # Bonus points for fast response
-        
-        if user_profile.rank in ['expert', 'master']:
-            points = 20 + speed_bonus  # More points for ranked users
-        else:
-            points = 10 + speed_bonus
-            
-        user_profile.guardian_points += points
-        user_profile.save()
-        
-        # Update alert status if enough votes
-        alert = verification.alert
-        total_votes = Verification.objects.filter(
-            alert=alert,
-            vote__isnull=False
-        ).count()
-        
-        if total_votes >= 3:  # Consider alert verified after 3 votes
-            positive_votes = Verification.objects.filter(
-                alert=alert,
-                vote=True
-            ).count()
-            
-            alert.status = 'confirmed' if positive_votes >= 2 else 'false_alarm'
-            alert.save()
-        
+        vote = BooleanField().to_internal_value(vote)
+
+        with transaction.atomic():
+            # Record the vote; the vote__isnull guard stops a double submit counting twice
+            voted_at = timezone.now()
+            sent = verification.notification_sent or verification.created_at
+            time_taken = (voted_at - sent).total_seconds()
+            recorded = Verification.objects.filter(
+                pk=verification.pk,
+                vote__isnull=True
+            ).update(vote=vote, response_time=round(time_taken), voted_at=voted_at)
+            if not recorded:
+                raise Verification.DoesNotExist
+            verification.vote = vote
+
+            # Update user profile; locked so concurrent votes don't lose points
+            user_profile = UserProfile.objects.select_for_update().get(user_id=user_id)
+            user_profile.is_available = True
+            user_profile.record_activity(timezone.localdate(voted_at))
+            user_profile.record_response(time_taken)
+
+            # Award points based on speed and rank
+            speed_bonus = max(0, 30 - time_taken)  # Bonus points for fast response
+
+            if user_profile.rank in ['expert', 'master']:
+                points = 20 + speed_bonus  # More points for ranked users
+            else:
+                points = 10 + speed_bonus
+
+            user_profile.guardian_points += points
+            user_profile.save()
+            new_points = user_profile.guardian_points
+            transaction.on_commit(lambda: get_leaderboard().update(user_profile.user_id, new_points))
+
+            # Update alert counters and resolve it once enough votes are in
+            resolution = apply_vote(verification.alert_id, vote, verifier_id=user_id)
+
         return Response({
             'status': 'success',
             'points_earned': points,
-            'new_total_points': user_profile.guardian_points
+            'new_total_points': user_profile.guardian_points,
+            'alert_resolved': resolution is not None
         })
         
     except Verification.DoesNotExist:
@@ -192,3 +346,70 @@ def verify_fire(request):
             'status': 'error',
             'message': str(e)
         }, status=400)
+
+def sse_event(message):
+    return f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+
+async def verification_stream(request, user_id):
+    """Server-Sent Events stream of verification requests for one guardian"""
+    broker = get_broker()
+    channel = verification_channel(user_id)
+    keepalive = getattr(settings, 'EVENT_STREAM_KEEPALIVE_SECONDS', 15)
+
+    async def events():
+        try:
+            # Requests sent while the guardian was disconnected come first
+            for message in pending:
+                yield sse_event(message)
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_event(message)
+        finally:
+            broker.unsubscribe(subscription)
+
+    def blocking_events():
+        # Each open stream holds a WSGI worker thread, so it is ended after a
+        # while; EventSource reconnects and gets the still-pending requests again
+        deadline = time.monotonic() + getattr(settings, 'EVENT_STREAM_WSGI_MAX_SECONDS', 30)
+        try:
+            for message in pending:
+                yield sse_event(message)
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    message = subscription.get(timeout=min(keepalive, remaining))
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_event(message)
+            yield "retry: 1000\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    # Subscribing may touch the database (DatabaseBroker), so do it off the loop
+    if isinstance(request, ASGIRequest):
+        subscription = await sync_to_async(broker.subscribe)(channel, asyncio.get_running_loop())
+        stream = events()
+    else:
+        # Under WSGI Django would collect an async iterator in full before
+        # sending it, so an endless stream has to be read by the worker thread
+        subscription = await sync_to_async(broker.subscribe_blocking)(channel)
+        stream = blocking_events()
+    pending = await sync_to_async(pending_verification_messages)(user_id)
+
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def pending_verification_messages(user_id):
+    pending = Verification.objects.filter(
+        verifier_id=user_id,
+        vote__isnull=True,
+        expired=False,
+        alert__status='pending'
+    ).select_related('alert').order_by('notification_sent')
+    return [verification_request_message(verification.alert) for verification in pending]
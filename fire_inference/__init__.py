@@ -0,0 +1,44 @@
+"""Fire detection inference behind one interface.
+
+Every detector (the Django inference workers, the Raspberry Pi, the camera
+simulator and the video script) loads its model through ``load_backend`` and
+gets back an ``InferenceBackend`` whose ``predict(images)`` returns one
+``Detections`` per image. Two implementations exist:
+
+  ultralytics   ``.pt`` weights through ultralytics.YOLO (needs torch)
+  onnxruntime   exported ``.onnx`` models on ONNX Runtime's CPU provider,
+                much lighter on Raspberry-Pi-class CPUs
+
+Export the weights with ``python -m fire_inference.export fire_s.pt fire_m.pt``,
+quantize an export to INT8 with ``fire_inference.quantize`` and compare it
+with the FP32 model with ``fire_inference.evaluate``.
+"""
+import importlib
+
+from .base import Detections, InferenceBackend
+
+BACKENDS = {
+    'ultralytics': 'fire_inference.ultralytics_backend.UltralyticsBackend',
+    'onnxruntime': 'fire_inference.onnx_backend.OnnxRuntimeBackend',
+}
+
+
+def backend_for(weights):
+    """The backend that can run a weights file, judged by its extension"""
+    return 'onnxruntime' if str(weights).endswith('.onnx') else 'ultralytics'
+
+
+def load_backend(weights, backend='auto', **options):
+    """Load ``weights`` with the named backend ('auto' picks one from the extension)"""
+    if backend in (None, 'auto'):
+        backend = backend_for(weights)
+    try:
+        path = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown inference backend {backend!r}; expected one of {sorted(BACKENDS)}")
+
+    module_name, class_name = path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)(weights, **options)
+
+
+__all__ = ['BACKENDS', 'Detections', 'InferenceBackend', 'backend_for', 'load_backend']
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+class Detections:
+    """Boxes found in one image, highest confidence first.
+
+    ``xyxy`` is an (N, 4) float array of pixel corners in the original image,
+    ``conf`` and ``cls`` are (N,) arrays of scores and class ids.
+    """
+
+    def __init__(self, xyxy=None, conf=None, cls=None):
+        self.xyxy = np.zeros((0, 4), dtype=np.float32) if xyxy is None else np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.zeros(0, dtype=np.float32) if conf is None else np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.zeros(len(self.conf), dtype=np.int64) if cls is None else np.asarray(cls, dtype=np.int64).reshape(-1)
+
+        order = np.argsort(-self.conf, kind='stable')
+        self.xyxy, self.conf, self.cls = self.xyxy[order], self.conf[order], self.cls[order]
+
+    def __len__(self):
+        return len(self.conf)
+
+    @property
+    def max_confidence(self):
+        return float(self.conf[0]) if len(self) else 0.0
+
+    def __iter__(self):
+        """Yield (box, confidence, class id) for each detection"""
+        for box, conf, cls in zip(self.xyxy, self.conf, self.cls):
+            yield box, float(conf), int(cls)
+
+    def __repr__(self):
+        return f"Detections(n={len(self)}, max_confidence={self.max_confidence:.2f})"
+
+
+class InferenceBackend:
+    """A loaded detector. Images are HxWx3 uint8 arrays in OpenCV (BGR) order."""
+
+    name = 'base'
+
+    def __init__(self, weights, conf=0.25, iou=0.7, imgsz=640):
+        self.weights = weights
+        self.conf = conf
+        self.iou = iou
+        self.imgsz = imgsz
+
+    def predict(self, images):
+        """Run the detector on a list of images and return one Detections per image"""
+        raise NotImplementedError
+
+    def __call__(self, image):
+        return self.predict([image])[0]
@@ -0,0 +1,28 @@
+"""Frame sampling and fire labels for recorded clips, shared by the evaluation tools.
+
+Labels are a JSON file mapping each clip's file name to its fire intervals in
+seconds, e.g. {"ridge_cam_0412.mp4": [[12.0, 95.5]], "quiet_day.mp4": []}.
+"""
+import cv2
+
+
+def read_frames(path, sample_fps, rgb=False):
+    """Yield (timestamp, frame) pairs sampled from a video file"""
+    capture = cv2.VideoCapture(path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, int(round(fps / sample_fps)))
+    index = 0
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        if index % step == 0:
+            # The Pi detector feeds the model RGB frames, the server BGR
+            yield index / fps, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if rgb else frame
+        index += 1
+    capture.release()
+
+
+def is_fire(timestamp, intervals):
+    """Whether a timestamp falls inside one of a clip's labelled fire intervals"""
+    return any(start <= timestamp <= end for start, end in intervals)
@@ -0,0 +1,197 @@
+"""Accuracy and latency of a candidate model (e.g. INT8) against the FP32 reference.
+
+    python -m fire_inference.evaluate clips/*.mp4 --labels labels.json \\
+        --reference fire_m.onnx --candidate fire_m.int8.onnx --write-report
+
+Labels use the format described in fire_inference/clips.py: a JSON file
+mapping each clip's file name to its fire intervals in seconds, e.g.
+{"ridge_cam_0412.mp4": [[12.0, 95.5]], "quiet_day.mp4": []}. A frame counts
+as a detection when its best box clears the detector's alert threshold, the
+same decision FireDetector.detect_fire and the server make.
+
+Each model runs in its own process so the reported peak memory is its own.
+With --write-report the candidate's results are saved next to it as
+``<candidate>.eval.json``; ``choose_weights`` reads that file to decide
+whether a detector may switch to the candidate.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import time
+
+from .clips import is_fire, read_frames
+
+CONFIDENCE_THRESHOLD = 0.5  # Same threshold as FireDetector.detect_fire and detection.detect_fire
+
+
+def peak_rss_mb():
+    # Django imports this module through model_registry, and resource is Unix-only
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def run_model(weights, backend, clips, sample_fps, rgb, threads):
+    """Run one model over every sampled frame; executed in a child process"""
+    from fire_inference import load_backend
+
+    baseline = peak_rss_mb()
+    options = {'threads': threads} if threads and backend != 'ultralytics' else {}
+    start = time.perf_counter()
+    model = load_backend(weights, backend, **options)
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    decisions = []
+    for path in clips:
+        for timestamp, frame in read_frames(path, sample_fps, rgb):
+            start = time.perf_counter()
+            detections = model(frame)
+            latencies.append(time.perf_counter() - start)
+            decisions.append((os.path.basename(path), timestamp,
+                              detections.max_confidence > CONFIDENCE_THRESHOLD))
+
+    return {
+        'load_seconds': load_seconds,
+        'latencies': latencies,
+        'decisions': decisions,
+        'peak_rss_mb': peak_rss_mb(),
+        'model_rss_mb': peak_rss_mb() - baseline,
+    }
+
+
+def score(run, labels, weights):
+    if not run['latencies']:
+        raise ValueError('No frames could be read from the clips')
+    latencies = sorted(run['latencies'][1:] or run['latencies'])  # The first run includes warm-up
+    tp = fp = fn = 0
+    for clip, timestamp, detected in run['decisions']:
+        fire = is_fire(timestamp, labels.get(clip, []))
+        tp += fire and detected
+        fp += detected and not fire
+        fn += fire and not detected
+    return {
+        'model': os.path.basename(weights),
+        'model_mb': os.path.getsize(weights) / 1e6 if os.path.isfile(weights) else None,
+        'frames': len(run['decisions']),
+        'precision': tp / (tp + fp) if tp + fp else 1.0,
+        'recall': tp / (tp + fn) if tp + fn else 1.0,
+        'latency_ms_mean': statistics.fmean(latencies) * 1000,
+        'latency_ms_p50': latencies[len(latencies) // 2] * 1000,
+        'latency_ms_p95': latencies[int(len(latencies) * 0.95)] * 1000,
+        'load_seconds': run['load_seconds'],
+        'peak_rss_mb': run['peak_rss_mb'],
+        'model_rss_mb': run['model_rss_mb'],
+    }
+
+
+def agreement(reference, candidate):
+    """Share of frames where both models made the same alert decision"""
+    same = sum(a[2] == b[2] for a, b in zip(reference['decisions'], candidate['decisions']))
+    return same / len(reference['decisions']) if reference['decisions'] else 1.0
+
+
+def evaluate(reference, candidate, clips, labels, sample_fps=1.0, rgb=False,
+             threads=None, backend='auto'):
+    """Score both models on the labelled clips; returns the candidate's report"""
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        runs = [pool.apply(run_model, (weights, backend, clips, sample_fps, rgb, threads))
+                for weights in (reference, candidate)]
+
+    report = score(runs[1], labels, candidate)
+    report['reference'] = score(runs[0], labels, reference)
+    report['agreement'] = agreement(*runs)
+    report['recall_drop'] = report['reference']['recall'] - report['recall']
+    report['speedup'] = report['reference']['latency_ms_mean'] / report['latency_ms_mean']
+    report['evaluated_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    return report
+
+
+def report_path(weights):
+    return f"{weights}.eval.json"
+
+
+def load_report(weights):
+    try:
+        with open(report_path(weights)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def passes_floor(report, floor):
+    """Whether an evaluation report meets an accuracy floor.
+
+    ``floor`` may set a minimum ``recall`` and ``precision`` on the labelled
+    clips and a maximum ``recall_drop`` relative to the FP32 reference.
+    """
+    if not report:
+        return False
+    if report['recall'] < floor.get('recall', 0.0):
+        return False
+    if report['precision'] < floor.get('precision', 0.0):
+        return False
+    return report['recall_drop'] <= floor.get('recall_drop', 1.0)
+
+
+def choose_weights(weights, candidate=None, floor=None):
+    """Use ``candidate`` (e.g. an INT8 model) only if its saved report meets the floor"""
+    if not candidate:
+        return weights
+    if not os.path.exists(candidate):
+        print(f"Quantized model {candidate} not found; using {weights}")
+        return weights
+    report = load_report(candidate)
+    if not passes_floor(report, floor or {}):
+        reason = 'has no evaluation report' if report is None else (
+            f"misses the accuracy floor (recall {report['recall']:.3f}, precision "
+            f"{report['precision']:.3f}, recall drop {report['recall_drop']:+.3f})")
+        print(f"Quantized model {candidate} {reason}; using {weights}")
+        return weights
+    return candidate
+
+
+def print_report(report):
+    rows = [('reference', report['reference']), ('candidate', report)]
+    print(f"{'':>10} {'model':>22} {'MB':>6} {'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>8} "
+          f"{'precision':>9} {'recall':>7}")
+    for name, row in rows:
+        print(f"{name:>10} {row['model']:>22} {row['model_mb'] or 0:6.1f} {row['latency_ms_p50']:8.1f} "
+              f"{row['latency_ms_p95']:8.1f} {row['model_rss_mb']:8.0f} "
+              f"{row['precision']:9.3f} {row['recall']:7.3f}")
+    print(f"{report['frames']} frames, speedup x{report['speedup']:.2f}, "
+          f"recall drop {report['recall_drop']:+.3f}, decision agreement {report['agreement']:.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('clips', nargs='+')
+    parser.add_argument('--labels', required=True)
+    parser.add_argument('--reference', default='fire_m.onnx', help='FP32 model')
+    parser.add_argument('--candidate', default='fire_m.int8.onnx', help='Model under test, e.g. the INT8 one')
+    parser.add_argument('--backend', default='auto', choices=['auto', 'ultralytics', 'onnxruntime'])
+    parser.add_argument('--sample-fps', type=float, default=1.0)
+    parser.add_argument('--rgb', action='store_true', help='Feed RGB frames like the Pi detector does')
+    parser.add_argument('--threads', type=int, default=None, help='ONNX Runtime intra-op threads (4 on a Pi 4)')
+    parser.add_argument('--write-report', action='store_true',
+                        help='Save the candidate report next to it for choose_weights')
+    args = parser.parse_args(argv)
+
+    with open(args.labels) as f:
+        labels = json.load(f)
+    report = evaluate(args.reference, args.candidate, args.clips, labels, args.sample_fps,
+                      args.rgb, args.threads, args.backend)
+    print_report(report)
+    if args.write_report:
+        with open(report_path(args.candidate), 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {report_path(args.candidate)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Export fire detection weights for the lighter CPU runtimes.
+
+    python -m fire_inference.export fire_s.pt fire_m.pt
+    python -m fire_inference.export fire_m.pt --imgsz 480 --static
+    python -m fire_inference.export fire_m.pt --format openvino
+
+ONNX files are written next to the weights (``fire_m.pt`` -> ``fire_m.onnx``)
+and load with the onnxruntime backend. By default the batch dimension is
+dynamic so the server's batched inference can send several frames per run;
+``--static`` exports a fixed single-image graph, which is a little faster on
+the Pi. ``--format openvino`` writes ultralytics' OpenVINO model directory,
+which the ultralytics backend can load.
+"""
+import argparse
+import time
+
+
+def export(weights, imgsz=640, dynamic=True, fmt='onnx', opset=None, simplify=True):
+    """Export one weights file and return the path of the exported model"""
+    from ultralytics import YOLO
+
+    options = {'format': fmt, 'imgsz': imgsz}
+    if fmt == 'onnx':
+        options.update(dynamic=dynamic, simplify=simplify)
+        if opset:
+            options['opset'] = opset
+    start = time.perf_counter()
+    path = YOLO(weights).export(**options)
+    print(f"Exported {weights} -> {path} in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('weights', nargs='+', help='.pt weights to export, e.g. fire_s.pt fire_m.pt')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--format', dest='fmt', choices=['onnx', 'openvino'], default='onnx')
+    parser.add_argument('--static', action='store_true', help='Fixed batch of one instead of a dynamic batch')
+    parser.add_argument('--opset', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    for weights in args.weights:
+        export(weights, imgsz=args.imgsz, dynamic=not args.static, fmt=args.fmt, opset=args.opset)
+
+
+if __name__ == '__main__':
+    main()
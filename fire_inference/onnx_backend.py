@@ -0,0 +1,136 @@
+"""YOLOv8 ``.onnx`` models on ONNX Runtime's CPU provider.
+
+Pre- and post-processing mirror ultralytics (letterbox to the model's input
+size, class-aware NMS, boxes scaled back to the original image) so the same
+weights give the same boxes as the ultralytics backend, without torch.
+"""
+import ast
+
+import cv2
+import numpy as np
+
+from .base import Detections, InferenceBackend
+
+MAX_WH = 7680  # Offset per class so NMS never suppresses across classes
+MAX_DETECTIONS = 300
+
+
+def letterbox(image, size, color=(114, 114, 114)):
+    """Resize keeping the aspect ratio and pad to ``size`` (h, w).
+
+    Returns the padded image, the scale factor and the (left, top) padding.
+    """
+    height, width = image.shape[:2]
+    ratio = min(size[0] / height, size[1] / width)
+    new_w, new_h = int(round(width * ratio)), int(round(height * ratio))
+    pad_w, pad_h = (size[1] - new_w) / 2, (size[0] - new_h) / 2
+
+    if (new_w, new_h) != (width, height):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+    left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return image, ratio, (left, top)
+
+
+def nms(boxes, scores, iou_threshold):
+    """Greedy non-maximum suppression; returns the kept indices, best first"""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        w = (np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest])).clip(0)
+        h = (np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest])).clip(0)
+        inter = w * h
+        iou = inter / (areas[best] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def decode(output, conf_threshold, iou_threshold, max_det=MAX_DETECTIONS):
+    """Turn one image's raw YOLOv8 head output into boxes.
+
+    ``output`` is (4 + num_classes, num_anchors): centre x/y, width, height in
+    input pixels followed by per-class scores. Returns xyxy, conf, cls in
+    input-image coordinates.
+    """
+    output = output.T
+    scores = output[:, 4:]
+    cls = scores.argmax(axis=1)
+    conf = scores[np.arange(len(scores)), cls]
+    mask = conf > conf_threshold
+    output, conf, cls = output[mask], conf[mask], cls[mask]
+
+    cx, cy, w, h = output[:, 0], output[:, 1], output[:, 2], output[:, 3]
+    xyxy = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+    keep = nms(xyxy + (cls * MAX_WH)[:, None], conf, iou_threshold)[:max_det]
+    return xyxy[keep], conf[keep], cls[keep]
+
+
+def scale_boxes(xyxy, ratio, pad, shape):
+    """Map boxes from the letterboxed input back onto the original image"""
+    xyxy = xyxy.copy()
+    xyxy[:, [0, 2]] -= pad[0]
+    xyxy[:, [1, 3]] -= pad[1]
+    xyxy /= ratio
+    xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, shape[1])
+    xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, shape[0])
+    return xyxy
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """Runs an exported ``.onnx`` model with onnxruntime on the CPU"""
+
+    name = 'onnxruntime'
+
+    def __init__(self, weights, conf=0.25, iou=0.7, imgsz=640, threads=None):
+        super().__init__(weights, conf=conf, iou=iou, imgsz=imgsz)
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(weights, options, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # A static input shape wins over the imgsz argument; exports also record it
+        # (and the class names) in the model metadata
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        batch, _, height, width = model_input.shape
+        if isinstance(height, int) and isinstance(width, int):
+            self.input_size = (height, width)
+        elif 'imgsz' in metadata:
+            self.input_size = tuple(ast.literal_eval(metadata['imgsz']))
+        else:
+            self.input_size = (imgsz, imgsz) if isinstance(imgsz, int) else tuple(imgsz)
+        self.names = ast.literal_eval(metadata['names']) if 'names' in metadata else {}
+        self.fixed_batch = batch if isinstance(batch, int) else None
+
+    def preprocess(self, image):
+        padded, ratio, pad = letterbox(image, self.input_size)
+        blob = padded[:, :, ::-1].transpose(2, 0, 1)  # BGR HWC -> RGB CHW
+        return np.ascontiguousarray(blob, dtype=np.float32) / 255.0, ratio, pad
+
+    def predict(self, images):
+        prepared = [self.preprocess(image) for image in images]
+        blobs = np.stack([blob for blob, _, _ in prepared])
+
+        if self.fixed_batch == 1:
+            # Static single-image export: one run per image
+            outputs = np.concatenate([
+                self.session.run(None, {self.input_name: blob[None]})[0] for blob in blobs
+            ])
+        else:
+            outputs = self.session.run(None, {self.input_name: blobs})[0]
+
+        detections = []
+        for output, image, (_, ratio, pad) in zip(outputs, images, prepared):
+            xyxy, conf, cls = decode(output, self.conf, self.iou)
+            detections.append(Detections(scale_boxes(xyxy, ratio, pad, image.shape[:2]), conf, cls))
+        return detections
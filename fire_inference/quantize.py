@@ -0,0 +1,154 @@
+"""Post-training INT8 quantization of an exported fire model.
+
+    python -m fire_inference.quantize fire_m.onnx calibration/ --output fire_m.int8.onnx
+    python -m fire_inference.quantize fire_m.onnx clips/*.mp4 --max-images 300
+
+Static quantization with ONNX Runtime: a few hundred representative frames
+(directories of images, image files or video clips) are run through the FP32
+model to calibrate activation ranges, then weights and activations are stored
+as 8-bit integers (QDQ format). Calibration frames go through the same
+letterbox as inference, so use footage from the cameras the model will run on,
+with and without fire.
+
+The YOLOv8 head concatenates box coordinates (hundreds of pixels) with class
+scores (0-1) into one tensor; a shared INT8 scale would flatten the scores.
+The head's decoding nodes therefore stay in FP32 unless --quantize-head is
+given; its convolutions are still quantized.
+
+Check the result with ``python -m fire_inference.evaluate`` before deploying it.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from .clips import read_frames
+from .onnx_backend import letterbox
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def calibration_frames(sources, max_images=200, sample_fps=1.0):
+    """Yield BGR frames from image directories, image files and video clips"""
+    count = 0
+    for source in sources:
+        if os.path.isdir(source):
+            paths = [os.path.join(source, name) for name in sorted(os.listdir(source))
+                     if name.lower().endswith(IMAGE_EXTENSIONS)]
+        else:
+            paths = [source]
+
+        for path in paths:
+            if path.lower().endswith(IMAGE_EXTENSIONS):
+                frames = [cv2.imread(path)]
+            else:
+                frames = (frame for _, frame in read_frames(path, sample_fps))
+            for frame in frames:
+                if frame is None:
+                    continue
+                yield frame
+                count += 1
+                if count >= max_images:
+                    return
+
+
+def model_input(model_path, imgsz=640):
+    """Input name and (height, width) of an ONNX model"""
+    import onnxruntime
+    session = onnxruntime.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+    first = session.get_inputs()[0]
+    _, _, height, width = first.shape
+    if not (isinstance(height, int) and isinstance(width, int)):
+        height = width = imgsz
+    return first.name, (height, width)
+
+
+def head_nodes(model_path):
+    """Non-convolution nodes of the detection head, which stay in FP32"""
+    import onnx
+    graph = onnx.load(model_path).graph
+    output = graph.output[0].name
+    producer = next(node for node in graph.node if output in node.output)
+    # Ultralytics names head nodes after the Detect module, e.g. /model.22/Concat_5
+    prefix = producer.name.rsplit('/', 1)[0] + '/'
+    return [node.name for node in graph.node
+            if node.name.startswith(prefix) and node.op_type != 'Conv']
+
+
+def quantize(model_path, sources, output=None, max_images=200, sample_fps=1.0,
+             per_channel=True, method='minmax', quantize_head=False, imgsz=640):
+    """Write an INT8 copy of ``model_path`` calibrated on ``sources``; returns its path"""
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat,
+                                          QuantType, quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    output = output or model_path[:-len('.onnx')] + '.int8.onnx'
+    input_name, size = model_input(model_path, imgsz)
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self.frames = calibration_frames(sources, max_images, sample_fps)
+            self.count = 0
+
+        def get_next(self):
+            frame = next(self.frames, None)
+            if frame is None:
+                return None
+            self.count += 1
+            padded, _, _ = letterbox(frame, size)
+            blob = padded[:, :, ::-1].transpose(2, 0, 1)[None]
+            return {input_name: np.ascontiguousarray(blob, dtype=np.float32) / 255.0}
+
+    methods = {
+        'minmax': CalibrationMethod.MinMax,
+        'entropy': CalibrationMethod.Entropy,
+        'percentile': CalibrationMethod.Percentile,
+    }
+    reader = FrameReader()
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Shape inference and graph cleanup give the quantizer a tidier graph to work on
+        prepared = os.path.join(tmp, 'prepared.onnx')
+        quant_pre_process(model_path, prepared, skip_symbolic_shape=True)
+        quantize_static(
+            prepared, output, reader,
+            quant_format=QuantFormat.QDQ,
+            per_channel=per_channel,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=methods[method],
+            nodes_to_exclude=[] if quantize_head else head_nodes(prepared),
+        )
+    if not reader.count:
+        os.remove(output)
+        raise ValueError(f"No calibration frames found in {sources}")
+
+    print(f"Quantized {model_path} -> {output} on {reader.count} frames "
+          f"in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(model_path) / 1e6:.1f} MB -> {os.path.getsize(output) / 1e6:.1f} MB)")
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('model', help='FP32 .onnx model from fire_inference.export')
+    parser.add_argument('sources', nargs='+', help='Calibration image folders, images or video clips')
+    parser.add_argument('--output', default=None, help='Defaults to <model>.int8.onnx')
+    parser.add_argument('--max-images', type=int, default=200)
+    parser.add_argument('--sample-fps', type=float, default=1.0, help='Frames per second taken from clips')
+    parser.add_argument('--method', choices=['minmax', 'entropy', 'percentile'], default='minmax')
+    parser.add_argument('--per-tensor', action='store_true', help='One weight scale per tensor instead of per channel')
+    parser.add_argument('--quantize-head', action='store_true', help='Also quantize the head decoding nodes')
+    parser.add_argument('--imgsz', type=int, default=640, help='Input size for models exported with a dynamic shape')
+    args = parser.parse_args(argv)
+
+    quantize(args.model, args.sources, output=args.output, max_images=args.max_images,
+             sample_fps=args.sample_fps, per_channel=not args.per_tensor, method=args.method,
+             quantize_head=args.quantize_head, imgsz=args.imgsz)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from fire_inference import Detections, backend_for, load_backend
+from fire_inference.evaluate import choose_weights, report_path
+from fire_inference.onnx_backend import decode, letterbox, nms, scale_boxes
+
+WEIGHTS_DIR = os.environ.get('FIRE_WEIGHTS_DIR', os.path.join(os.path.dirname(__file__), '..'))
+FRAMES_DIR = os.environ.get('FIRE_PARITY_FRAMES')
+
+
+def raw_output(boxes, num_classes=1, anchors=20):
+    """Fake YOLOv8 head output: rows of (cx, cy, w, h, class, score), rest empty"""
+    output = np.zeros((4 + num_classes, anchors), dtype=np.float32)
+    for i, (cx, cy, w, h, cls, score) in enumerate(boxes):
+        output[:4, i] = (cx, cy, w, h)
+        output[4 + cls, i] = score
+    return output
+
+
+class PostprocessTests(unittest.TestCase):
+    def test_nms_keeps_best_of_overlapping_boxes(self):
+        boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60]], dtype=np.float32)
+        scores = np.array([0.6, 0.9, 0.5], dtype=np.float32)
+        self.assertEqual(nms(boxes, scores, 0.5).tolist(), [1, 2])
+
+    def test_decode_filters_and_suppresses_per_class(self):
+        output = raw_output([
+            (100, 100, 40, 40, 0, 0.9),
+            (102, 101, 40, 40, 0, 0.8),   # Duplicate of the first box
+            (102, 101, 40, 40, 1, 0.7),   # Same place, other class: kept
+            (300, 300, 20, 20, 0, 0.1),   # Below the confidence threshold
+        ], num_classes=2)
+
+        xyxy, conf, cls = decode(output, conf_threshold=0.25, iou_threshold=0.7)
+
+        np.testing.assert_allclose(conf, [0.9, 0.7])
+        self.assertEqual(cls.tolist(), [0, 1])
+        np.testing.assert_allclose(xyxy[0], [80, 80, 120, 120])
+
+    def test_boxes_map_back_through_letterbox(self):
+        image = np.zeros((480, 640, 3), dtype=np.uint8)
+        padded, ratio, pad = letterbox(image, (640, 640))
+        self.assertEqual(padded.shape, (640, 640, 3))
+        self.assertEqual(pad, (0, 80))
+
+        box = np.array([[100, 100 * ratio + 80, 200, 200 * ratio + 80]], dtype=np.float32)
+        np.testing.assert_allclose(scale_boxes(box, ratio, pad, image.shape[:2]),
+                                   [[100, 100, 200, 200]], atol=1e-4)
+
+    def test_detections_sorted_by_confidence(self):
+        detections = Detections([[0, 0, 1, 1], [2, 2, 3, 3]], [0.3, 0.8], [0, 0])
+        self.assertAlmostEqual(detections.max_confidence, 0.8, places=5)
+        self.assertEqual(detections.xyxy[0].tolist(), [2, 2, 3, 3])
+        self.assertEqual(Detections().max_confidence, 0.0)
+
+    def test_backend_chosen_by_extension(self):
+        self.assertEqual(backend_for('fire_m.onnx'), 'onnxruntime')
+        self.assertEqual(backend_for('fire_m.pt'), 'ultralytics')
+        with self.assertRaises(ValueError):
+            load_backend('fire_m.pt', backend='tensorrt')
+
+
+def box_iou(a, b):
+    w = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    h = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = w * h
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+@unittest.skipUnless(importlib.util.find_spec('ultralytics') and importlib.util.find_spec('onnxruntime'),
+                     'needs ultralytics and onnxruntime')
+class BackendParityTests(unittest.TestCase):
+    """Same frames through fire_s.pt and its ONNX export: boxes must agree.
+
+    Exports fire_s.onnx if it is missing. Point FIRE_PARITY_FRAMES at a folder
+    of fire images to use real frames instead of the ultralytics sample images.
+    """
+
+    def setUp(self):
+        self.weights = os.path.join(WEIGHTS_DIR, 'fire_s.pt')
+        if not os.path.exists(self.weights):
+            self.skipTest(f"{self.weights} not found")
+        onnx_weights = self.weights[:-3] + '.onnx'
+        if not os.path.exists(onnx_weights):
+            from fire_inference.export import export
+            export(self.weights)
+
+        if FRAMES_DIR:
+            paths = [os.path.join(FRAMES_DIR, name) for name in sorted(os.listdir(FRAMES_DIR))]
+        else:
+            try:
+                from ultralytics.utils import ASSETS
+            except ImportError:  # ultralytics 8.0.x layout
+                from ultralytics.yolo.utils import ROOT
+                ASSETS = ROOT / 'assets'
+            paths = [str(path) for path in sorted(ASSETS.glob('*.jpg'))]
+        self.frames = [cv2.imread(path) for path in paths[:8]]
+        self.reference = load_backend(self.weights, backend='ultralytics')
+        self.candidate = load_backend(onnx_weights, backend='onnxruntime')
+
+    def test_boxes_match_within_tolerance(self):
+        for expected, actual in zip(self.reference.predict(self.frames),
+                                    self.candidate.predict(self.frames)):
+            # Boxes right at the threshold may flip; compare the confident ones
+            confident = expected.conf > self.reference.conf + 0.05
+            self.assertGreaterEqual(len(actual), confident.sum())
+            for box, conf in zip(expected.xyxy[confident], expected.conf[confident]):
+                ious = [box_iou(box, other) for other in actual.xyxy]
+                best = int(np.argmax(ious))
+                self.assertGreater(ious[best], 0.95)
+                self.assertAlmostEqual(float(actual.conf[best]), float(conf), delta=0.02)
+
+
+class AccuracyFloorTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.candidate = os.path.join(tmp.name, 'fire_m.int8.onnx')
+        open(self.candidate, 'wb').close()
+
+    def write_report(self, **scores):
+        with open(report_path(self.candidate), 'w') as f:
+            json.dump(scores, f)
+
+    def test_candidate_needs_a_passing_report(self):
+        floor = {'recall': 0.9, 'precision': 0.8, 'recall_drop': 0.02}
+        self.assertEqual(choose_weights('fire_m.onnx', self.candidate, floor), 'fire_m.onnx')
+
+        self.write_report(recall=0.93, precision=0.85, recall_drop=0.01)
+        self.assertEqual(choose_weights('fire_m.onnx', self.candidate, floor), self.candidate)
+
+        self.write_report(recall=0.93, precision=0.85, recall_drop=0.05)
+        self.assertEqual(choose_weights('fire_m.onnx', self.candidate, floor), 'fire_m.onnx')
+
+    def test_no_candidate_keeps_weights(self):
+        self.assertEqual(choose_weights('fire_m.onnx', None, {}), 'fire_m.onnx')
+        self.assertEqual(choose_weights('fire_m.onnx', 'missing.int8.onnx', {}), 'fire_m.onnx')
+
+
+@unittest.skipUnless(importlib.util.find_spec('onnx') and importlib.util.find_spec('onnxruntime'),
+                     'needs onnx and onnxruntime')
+class QuantizationTests(unittest.TestCase):
+    """Quantize a tiny detector-shaped graph: one conv feeding a YOLO-style head"""
+
+    def build_model(self, path):
+        import onnx
+        from onnx import TensorProto, helper, numpy_helper
+
+        rng = np.random.default_rng(0)
+        weight = numpy_helper.from_array(rng.normal(0, 0.5, (5, 3, 3, 3)).astype(np.float32), 'weight')
+        shape = numpy_helper.from_array(np.array([0, 5, -1], dtype=np.int64), 'shape')
+        graph = helper.make_graph(
+            [
+                helper.make_node('Conv', ['images', 'weight'], ['features'], name='/model.0/Conv',
+                                 pads=[1, 1, 1, 1], strides=[8, 8]),
+                helper.make_node('Reshape', ['features', 'shape'], ['flat'], name='/model.1/Reshape'),
+                helper.make_node('Sigmoid', ['flat'], ['output0'], name='/model.1/Sigmoid'),
+            ],
+            'tiny', [helper.make_tensor_value_info('images', TensorProto.FLOAT, ['batch', 3, 64, 64])],
+            [helper.make_tensor_value_info('output0', TensorProto.FLOAT, ['batch', 5, 64])],
+            [weight, shape],
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+        model.ir_version = 8
+        onnx.save(model, path)
+
+    def test_int8_model_tracks_fp32(self):
+        from fire_inference.quantize import head_nodes, quantize
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        fp32 = os.path.join(tmp.name, 'tiny.onnx')
+        self.build_model(fp32)
+        rng = np.random.default_rng(1)
+        for i in range(8):
+            cv2.imwrite(os.path.join(tmp.name, f"calib_{i}.png"),
+                        rng.integers(0, 255, (48, 64, 3), dtype=np.uint8))
+
+        self.assertEqual(head_nodes(fp32), ['/model.1/Reshape', '/model.1/Sigmoid'])
+        int8 = quantize(fp32, [tmp.name], imgsz=64)
+
+        reference = load_backend(fp32, imgsz=64).session
+        candidate = load_backend(int8, imgsz=64).session
+        blob = rng.random((2, 3, 64, 64), dtype=np.float32)
+        expected = reference.run(None, {'images': blob})[0]
+        actual = candidate.run(None, {'images': blob})[0]
+        self.assertLess(np.abs(expected - actual).max(), 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
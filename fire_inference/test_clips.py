@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from fire_inference.clips import is_fire, read_frames
+
+
+class ClipTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'clip.avi')
+        writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*'MJPG'), 10.0, (32, 24))
+        for _ in range(25):
+            frame = np.zeros((24, 32, 3), dtype=np.uint8)
+            frame[:, :, 2] = 255  # Red in BGR
+            writer.write(frame)
+        writer.release()
+        if not cv2.VideoCapture(self.path).isOpened():
+            self.skipTest('OpenCV cannot write MJPG clips here')
+
+    def test_samples_at_the_requested_rate(self):
+        frames = list(read_frames(self.path, sample_fps=2.0))
+        self.assertEqual([timestamp for timestamp, _ in frames], [0.0, 0.5, 1.0, 1.5, 2.0])
+        self.assertGreater(frames[0][1][0, 0, 2], 200)
+
+    def test_rgb_frames_for_the_pi_detector(self):
+        _, frame = next(read_frames(self.path, sample_fps=1.0, rgb=True))
+        self.assertGreater(frame[0, 0, 0], 200)
+
+    def test_is_fire_checks_labelled_intervals(self):
+        self.assertTrue(is_fire(12.0, [[5.0, 8.0], [12.0, 20.0]]))
+        self.assertFalse(is_fire(9.0, [[5.0, 8.0], [12.0, 20.0]]))
+        self.assertFalse(is_fire(1.0, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
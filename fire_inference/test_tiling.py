@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+
+from fire_inference import Detections, InferenceBackend
+from fire_inference.tiling import CostModel, SaliencyProposer, TiledDetector, merge_boxes, tile_grid
+
+
+class SpotBackend(InferenceBackend):
+    """Finds bright white squares, so tiling can be tested without a model"""
+
+    def __init__(self):
+        super().__init__('spots')
+        self.batches = []
+
+    def predict(self, images):
+        self.batches.append(len(images))
+        results = []
+        for image in images:
+            ys, xs = np.nonzero(image[:, :, 0] == 255)
+            if len(xs):
+                results.append(Detections([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]], [0.9]))
+            else:
+                results.append(Detections())
+        return results
+
+
+class TilingTests(unittest.TestCase):
+    def test_grid_covers_frame_with_overlap(self):
+        corners = tile_grid(2000, 1500, 640, overlap=0.2)
+        xs = sorted({x for x, _ in corners})
+        ys = sorted({y for _, y in corners})
+        self.assertEqual((xs[0], xs[-1] + 640), (0, 2000))
+        self.assertEqual((ys[0], ys[-1] + 640), (0, 1500))
+        self.assertTrue(all(b - a <= 640 * 0.8 + 1 for a, b in zip(xs, xs[1:])))
+        self.assertEqual(tile_grid(600, 400, 640), [(0, 0)])
+
+    def test_fragment_inside_full_box_is_merged(self):
+        xyxy = np.array([[100, 100, 200, 200], [150, 120, 200, 180], [400, 400, 420, 420]], dtype=np.float32)
+        conf = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+        keep = merge_boxes(xyxy, conf, np.zeros(3, dtype=np.int64))
+        self.assertEqual(keep.tolist(), [0, 2])
+
+    def test_tiles_run_in_one_batch_and_map_back_to_frame(self):
+        frame = np.zeros((1500, 2000, 3), dtype=np.uint8)
+        frame[1000:1006, 1500:1506] = 255  # A 6-pixel spot far from the origin
+        backend = SpotBackend()
+        detector = TiledDetector(backend, tile=640, overlap=0.2)
+
+        detections = detector(frame)
+
+        self.assertEqual(backend.batches, [detector.last_windows])
+        self.assertEqual(detector.last_windows, len(tile_grid(2000, 1500, 640)) + 1)
+        self.assertEqual(len(detections), 1)
+        np.testing.assert_allclose(detections.xyxy[0], [1500, 1000, 1506, 1006])
+
+    def test_roi_mode_only_looks_at_salient_windows(self):
+        frame = np.full((1500, 2000, 3), 60, dtype=np.uint8)
+        frame[300:340, 400:440] = (0, 80, 255)  # Flame-coloured patch (BGR)
+        proposer = SaliencyProposer()
+
+        corners = proposer.propose(frame, tile=640)
+
+        self.assertEqual(len(corners), 1)
+        x, y = corners[0]
+        self.assertTrue(x <= 400 and 440 <= x + 640 and y <= 300 and 340 <= y + 640)
+
+    def test_cost_model_trades_latency_for_object_size(self):
+        cost = CostModel(overhead_ms=20, per_image_ms=100)
+        full = cost.plan(2000, 1500, 'full')
+        tiled = cost.plan(2000, 1500, 'tiles', tile=640)
+        self.assertEqual(full['latency_ms'], 120)
+        self.assertGreater(tiled['latency_ms'], full['latency_ms'])
+        self.assertLess(tiled['min_object_px'], full['min_object_px'])
+
+
+if __name__ == '__main__':
+    unittest.main()
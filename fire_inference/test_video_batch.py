@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from fire_inference import Detections, InferenceBackend
+from fire_inference.video_batch import JsonlSink, VideoBatchProcessor, find_videos
+
+
+class BrightFrameBackend(InferenceBackend):
+    """Reports a fire on frames whose top-left pixel is bright"""
+
+    def __init__(self):
+        super().__init__('bright')
+        self.batches = []
+
+    def predict(self, images):
+        self.batches.append(len(images))
+        return [Detections([[10, 10, 20, 20]], [0.8]) if image[0, 0, 2] > 128 else Detections()
+                for image in images]
+
+
+class CrashingBackend(InferenceBackend):
+    """Fails on its second batch"""
+
+    def __init__(self):
+        super().__init__('crashing')
+        self.batches = 0
+
+    def predict(self, images):
+        self.batches += 1
+        if self.batches == 2:
+            raise RuntimeError('model crashed')
+        return [Detections() for _ in images]
+
+
+def write_clip(path, frames=20, bright=(6, 7)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10.0, (64, 48))
+    for i in range(frames):
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        if i in bright:
+            frame[:] = 255
+        writer.write(frame)
+    writer.release()
+
+
+class VideoBatchTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        os.makedirs(os.path.join(self.tmp.name, 'archive', 'cam2'))
+        self.videos = [os.path.join(self.tmp.name, 'archive', 'cam1.avi'),
+                       os.path.join(self.tmp.name, 'archive', 'cam2', 'day1.avi')]
+        for path in self.videos:
+            write_clip(path)
+        if not cv2.VideoCapture(self.videos[0]).isOpened():
+            self.skipTest('OpenCV build cannot write MJPG video')
+
+    def run_processor(self, **options):
+        output = os.path.join(self.tmp.name, 'out.jsonl')
+        backend = BrightFrameBackend()
+        processor = VideoBatchProcessor(backend, JsonlSink(output), **options)
+        stats = processor.run(find_videos([os.path.join(self.tmp.name, 'archive')]))
+        with open(output) as f:
+            rows = [json.loads(line) for line in f]
+        return stats, rows, backend
+
+    def test_directories_are_expanded(self):
+        self.assertEqual(find_videos([os.path.join(self.tmp.name, 'archive')]), sorted(self.videos))
+
+    def test_strided_frames_are_batched_and_written(self):
+        stats, rows, backend = self.run_processor(stride=3, batch_size=4, decoders=2)
+
+        self.assertEqual(stats['frames_read'], 40)
+        self.assertEqual(stats['frames_inferred'], 14)  # Frames 0, 3, ..., 18 of each clip
+        self.assertTrue(all(size <= 4 for size in backend.batches))
+        self.assertEqual(sorted({row['frame'] for row in rows}), list(range(0, 20, 3)))
+        hits = [row for row in rows if row['detections']]
+        self.assertEqual(sorted((row['video'], row['frame']) for row in hits),
+                         sorted((path, 6) for path in self.videos))
+        self.assertAlmostEqual(hits[0]['timestamp'], 0.6)
+        self.assertEqual(hits[0]['detections'][0]['box'], [10.0, 10.0, 20.0, 20.0])
+
+    def test_only_detections(self):
+        stats, rows, _ = self.run_processor(stride=1, only_detections=True)
+        self.assertEqual(stats['frames_with_fire'], 4)
+        self.assertEqual(len(rows), 4)
+
+    def test_model_error_stops_the_run_and_is_raised(self):
+        output = os.path.join(self.tmp.name, 'out.jsonl')
+        processor = VideoBatchProcessor(CrashingBackend(), JsonlSink(output),
+                                        batch_size=2, decoders=2, queue_size=2)
+
+        with self.assertRaisesRegex(RuntimeError, 'model crashed'):
+            processor.run(find_videos([os.path.join(self.tmp.name, 'archive')]))
+
+        # The decoders gave up instead of blocking on the full frame queue
+        self.assertLess(processor.stats['frames_read'], 40)
+        self.assertTrue(processor.frames.empty())
+        with open(output) as f:
+            self.assertEqual(len(f.readlines()), 2)  # The first batch
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,223 @@
+"""Tiled and region-of-interest inference for small, distant fires.
+
+Letterboxing a 2000-pixel-wide frame into a 640 input shrinks everything by
+three: a 15-pixel smoke column ends up 5 pixels wide, under the ~8-pixel
+stride of YOLOv8's finest detection layer. ``TiledDetector`` instead cuts the
+full-resolution frame into overlapping tiles at (close to) the model's input
+size, or only into windows around regions a cheap saliency pass flags, runs
+all of them in one batched ``predict`` call together with a downscaled copy of
+the whole frame (for fires larger than a tile), shifts the boxes back into
+frame coordinates and merges duplicates from overlapping tiles.
+
+``CostModel`` predicts the price: a batched call costs roughly a fixed
+overhead plus a per-image cost, so latency grows linearly with the number of
+windows while the smallest detectable object shrinks with the tile size.
+"""
+import math
+import time
+
+import cv2
+import numpy as np
+
+from .base import Detections
+from .onnx_backend import MAX_WH
+
+MIN_OBJECT_STRIDES = 1.0  # Objects need about one stride-8 cell in the model input to register
+
+
+def tile_grid(width, height, tile, overlap=0.2):
+    """Top-left corners of overlapping ``tile``-sized windows covering a frame"""
+    def starts(length):
+        if length <= tile:
+            return [0]
+        step = tile * (1 - overlap)
+        count = math.ceil((length - tile) / step) + 1
+        # Spread the windows evenly so the last one ends exactly on the border
+        return [int(round(i * (length - tile) / (count - 1))) for i in range(count)]
+
+    return [(x, y) for y in starts(height) for x in starts(width)]
+
+
+def merge_boxes(xyxy, conf, cls, iou_threshold=0.5, ios_threshold=0.8):
+    """Suppress duplicates from overlapping windows; returns kept indices, best first.
+
+    Besides the usual IoU test, a box is dropped when most of it lies inside a
+    better box of the same class (intersection over the smaller box): a fire cut
+    by a tile border shows up as a fragment inside the full box from the
+    neighbouring tile.
+    """
+    boxes = xyxy + (cls * MAX_WH)[:, None]
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = conf.argsort()[::-1]
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        w = (np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest])).clip(0)
+        h = (np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest])).clip(0)
+        inter = w * h
+        iou = inter / (areas[best] + areas[rest] - inter + 1e-9)
+        ios = inter / (np.minimum(areas[best], areas[rest]) + 1e-9)
+        order = rest[(iou <= iou_threshold) & (ios <= ios_threshold)]
+    return np.array(keep, dtype=np.int64)
+
+
+class SaliencyProposer:
+    """Cheap pass that flags where in a large frame a fire could be.
+
+    Looks at a small copy of the frame for flame colours, grey smoke lighter
+    than its surroundings, and motion since the previous frame, then returns
+    ``tile``-sized windows centred on the strongest blobs.
+    """
+
+    def __init__(self, scale=0.125, color_order='bgr', motion_threshold=20, min_blob_pixels=2):
+        self.scale = scale
+        self.hsv_code = cv2.COLOR_RGB2HSV if color_order == 'rgb' else cv2.COLOR_BGR2HSV
+        self.motion_threshold = motion_threshold
+        self.min_blob_pixels = min_blob_pixels
+        self.previous = None
+
+    def saliency(self, frame):
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, self.hsv_code)
+        hue, saturation, value = hsv[:, :, 0], hsv[:, :, 1], hsv[:, :, 2]
+
+        # Same flame colours as the Pi's scene prefilter
+        fire = ((hue <= 35) | (hue >= 170)) & (saturation >= 100) & (value >= 180)
+        # Smoke: washed-out grey, brighter than the local background
+        background = cv2.blur(value, (15, 15))
+        smoke = (saturation < 60) & (value.astype(np.int16) - background > 12)
+
+        mask = fire | smoke
+        if self.previous is not None and self.previous.shape == value.shape:
+            mask |= cv2.absdiff(value, self.previous) > self.motion_threshold
+        self.previous = value
+        return mask.astype(np.uint8)
+
+    def propose(self, frame, tile, max_rois=4):
+        """Up to ``max_rois`` (x, y) corners of tile windows around salient blobs, strongest first"""
+        height, width = frame.shape[:2]
+        mask = self.saliency(frame)
+        count, _, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+
+        blobs = sorted(range(1, count), key=lambda i: stats[i, cv2.CC_STAT_AREA], reverse=True)
+        corners = []
+        for i in blobs:
+            if stats[i, cv2.CC_STAT_AREA] < self.min_blob_pixels:
+                break
+            cx, cy = centroids[i] / self.scale
+            x = int(min(max(cx - tile / 2, 0), max(width - tile, 0)))
+            y = int(min(max(cy - tile / 2, 0), max(height - tile, 0)))
+            # Blobs already inside a chosen window share it
+            if any(abs(x - ox) < tile / 2 and abs(y - oy) < tile / 2 for ox, oy in corners):
+                continue
+            corners.append((x, y))
+            if len(corners) == max_rois:
+                break
+        return corners
+
+
+class TiledDetector:
+    """Runs a backend on tiles (or salient ROIs) of a high-resolution frame.
+
+    ``mode`` is 'tiles' for a full overlapping grid or 'roi' for windows
+    proposed by ``SaliencyProposer``. Behaves like a backend: calling it with a
+    frame returns one ``Detections`` in full-frame coordinates.
+    """
+
+    def __init__(self, backend, mode='tiles', tile=640, overlap=0.2, full_frame=True,
+                 max_rois=4, color_order='bgr', iou=0.5, ios=0.8):
+        if mode not in ('tiles', 'roi'):
+            raise ValueError(f"Unknown tiling mode {mode!r}; expected 'tiles' or 'roi'")
+        self.backend = backend
+        self.mode = mode
+        self.tile = tile
+        self.overlap = overlap
+        self.full_frame = full_frame
+        self.max_rois = max_rois
+        self.iou = iou
+        self.ios = ios
+        self.proposer = SaliencyProposer(color_order=color_order) if mode == 'roi' else None
+        self.last_windows = 0
+
+    def windows(self, frame):
+        height, width = frame.shape[:2]
+        if self.mode == 'roi':
+            return self.proposer.propose(frame, self.tile, self.max_rois)
+        return tile_grid(width, height, self.tile, self.overlap)
+
+    def __call__(self, frame):
+        height, width = frame.shape[:2]
+        corners = self.windows(frame)
+        crops = [frame[y:y + self.tile, x:x + self.tile] for x, y in corners]
+        offsets = list(corners)
+        if self.full_frame or not crops:
+            crops.append(frame)
+            offsets.append((0, 0))
+        self.last_windows = len(crops)
+
+        # One batched forward pass for every window
+        results = self.backend.predict(crops)
+
+        xyxy = [d.xyxy + np.array([x, y, x, y], dtype=np.float32) for d, (x, y) in zip(results, offsets)]
+        xyxy = np.concatenate(xyxy)
+        conf = np.concatenate([d.conf for d in results])
+        cls = np.concatenate([d.cls for d in results])
+        keep = merge_boxes(xyxy, conf, cls, self.iou, self.ios)
+
+        xyxy = xyxy[keep]
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, width)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, height)
+        return Detections(xyxy, conf[keep], cls[keep])
+
+    def predict(self, frames):
+        return [self(frame) for frame in frames]
+
+
+class CostModel:
+    """Latency of a batched call as ``overhead_ms + per_image_ms * images``"""
+
+    def __init__(self, overhead_ms, per_image_ms, input_size=640):
+        self.overhead_ms = overhead_ms
+        self.per_image_ms = per_image_ms
+        self.input_size = input_size
+
+    @classmethod
+    def fit(cls, backend, input_size=640, batch_sizes=(1, 2, 4, 8), repeats=3):
+        """Time the backend on random images and fit overhead and per-image cost"""
+        rng = np.random.default_rng(0)
+        image = rng.integers(0, 255, (input_size, input_size, 3), dtype=np.uint8)
+        backend.predict([image])  # Warm up
+        sizes, times = [], []
+        for size in batch_sizes:
+            for _ in range(repeats):
+                start = time.perf_counter()
+                backend.predict([image] * size)
+                sizes.append(size)
+                times.append((time.perf_counter() - start) * 1000)
+        per_image, overhead = np.polyfit(sizes, times, 1)
+        return cls(max(overhead, 0.0), per_image, input_size)
+
+    def latency_ms(self, images):
+        return self.overhead_ms + self.per_image_ms * images
+
+    def windows(self, width, height, mode='tiles', tile=640, overlap=0.2, full_frame=True, max_rois=4):
+        # ROI mode runs at most max_rois windows; quiet frames need fewer
+        count = len(tile_grid(width, height, tile, overlap)) if mode == 'tiles' else max_rois
+        return count + (1 if full_frame else 0)
+
+    def min_object_px(self, window):
+        """Smallest object (in frame pixels) a window of this size can resolve"""
+        return 8 * MIN_OBJECT_STRIDES * window / self.input_size
+
+    def plan(self, width, height, mode='tiles', tile=640, overlap=0.2, full_frame=True, max_rois=4):
+        """Predicted latency and smallest detectable object for one configuration"""
+        if mode == 'full':
+            images, smallest = 1, self.min_object_px(max(width, height))
+        else:
+            images = self.windows(width, height, mode, tile, overlap, full_frame, max_rois)
+            smallest = self.min_object_px(tile)
+        return {'mode': mode, 'tile': tile, 'images': images,
+                'latency_ms': self.latency_ms(images), 'min_object_px': smallest}
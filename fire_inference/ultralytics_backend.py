@@ -0,0 +1,22 @@
+from .base import Detections, InferenceBackend
+
+
+class UltralyticsBackend(InferenceBackend):
+    """Runs ``.pt`` weights (or an exported model directory) through ultralytics.YOLO"""
+
+    name = 'ultralytics'
+
+    def __init__(self, weights, conf=0.25, iou=0.7, imgsz=640, device='cpu'):
+        super().__init__(weights, conf=conf, iou=iou, imgsz=imgsz)
+        from ultralytics import YOLO
+        self.device = device
+        self.model = YOLO(weights)
+
+    def predict(self, images):
+        results = self.model(list(images), conf=self.conf, iou=self.iou, imgsz=self.imgsz,
+                             device=self.device, verbose=False)
+        return [
+            Detections(result.boxes.xyxy.cpu().numpy(), result.boxes.conf.cpu().numpy(),
+                       result.boxes.cls.cpu().numpy())
+            for result in results
+        ]
@@ -0,0 +1,282 @@
+"""Headless batch processing of recorded camera footage.
+
+    python -m fire_inference.video_batch archive/ --model fire_m.onnx --output results.jsonl
+    python -m fire_inference.video_batch a.mp4 b.mp4 --stride 15 --batch-size 8 --output hits.parquet
+
+The headless counterpart of wildfire_yoloV8s.py, for back-testing the
+detector on historical footage. Videos (files, or every video under a
+directory) are decoded in background threads, every ``--stride``-th frame is
+batched into one ``predict`` call, and per-frame results are streamed to a
+JSONL file (or Parquet, with pyarrow installed) while decoding of the next
+frames carries on. Skipped frames are only grabbed, never decoded into
+images. At the end it reports throughput and frames per CPU-second, i.e. what
+one fully used core sustains, to size a back-testing run.
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.m4v', '.h264')
+_DONE = object()
+
+
+def find_videos(paths):
+    """Expand files and directories into a sorted list of video files"""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                videos += [os.path.join(root, name) for name in names
+                           if name.lower().endswith(VIDEO_EXTENSIONS)]
+        else:
+            videos.append(path)
+    return sorted(videos)
+
+
+class JsonlSink:
+    """One JSON object per line"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    """Parquet file written in row groups; boxes are stored as a JSON string column"""
+
+    def __init__(self, path, row_group_size=10000):
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.schema = pyarrow.schema([
+            ('video', pyarrow.string()), ('frame', pyarrow.int64()), ('timestamp', pyarrow.float64()),
+            ('max_confidence', pyarrow.float64()), ('detections', pyarrow.string()),
+        ])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        self.row_group_size = row_group_size
+        self.pending = []
+
+    def write(self, rows):
+        self.pending += rows
+        if len(self.pending) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        columns = {name: [row[name] for row in self.pending] for name in self.schema.names}
+        columns['detections'] = [json.dumps(value) for value in columns['detections']]
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def open_sink(path):
+    return ParquetSink(path) if path.endswith('.parquet') else JsonlSink(path)
+
+
+class VideoBatchProcessor:
+    """decode threads -> batched inference -> sink thread, connected by bounded queues"""
+
+    def __init__(self, backend, sink, stride=1, batch_size=8, decoders=1,
+                 min_confidence=0.0, only_detections=False, queue_size=64):
+        self.backend = backend
+        self.sink = sink
+        self.stride = max(1, stride)
+        self.batch_size = batch_size
+        self.decoders = decoders
+        self.min_confidence = min_confidence
+        self.only_detections = only_detections
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.results = queue.Queue(maxsize=queue_size)
+        self.stats = {'videos': 0, 'frames_read': 0, 'frames_inferred': 0,
+                      'frames_with_fire': 0, 'batches': 0, 'failed_videos': []}
+        self.error = None  # Raised by the model; run() re-raises it
+        self.stopping = threading.Event()
+        self._finished_decoders = 0
+        self._lock = threading.Lock()
+
+    def decode(self, videos):
+        for path in videos:
+            if self.stopping.is_set():
+                break
+            capture = cv2.VideoCapture(path)
+            if not capture.isOpened():
+                print(f"Cannot open {path}")
+                with self._lock:
+                    self.stats['failed_videos'].append(path)
+                continue
+            fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+            index = read = 0
+            while not self.stopping.is_set():
+                # grab() skips a frame without decoding it into an image
+                if index % self.stride:
+                    if not capture.grab():
+                        break
+                else:
+                    ret, frame = capture.read()
+                    if not ret:
+                        break
+                    self.frames.put((path, index, index / fps, frame))
+                read += 1
+                index += 1
+            capture.release()
+            with self._lock:
+                self.stats['videos'] += 1
+                self.stats['frames_read'] += read
+
+    def infer(self):
+        try:
+            self._infer()
+        except Exception as e:
+            # Stop the decoders and unblock any waiting on the full frame queue
+            self.error = e
+            self.stopping.set()
+            while self._finished_decoders < self.decoders:
+                if self.frames.get() is _DONE:
+                    self._finished_decoders += 1
+        finally:
+            # Always release the sink thread, even if the model raised
+            self.results.put(_DONE)
+
+    def _infer(self):
+        while self._finished_decoders < self.decoders:
+            batch = []
+            item = self.frames.get()
+            while True:
+                if item is _DONE:
+                    self._finished_decoders += 1
+                    if self._finished_decoders == self.decoders:
+                        break
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.frames.get_nowait()
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
+
+            detections = self.backend.predict([frame for _, _, _, frame in batch])
+            self.stats['batches'] += 1
+            self.stats['frames_inferred'] += len(batch)
+            self.results.put([self.row(path, index, timestamp, found)
+                              for (path, index, timestamp, _), found in zip(batch, detections)])
+
+    def row(self, path, index, timestamp, detections):
+        kept = [(box, conf, cls) for box, conf, cls in detections if conf >= self.min_confidence]
+        return {
+            'video': path,
+            'frame': index,
+            'timestamp': round(timestamp, 3),
+            'max_confidence': round(max((conf for _, conf, _ in kept), default=0.0), 4),
+            'detections': [{'box': [round(float(v), 1) for v in box], 'confidence': round(conf, 4),
+                            'class': cls} for box, conf, cls in kept],
+        }
+
+    def write(self):
+        while True:
+            rows = self.results.get()
+            if rows is _DONE:
+                break
+            hits = [row for row in rows if row['detections']]
+            self.stats['frames_with_fire'] += len(hits)
+            self.sink.write(hits if self.only_detections else rows)
+
+    def run(self, videos, progress_interval=None):
+        """Process every video; returns the stats with wall and CPU time.
+
+        An exception raised by the model stops the run and is re-raised here,
+        after the rows of the batches before it are written.
+        """
+        start, cpu_start = time.perf_counter(), time.process_time()
+
+        shares = [videos[i::self.decoders] for i in range(self.decoders)]
+
+        def decoder(share):
+            try:
+                self.decode(share)
+            finally:
+                self.frames.put(_DONE)
+
+        threads = [threading.Thread(target=decoder, args=(share,), daemon=True) for share in shares]
+        threads += [threading.Thread(target=self.infer, daemon=True),
+                    threading.Thread(target=self.write, daemon=True)]
+        for thread in threads:
+            thread.start()
+
+        writer = threads[-1]
+        while writer.is_alive():
+            writer.join(progress_interval)
+            if progress_interval and writer.is_alive():
+                elapsed = time.perf_counter() - start
+                print(f"{self.stats['frames_inferred']} frames inferred "
+                      f"({self.stats['frames_inferred'] / elapsed:.1f} fps), "
+                      f"{self.stats['videos']}/{len(videos)} videos decoded")
+        self.sink.close()
+        if self.error is not None:
+            raise self.error
+
+        self.stats['wall_seconds'] = time.perf_counter() - start
+        self.stats['cpu_seconds'] = time.process_time() - cpu_start
+        return self.stats
+
+
+def report(stats):
+    wall, cpu = stats['wall_seconds'], stats['cpu_seconds']
+    inferred = stats['frames_inferred']
+    print(f"{stats['videos']} videos, {stats['frames_read']} frames read, {inferred} inferred "
+          f"in {stats['batches']} batches, {stats['frames_with_fire']} with fire")
+    print(f"{wall:.1f}s wall, {cpu:.1f}s CPU: {inferred / wall if wall else 0:.1f} frames/s, "
+          f"{inferred / cpu if cpu else 0:.2f} frames per CPU-second (per core), "
+          f"{cpu / wall if wall else 0:.1f} cores busy on average")
+    if stats['failed_videos']:
+        print(f"Could not open: {', '.join(stats['failed_videos'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help='Video files or directories of videos')
+    parser.add_argument('--model', default='fire_m.pt', help='.pt weights or an exported .onnx model')
+    parser.add_argument('--backend', default='auto', choices=['auto', 'ultralytics', 'onnxruntime'])
+    parser.add_argument('--output', default='detections.jsonl', help='.jsonl or .parquet')
+    parser.add_argument('--stride', type=int, default=1, help='Run the model on every Nth frame')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--decoders', type=int, default=1, help='Decode threads (videos are split between them)')
+    parser.add_argument('--conf', type=float, default=0.2)
+    parser.add_argument('--iou', type=float, default=0.1)
+    parser.add_argument('--only-detections', action='store_true', help='Only write frames with boxes')
+    parser.add_argument('--progress', type=float, default=30.0, help='Seconds between progress lines')
+    args = parser.parse_args(argv)
+
+    from fire_inference import load_backend
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        parser.error('No videos found')
+    backend = load_backend(args.model, args.backend, conf=args.conf, iou=args.iou)
+    processor = VideoBatchProcessor(backend, open_sink(args.output), stride=args.stride,
+                                    batch_size=args.batch_size, decoders=min(args.decoders, len(videos)),
+                                    only_detections=args.only_detections)
+    report(processor.run(videos, progress_interval=args.progress))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -82,6 +82,12 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file-backed test database lets concurrency tests use several
+        # connections at once; shared in-memory SQLite fails them with
+        # "database table is locked" instead of waiting.
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
@@ -141,3 +147,68 @@ REST_FRAMEWORK = {
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # For Flutter web app
 ]
+
+# Fire detection model, loaded lazily by the processes that run inference.
+# Set FIRE_DETECTION_PRELOAD_MODEL to load it while Django starts instead.
+# FIRE_DETECTION_BACKEND is 'ultralytics', 'onnxruntime' or 'auto' (chosen from
+# the weights extension); point FIRE_DETECTION_MODEL at 'fire_s.onnx' to run
+# the exported model without torch.
+FIRE_DETECTION_MODEL = 'fire_s.pt'
+FIRE_DETECTION_BACKEND = 'auto'
+# INT8 model from fire_inference.quantize. It replaces FIRE_DETECTION_MODEL only
+# once `fire_inference.evaluate --write-report` has shown it meets the floor:
+# minimum recall and precision on the labelled clips, and the largest recall
+# loss allowed against the FP32 model.
+FIRE_DETECTION_QUANTIZED_MODEL = None
+FIRE_DETECTION_ACCURACY_FLOOR = {'recall': 0.9, 'precision': 0.8, 'recall_drop': 0.02}
+FIRE_DETECTION_PRELOAD_MODEL = False
+
+# Fire detection inference workers
+INFERENCE_WORKERS = 8
+INFERENCE_BATCH_SIZE = 8
+INFERENCE_BATCH_WAIT_MS = 5.0
+DETECTION_MAX_ATTEMPTS = 3
+DETECTION_JOB_LEASE_SECONDS = 300
+# Per-camera cache of detection results keyed by perceptual image hash. A frame
+# at most DETECTION_CACHE_MAX_DISTANCE bits (of 64) away from one seen in the
+# last DETECTION_CACHE_TTL_SECONDS reuses its result. Size 0 disables it.
+DETECTION_CACHE_SIZE = 1024
+DETECTION_CACHE_TTL_SECONDS = 300
+DETECTION_CACHE_MAX_DISTANCE = 3
+
+# Annotated alert images are drawn from the stored boxes on request and cached
+# here; the least recently served renders are dropped once the cache is full.
+# Requested widths are rounded up to one of the thumbnail sizes.
+ANNOTATION_CACHE_DIR = os.path.join(MEDIA_ROOT, 'renders')
+ANNOTATION_CACHE_MAX_BYTES = 256 * 1024 * 1024
+ANNOTATION_THUMBNAIL_WIDTHS = [320, 640, 1280]
+ANNOTATION_JPEG_QUALITY = 85
+
+# Each process's leaderboard re-reads changed profiles at most this often
+LEADERBOARD_REFRESH_SECONDS = 2.0
+
+# Three-wave verification scheduler
+VERIFICATION_WAVE_INTERVAL_SECONDS = 30
+
+# Guardian statistics kept per vote: waves ask the quickest expected answerers
+# first, counting a newcomer as GUARDIAN_RESPONSE_PRIOR_SECONDS; accuracy moves
+# GUARDIAN_ACCURACY_ALPHA of the way towards each resolved vote's correctness
+GUARDIAN_RESPONSE_PRIOR_SECONDS = 60
+GUARDIAN_ACCURACY_ALPHA = 0.2
+
+# Detected alerts within INCIDENT_RADIUS_KM of an incident last seen less than
+# INCIDENT_WINDOW_MINUTES ago join it instead of starting their own waves. A
+# second alert from the same camera must also show the same scene (image hashes
+# at most INCIDENT_HASH_DISTANCE of 64 bits apart).
+INCIDENT_RADIUS_KM = 3.0
+INCIDENT_WINDOW_MINUTES = 60
+INCIDENT_HASH_DISTANCE = 12
+
+# Push channel for verification requests. DatabaseBroker relays events from the
+# worker and scheduler processes to the ASGI server; a single-process setup can
+# use 'fire_detection_app.events.InProcessBroker' instead.
+FIRE_DETECTION_EVENT_BROKER = 'fire_detection_app.events.DatabaseBroker'
+EVENT_STREAM_KEEPALIVE_SECONDS = 15
+# Under WSGI each stream holds a worker thread, so it is closed after this long
+# and the client reconnects; serve with uvicorn for long-lived streams
+EVENT_STREAM_WSGI_MAX_SECONDS = 30
@@ -0,0 +1,233 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+
+import requests
+
+
+class AlertSpool:
+    """Append-only SQLite spool of alerts waiting to reach the backend.
+
+    Alerts are written before any network call, so a dead link or a reboot
+    never loses one. Rows are removed only after the backend accepted them.
+    """
+
+    def __init__(self, path='alert_spool.db'):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS alerts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                image_path TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                dead INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._db.commit()
+
+    def append(self, image_path, payload):
+        """Store an alert and return its spool id"""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO alerts (created_at, image_path, payload) VALUES (?, ?, ?)",
+                (time.time(), image_path, json.dumps(payload))
+            )
+            self._db.commit()
+            return cursor.lastrowid
+
+    def pending(self, limit=10):
+        """Oldest alerts still waiting to be sent, in the order they were spooled"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, image_path, payload, attempts FROM alerts "
+                "WHERE dead = 0 ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [{'id': row[0], 'image_path': row[1], 'payload': json.loads(row[2]),
+                 'attempts': row[3]} for row in rows]
+
+    def ack(self, alert_ids):
+        """Remove alerts the backend has accepted"""
+        with self._lock:
+            self._db.executemany("DELETE FROM alerts WHERE id = ?", [(i,) for i in alert_ids])
+            self._db.commit()
+
+    def record_failure(self, alert_id, error, dead=False):
+        """Count a failed attempt; dead alerts are kept but never retried"""
+        with self._lock:
+            self._db.execute(
+                "UPDATE alerts SET attempts = attempts + 1, last_error = ?, dead = ? WHERE id = ?",
+                (str(error), int(dead), alert_id)
+            )
+            self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM alerts WHERE dead = 0").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class SpoolFlusher:
+    """Background thread that drains an AlertSpool to the backend in order.
+
+    Every request goes through one requests.Session, so the TCP connection is
+    reused between alerts. While the backend is unreachable the flusher backs
+    off exponentially (with jitter) up to ``max_delay``; once a send succeeds
+    it drains the rest of the queue straight away.
+
+    With ``bulk=True`` each batch goes to the backend as one multipart bundle
+    (POST /fire-alerts/bulk/), which is how a backlog built up during an
+    outage is drained quickly.
+    """
+
+    def __init__(self, spool, backend_url, fields=None, on_sent=None, session=None,
+                 batch_size=10, base_delay=1.0, max_delay=300.0, timeout=10, bulk=False):
+        self.spool = spool
+        self.backend_url = backend_url
+        # Returns extra form fields (e.g. the camera id), or None if not ready to send
+        self.fields = fields or (lambda: {})
+        self.on_sent = on_sent
+        self.session = session or requests.Session()
+        self.batch_size = batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.bulk = bulk
+        self.failures = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self):
+        """Flush now instead of waiting out the current backoff"""
+        self._wake.set()
+
+    def backoff_delay(self):
+        delay = min(self.max_delay, self.base_delay * 2 ** (self.failures - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def flush(self):
+        """Send pending alerts oldest first; stop at the first failure to keep order.
+
+        Returns True if the spool was drained, False if the backend is unreachable.
+        """
+        while not self._stop.is_set():
+            batch = self.spool.pending(self.batch_size)
+            if not batch:
+                return True
+            extra = self.fields()
+            if extra is None:
+                return False
+            if self.bulk and len(batch) > 1:
+                sent = self._send_bundle(batch, extra)
+                if sent is False:
+                    return False
+                if sent:
+                    continue
+                # The bundle was rejected: send one by one so only the bad alert is dropped
+            for entry in batch:
+                if not self._send(entry, extra):
+                    return False
+        return True
+
+    def _send(self, entry, extra):
+        data = dict(entry['payload'])
+        data.update(extra)
+        try:
+            with open(entry['image_path'], 'rb') as img:
+                response = self.session.post(
+                    f"{self.backend_url}/fire-alerts/",
+                    files={'image': img},
+                    data=data,
+                    timeout=self.timeout
+                )
+        except FileNotFoundError as e:
+            print(f"Dropping spooled alert {entry['id']}: {e}")
+            self.spool.record_failure(entry['id'], e, dead=True)
+            return True
+        except requests.exceptions.RequestException as e:
+            self.spool.record_failure(entry['id'], e)
+            return False
+
+        if response.status_code in (200, 201, 202):
+            self.spool.ack([entry['id']])
+            if self.on_sent:
+                self.on_sent(entry)
+            return True
+
+        # Retry server errors and throttling; any other rejection will never succeed
+        retry = response.status_code >= 500 or response.status_code in (408, 429)
+        self.spool.record_failure(entry['id'], response.text[:500], dead=not retry)
+        if not retry:
+            print(f"Backend rejected spooled alert {entry['id']}: {response.text[:200]}")
+        return not retry
+
+    def _send_bundle(self, batch, extra):
+        """Post a batch as one bundle: True if accepted, False to retry later,
+        None if the backend rejected it"""
+        # Every field is repeated once per image so the backend can line them up
+        keys = {key for entry in batch for key in entry['payload']}
+        data = {key: [entry['payload'].get(key, '') for entry in batch] for key in keys}
+        data.update(extra)
+        files = []
+        try:
+            for entry in batch:
+                files.append(('images', open(entry['image_path'], 'rb')))
+        except FileNotFoundError:
+            for _, img in files:
+                img.close()
+            return None  # Let the single path drop the missing file
+        try:
+            response = self.session.post(
+                f"{self.backend_url}/fire-alerts/bulk/",
+                files=files,
+                data=data,
+                timeout=self.timeout
+            )
+        except requests.exceptions.RequestException as e:
+            for entry in batch:
+                self.spool.record_failure(entry['id'], e)
+            return False
+        finally:
+            for _, img in files:
+                img.close()
+
+        if response.status_code in (200, 201, 202):
+            self.spool.ack([entry['id'] for entry in batch])
+            if self.on_sent:
+                for entry in batch:
+                    self.on_sent(entry)
+            return True
+        if response.status_code >= 500 or response.status_code in (408, 429):
+            for entry in batch:
+                self.spool.record_failure(entry['id'], response.text[:500])
+            return False
+        return None
+
+    def run(self):
+        while not self._stop.is_set():
+            if self.flush():
+                self.failures = 0
+                self._wake.wait()  # Idle until a new alert is spooled
+            else:
+                self.failures += 1
+                self._wake.wait(self.backoff_delay())
+            self._wake.clear()
@@ -0,0 +1,82 @@
+"""Compare always-on YOLO against prefilter-gated YOLO on recorded clips.
+
+Replays each clip at the detector's cadence (one frame per second by default)
+and reports, for both modes, the CPU time the detector would burn per hour of
+footage and the recall on labelled fire frames.
+
+Labels are a JSON file mapping each clip's file name to its fire intervals in
+seconds, e.g. {"ridge_cam_0412.mp4": [[12.0, 95.5]], "quiet_day.mp4": []}.
+
+    python3 evaluate_prefilter.py clips/*.mp4 --labels labels.json --model fire_m.pt
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from scene_prefilter import ScenePrefilter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from fire_inference import load_backend
+from fire_inference.clips import is_fire, read_frames
+
+CONFIDENCE_THRESHOLD = 0.5  # Same threshold as FireDetector.detect_fire
+
+
+def evaluate(model, clips, labels, sample_fps, use_prefilter):
+    stats = {'frames': 0, 'inferences': 0, 'fire_frames': 0, 'detected': 0,
+             'false_alarms': 0, 'cpu_seconds': 0.0, 'footage_seconds': 0.0}
+    for path in clips:
+        intervals = labels.get(os.path.basename(path), [])
+        prefilter = ScenePrefilter(color_order='rgb') if use_prefilter else None
+        last_timestamp = 0.0
+        # FireDetector feeds the model RGB frames
+        for timestamp, frame in read_frames(path, sample_fps, rgb=True):
+            cpu_start = time.process_time()
+            run_inference = prefilter.should_infer(frame, now=timestamp)[0] if prefilter else True
+            detected = False
+            if run_inference:
+                detected = model(frame).max_confidence > CONFIDENCE_THRESHOLD
+                stats['inferences'] += 1
+            stats['cpu_seconds'] += time.process_time() - cpu_start
+
+            stats['frames'] += 1
+            if is_fire(timestamp, intervals):
+                stats['fire_frames'] += 1
+                stats['detected'] += detected
+            elif detected:
+                stats['false_alarms'] += 1
+            last_timestamp = timestamp
+        stats['footage_seconds'] += last_timestamp + 1.0 / sample_fps
+    return stats
+
+
+def report(name, stats):
+    hours = stats['footage_seconds'] / 3600 or 1
+    recall = stats['detected'] / stats['fire_frames'] if stats['fire_frames'] else float('nan')
+    print(f"{name:>10}: {stats['cpu_seconds'] / hours:8.1f} CPU s/hour  "
+          f"recall {recall:6.3f}  "
+          f"model runs {stats['inferences']}/{stats['frames']}  "
+          f"false alarms {stats['false_alarms']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('clips', nargs='+')
+    parser.add_argument('--labels', required=True)
+    parser.add_argument('--model', default='fire_m.pt')
+    parser.add_argument('--sample-fps', type=float, default=1.0,
+                        help='Frames per second the detector looks at (FireDetector.run sleeps 1s)')
+    args = parser.parse_args()
+
+    model = load_backend(args.model)
+    with open(args.labels) as f:
+        labels = json.load(f)
+
+    report('always', evaluate(model, args.clips, labels, args.sample_fps, use_prefilter=False))
+    report('prefilter', evaluate(model, args.clips, labels, args.sample_fps, use_prefilter=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,22 +2,61 @@ import cv2
 import time
 import requests
 import json
-from ultralytics import YOLO
 import numpy as np
 from picamera2 import Picamera2
 import os
+import sys
+import threading
 from datetime import datetime
+from alert_spool import AlertSpool, SpoolFlusher
+from fire_tracker import FireTracker
+from pipeline import DropOldestQueue, LatestFrameSlot, PipelineStats
+from scene_prefilter import ScenePrefilter
+
+# fire_inference lives at the repository root; copy it next to this folder on the Pi
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from fire_inference import load_backend
+from fire_inference.evaluate import choose_weights
+from fire_inference.tiling import TiledDetector
+
+# The quantized model is only used if its evaluation report meets this floor
+ACCURACY_FLOOR = {'recall': 0.9, 'precision': 0.8, 'recall_drop': 0.02}
 
 class FireDetector:
-    def __init__(self):
+    def __init__(self, use_prefilter=True, use_tracker=True, model_path='fire_m.pt', backend='auto',
+                 quantized_model_path=None, accuracy_floor=ACCURACY_FLOOR,
+                 capture_size=(640, 480), tile_mode=None, tile_size=640):
         # Initialize camera
         self.camera = Picamera2()
-        self.camera.configure(self.camera.create_preview_configuration(main={"format": 'RGB888', "size": (640, 480)}))
+        self.camera.configure(self.camera.create_preview_configuration(main={"format": 'RGB888', "size": capture_size}))
         self.camera.start()
         time.sleep(2)  # Give camera time to warm up
 
-        # Load YOLO model
-        self.model = YOLO('fire_m.pt')
+        # Load the detector; an exported fire_m.onnx runs on ONNX Runtime, much faster on the Pi,
+        # and an INT8 fire_m.int8.onnx that passed the accuracy floor is faster still
+        model_path = choose_weights(model_path, quantized_model_path, accuracy_floor)
+        print(f"Using detection model {model_path}")
+        self.model = load_backend(model_path, backend)
+        if tile_mode:
+            # High-resolution mode: run the model on overlapping tiles ('tiles') or on
+            # windows around salient regions ('roi') so distant smoke stays several pixels wide
+            self.model = TiledDetector(self.model, mode=tile_mode, tile=tile_size, color_order='rgb')
+
+        # Cheap scene-change / fire-colour check that decides when YOLO runs
+        self.prefilter = ScenePrefilter(color_order='rgb') if use_prefilter else None
+
+        # Only alert on fires seen in 3 of the last 5 model runs or visibly growing,
+        # so one-frame flickers and glare are never uploaded
+        self.tracker = FireTracker(k=3, n=5) if use_tracker else None
+
+        # Pipeline between the capture, inference and upload threads
+        self.capture_interval = 1.0  # Check every second
+        self.alert_cooldown = 60  # Minimum seconds between alerts
+        self.stats_interval = 60  # Seconds between pipeline stat reports
+        self.frames = LatestFrameSlot()
+        self.uploads = DropOldestQueue(maxsize=4)
+        self.stats = PipelineStats()
+        self.stop_event = threading.Event()
 
         # Backend configuration
         self.backend_url = "http://your-backend-url:8000/api"  # Change this to your backend URL
@@ -31,6 +70,17 @@ class FireDetector:
         self.image_dir = "captured_images"
         os.makedirs(self.image_dir, exist_ok=True)
 
+        # Alerts are spooled to disk and delivered in order by a background flusher,
+        # so nothing is lost while the backend is unreachable
+        self.spool = AlertSpool(os.path.join(self.image_dir, "alert_spool.db"))
+        self.flusher = SpoolFlusher(self.spool, self.backend_url,
+                                    fields=self.alert_fields, on_sent=self.alert_delivered,
+                                    bulk=True)
+        # Capture time of each spooled alert until delivery; the upload and
+        # flusher threads both touch it
+        self.pending_alerts = {}
+        self.pending_lock = threading.Lock()
+
     def register_camera(self):
         """Register this camera with the backend"""
         camera_data = {
@@ -51,99 +101,160 @@ class FireDetector:
         except requests.exceptions.RequestException as e:
             print(f"Error registering camera: {e}")
 
-    def send_alert(self, image_path, confidence):
-        """Send fire alert to backend"""
+    def send_alert(self, image_path, confidence, track_summary=None, captured_at=None):
+        """Spool a fire alert; the flusher delivers it once the backend is reachable"""
+        payload = {
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+        }
+        if track_summary is not None:
+            payload['track_summary'] = json.dumps(track_summary)
+        # Held across the append so alert_delivered can't look the entry up before it exists
+        with self.pending_lock:
+            spool_id = self.spool.append(image_path, payload)
+            if captured_at is not None:
+                self.pending_alerts[spool_id] = captured_at
+        self.flusher.wake()
+        print(f"Alert queued for upload ({len(self.spool)} pending). Confidence: {confidence:.2f}")
+        return spool_id
+
+    def alert_fields(self):
+        """Fields added to every spooled alert at send time; None until the camera is registered"""
+        if not self.camera_id:
+            self.register_camera()
         if not self.camera_id:
-            print("Camera not registered!")
-            return
+            return None
+        return {'camera': self.camera_id}
 
-        try:
-            with open(image_path, 'rb') as img:
-                files = {'image': img}
-                data = {
-                    'camera': self.camera_id,
-                    'latitude': self.latitude,
-                    'longitude': self.longitude,
-                }
-                
-                response = requests.post(
-                    f"{self.backend_url}/fire-alerts/",
-                    files=files,
-                    data=data
-                )
-                
-                if response.status_code == 201:
-                    print(f"Alert sent successfully! Confidence: {confidence:.2f}")
-                else:
-                    print(f"Failed to send alert: {response.text}")
-        except requests.exceptions.RequestException as e:
-            print(f"Error sending alert: {e}")
+    def alert_delivered(self, entry):
+        """Called by the flusher once the backend has accepted an alert"""
+        print(f"Alert {entry['id']} delivered to backend")
+        with self.pending_lock:
+            captured_at = self.pending_alerts.pop(entry['id'], None)
+        if captured_at is not None:
+            self.stats.alert_done(captured_at, True)
 
     def detect_fire(self, frame):
-        """Run fire detection on frame"""
-        results = self.model(frame)[0]
+        """Run fire detection on frame; returns (detected, confidence, detections, track summary)"""
+        detections = self.model(frame)
+
+        if self.tracker is not None:
+            confirmed = self.tracker.update([(box, conf) for box, conf, _ in detections])
+            if confirmed:
+                track = max(confirmed, key=lambda t: max(t.confidences))
+                return True, max(track.confidences), detections, track.summary()
+            return False, 0.0, None, None
         
-        if len(results.boxes) > 0:
-            confidence = float(results.boxes.conf[0])
+        if len(detections) > 0:
+            confidence = detections.max_confidence
             if confidence > 0.5:  # Confidence threshold
-                return True, confidence, results
-        return False, 0.0, None
-
-    def draw_detection(self, frame, results):
-        """Draw detection boxes on frame"""
-        annotated = frame.copy()
-        boxes = results.boxes.xyxy.cpu().numpy()
-        for box, conf in zip(boxes, results.boxes.conf):
-            x1, y1, x2, y2 = map(int, box[:4])
-            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 0, 255), 2)
-            cv2.putText(annotated, f"{conf:.2f}", (x1, y1-10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
-        return annotated
+                return True, confidence, detections, None
+        return False, 0.0, None, None
 
-    def run(self):
-        """Main detection loop"""
-        print("Starting fire detection...")
-        self.register_camera()
-        
-        last_alert_time = 0
-        alert_cooldown = 60  # Minimum seconds between alerts
-        
-        while True:
+    def capture_loop(self):
+        """Capture stage: keep the latest frame available for inference"""
+        while not self.stop_event.is_set():
             try:
                 # Capture frame
                 frame = self.camera.capture_array()
                 frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
+                self.frames.put((time.monotonic(), frame))
+                self.stats.captured()
+
+                time.sleep(self.capture_interval)
+
+            except Exception as e:
+                print(f"Error in capture loop: {e}")
+                time.sleep(5)  # Wait before retrying
+
+    def inference_loop(self):
+        """Inference stage: run detection on the newest frame and queue alerts"""
+        last_alert_time = 0
+
+        while not self.stop_event.is_set():
+            item = self.frames.get(timeout=1.0)
+            if item is None:
+                continue
+            captured_at, frame = item
+
+            try:
+                # Skip the model when the scene is unchanged and nothing looks like fire
+                if self.prefilter is not None:
+                    run_inference, _ = self.prefilter.should_infer(frame)
+                else:
+                    run_inference = True
+
                 # Detect fire
-                fire_detected, confidence, results = self.detect_fire(frame)
-                
-                if fire_detected and time.time() - last_alert_time > alert_cooldown:
-                    # Save the original image
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    image_path = os.path.join(self.image_dir, f"fire_{timestamp}.jpg")
-                    
-                    # Draw detection boxes
-                    annotated_frame = self.draw_detection(frame, results)
-                    
-                    # Save both original and annotated images
-                    cv2.imwrite(image_path, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
-                    cv2.imwrite(image_path.replace('.jpg', '_annotated.jpg'), 
-                              cv2.cvtColor(annotated_frame, cv2.COLOR_RGB2BGR))
-                    
-                    # Send alert
-                    self.send_alert(image_path, confidence)
+                if run_inference:
+                    fire_detected, confidence, detections, track = self.detect_fire(frame)
+                    self.stats.inferred()
+                else:
+                    fire_detected, confidence, detections, track = False, 0.0, None, None
+
+                if fire_detected and time.time() - last_alert_time > self.alert_cooldown:
+                    # Cooldown starts now so a slow upload can't cause duplicate alerts
+                    self.uploads.put((captured_at, frame, confidence, track))
                     last_alert_time = time.time()
-                
-                # Optional: Display the frame (if you have a display connected)
-                # cv2.imshow('Fire Detection', cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
-                # if cv2.waitKey(1) & 0xFF == ord('q'):
-                #     break
-                
-                time.sleep(1)  # Check every second
-                
+
             except Exception as e:
-                print(f"Error in detection loop: {e}")
-                time.sleep(5)  # Wait before retrying
+                print(f"Error in inference loop: {e}")
+
+    def upload_loop(self):
+        """Upload stage: persist alert images and send them to the backend"""
+        while not self.stop_event.is_set():
+            item = self.uploads.get(timeout=1.0)
+            if item is None:
+                continue
+            captured_at, frame, confidence, track = item
+
+            try:
+                # Only the original is encoded; the backend draws the boxes on request
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                image_path = os.path.join(self.image_dir, f"fire_{timestamp}.jpg")
+                cv2.imwrite(image_path, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+
+                # Queue alert; latency is recorded when the backend accepts it
+                self.send_alert(image_path, confidence, track, captured_at)
+
+            except Exception as e:
+                print(f"Error in upload loop: {e}")
+                self.stats.alert_done(captured_at, False)
+
+    def run(self):
+        """Run the capture, inference and upload stages as a pipeline"""
+        print("Starting fire detection...")
+        self.register_camera()
+        self.flusher.start()
+        if len(self.spool):
+            print(f"{len(self.spool)} alerts waiting in the spool from a previous run")
+
+        stages = [self.capture_loop, self.inference_loop, self.upload_loop]
+        threads = [threading.Thread(target=stage, daemon=True) for stage in stages]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                time.sleep(self.stats_interval)
+                stats = self.stats.snapshot()
+                latency = stats['avg_frame_to_alert_latency']
+                print(f"Pipeline: {stats['frames_captured']} captured, "
+                      f"{self.frames.dropped} stale frames dropped, "
+                      f"{stats['inference_fps']:.2f} inference FPS, "
+                      f"{stats['alerts_sent']} alerts sent "
+                      f"({self.uploads.dropped} dropped), "
+                      f"avg frame-to-alert latency "
+                      f"{f'{latency:.2f}s' if latency is not None else 'n/a'}")
+                if self.tracker is not None:
+                    print(f"Tracker: {self.tracker.tracks_started} fire candidates, "
+                          f"{self.tracker.tracks_confirmed} confirmed as alerts")
+        except KeyboardInterrupt:
+            print("Stopping fire detection...")
+        finally:
+            self.stop_event.set()
+            for thread in threads:
+                thread.join(timeout=5)
+            self.flusher.stop(timeout=5)
 
         self.camera.stop()
         cv2.destroyAllWindows()
@@ -0,0 +1,191 @@
+import time
+from collections import deque
+
+import numpy as np
+
+
+def iou(a, b):
+    """Intersection over union of two xyxy boxes"""
+    w = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    h = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = w * h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class BoxKalmanFilter:
+    """Constant-velocity Kalman filter over a box's centre, area and aspect ratio.
+
+    State is (cx, cy, area, ratio, vx, vy, v_area), as in SORT. Smoke drifts
+    and a camera may sway in the wind, so the predicted box is what new
+    detections are matched against.
+    """
+
+    def __init__(self, box):
+        self.x = np.zeros(7)
+        self.x[:4] = self.measurement(box)
+        self.F = np.eye(7)
+        self.F[0, 4] = self.F[1, 5] = self.F[2, 6] = 1.0
+        self.H = np.eye(4, 7)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4])
+        self.Q = np.diag([1.0, 1.0, 1.0, 1e-2, 1e-2, 1e-2, 1e-4])
+        self.R = np.diag([1.0, 1.0, 10.0, 10.0])
+
+    @staticmethod
+    def measurement(box):
+        x1, y1, x2, y2 = box
+        w, h = max(x2 - x1, 1e-3), max(y2 - y1, 1e-3)
+        return np.array([x1 + w / 2, y1 + h / 2, w * h, w / h])
+
+    def predict(self):
+        if self.x[2] + self.x[6] <= 0:
+            self.x[6] = 0.0  # Don't let the area shrink below zero
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        return self.box()
+
+    def update(self, box):
+        y = self.measurement(box) - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(7) - K @ self.H) @ self.P
+
+    def box(self):
+        cx, cy, area, ratio = self.x[:4]
+        w = np.sqrt(max(area, 0.0) * max(ratio, 1e-3))
+        h = max(area, 0.0) / w if w else 0.0
+        return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
+
+
+class FireTrack:
+    """One fire candidate followed across frames"""
+
+    def __init__(self, track_id, box, confidence, now, window):
+        self.track_id = track_id
+        self.filter = BoxKalmanFilter(box)
+        self.box = np.asarray(box, dtype=float)
+        self.hits = deque([True], maxlen=window)  # Matched or not, for the last N frames
+        self.confidences = [confidence]
+        self.first_area = self.area(box)
+        self.first_seen = self.last_seen = now
+        self.missed = 0
+        self.confirmed_by = None
+        self.alerted = False
+
+    @staticmethod
+    def area(box):
+        return max(box[2] - box[0], 0.0) * max(box[3] - box[1], 0.0)
+
+    def predict(self):
+        return self.filter.predict()
+
+    def matched(self, box, confidence, now):
+        self.filter.update(box)
+        self.box = np.asarray(box, dtype=float)
+        self.hits.append(True)
+        self.confidences.append(confidence)
+        self.last_seen = now
+        self.missed = 0
+
+    def unmatched(self):
+        self.hits.append(False)
+        self.missed += 1
+
+    @property
+    def growth(self):
+        return self.area(self.box) / self.first_area if self.first_area else 1.0
+
+    def summary(self):
+        """What the backend gets alongside the alert"""
+        return {
+            'track_id': self.track_id,
+            'confirmed_by': self.confirmed_by,
+            'hits': len(self.confidences),
+            'hits_in_window': sum(self.hits),
+            'window': self.hits.maxlen,
+            'duration_seconds': round(self.last_seen - self.first_seen, 2),
+            'max_confidence': round(max(self.confidences), 4),
+            'mean_confidence': round(sum(self.confidences) / len(self.confidences), 4),
+            'area_growth': round(self.growth, 3),
+            'box': [round(float(v), 1) for v in self.box],
+            'velocity': [round(float(v), 2) for v in self.filter.x[4:6]],
+        }
+
+
+class FireTracker:
+    """Per-camera tracker that only raises an alert for persistent or growing fires.
+
+    Every frame the model looks at, detections are associated with existing
+    tracks by IoU against each track's Kalman-predicted box. A track becomes an
+    alert once it was seen in ``k`` of the last ``n`` frames (persistence) or
+    its box has grown by ``growth`` times over at least two hits (a spreading
+    fire). One-frame flickers and sun glare never get there, so they are never
+    uploaded or sent to volunteers. Each track alerts at most once.
+    """
+
+    def __init__(self, k=3, n=5, growth=1.5, iou_threshold=0.3, min_confidence=0.25,
+                 alert_confidence=0.5, max_missed=3):
+        self.k = k
+        self.n = n
+        self.growth = growth
+        self.iou_threshold = iou_threshold
+        self.min_confidence = min_confidence
+        self.alert_confidence = alert_confidence
+        self.max_missed = max_missed
+        self.tracks = []
+        self._next_id = 1
+        self.tracks_started = 0
+        self.tracks_confirmed = 0
+
+    def update(self, detections, now=None):
+        """Feed one frame's detections; returns the tracks that just became alerts.
+
+        ``detections`` is a list of (xyxy box, confidence) pairs.
+        """
+        now = time.time() if now is None else now
+        detections = [(np.asarray(box, dtype=float), conf) for box, conf in detections
+                      if conf >= self.min_confidence]
+        predicted = [track.predict() for track in self.tracks]
+
+        # Greedy association, best overlaps first
+        pairs = sorted(
+            ((iou(predicted[t], box), t, d)
+             for t in range(len(self.tracks)) for d, (box, _) in enumerate(detections)),
+            reverse=True
+        )
+        used_tracks, used_detections = set(), set()
+        for overlap, t, d in pairs:
+            if overlap < self.iou_threshold:
+                break
+            if t in used_tracks or d in used_detections:
+                continue
+            used_tracks.add(t)
+            used_detections.add(d)
+            self.tracks[t].matched(*detections[d], now)
+
+        for t, track in enumerate(self.tracks):
+            if t not in used_tracks:
+                track.unmatched()
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+
+        for d, (box, conf) in enumerate(detections):
+            if d not in used_detections:
+                self.tracks.append(FireTrack(self._next_id, box, conf, now, self.n))
+                self._next_id += 1
+                self.tracks_started += 1
+
+        confirmed = []
+        for track in self.tracks:
+            if track.alerted or track.missed or max(track.confidences) < self.alert_confidence:
+                continue
+            if sum(track.hits) >= self.k:
+                track.confirmed_by = 'persistence'
+            elif len(track.confidences) >= 2 and track.growth >= self.growth:
+                track.confirmed_by = 'growth'
+            else:
+                continue
+            track.alerted = True
+            self.tracks_confirmed += 1
+            confirmed.append(track)
+        return confirmed
@@ -0,0 +1,113 @@
+import collections
+import threading
+import time
+
+
+class LatestFrameSlot:
+    """Single-frame mailbox between capture and inference.
+
+    The capture thread overwrites whatever is waiting, so inference always
+    works on the newest frame and a slow model never builds up a backlog of
+    stale frames.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._item = None
+        self.dropped = 0
+
+    def put(self, item):
+        with self._condition:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Wait for a frame and take it; returns None on timeout"""
+        with self._condition:
+            if self._item is None:
+                self._condition.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+
+class DropOldestQueue:
+    """Bounded FIFO that discards its oldest entry instead of blocking the producer"""
+
+    def __init__(self, maxsize):
+        self._items = collections.deque(maxlen=maxsize)
+        self._condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._condition:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        with self._condition:
+            if not self._items:
+                self._condition.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def __len__(self):
+        return len(self._items)
+
+
+class PipelineStats:
+    """Thread-safe counters for the capture → inference → upload pipeline"""
+
+    def __init__(self, window_seconds=60):
+        self._lock = threading.Lock()
+        self.window_seconds = window_seconds
+        self.frames_captured = 0
+        self.frames_inferred = 0
+        self.alerts_sent = 0
+        self.alerts_failed = 0
+        self.last_latency = None
+        self.total_latency = 0.0
+        self._inference_times = collections.deque()
+
+    def captured(self):
+        with self._lock:
+            self.frames_captured += 1
+
+    def inferred(self):
+        now = time.monotonic()
+        with self._lock:
+            self.frames_inferred += 1
+            self._inference_times.append(now)
+            while self._inference_times and now - self._inference_times[0] > self.window_seconds:
+                self._inference_times.popleft()
+
+    def alert_done(self, captured_at, success):
+        """Record an upload; latency is measured from the frame's capture time"""
+        latency = time.monotonic() - captured_at
+        with self._lock:
+            if success:
+                self.alerts_sent += 1
+                self.last_latency = latency
+                self.total_latency += latency
+            else:
+                self.alerts_failed += 1
+
+    def snapshot(self):
+        with self._lock:
+            if len(self._inference_times) > 1:
+                span = self._inference_times[-1] - self._inference_times[0]
+                fps = (len(self._inference_times) - 1) / span if span > 0 else 0.0
+            else:
+                fps = 0.0
+            return {
+                'frames_captured': self.frames_captured,
+                'frames_inferred': self.frames_inferred,
+                'inference_fps': fps,
+                'alerts_sent': self.alerts_sent,
+                'alerts_failed': self.alerts_failed,
+                'last_frame_to_alert_latency': self.last_latency,
+                'avg_frame_to_alert_latency': (self.total_latency / self.alerts_sent
+                                               if self.alerts_sent else None),
+            }
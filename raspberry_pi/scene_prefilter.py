@@ -0,0 +1,80 @@
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class ScenePrefilter:
+    """Cheap gate in front of YOLO that skips frames where nothing has changed.
+
+    Works on a small downscaled copy of each frame with vectorised OpenCV/NumPy
+    operations, a few milliseconds on a Pi compared to hundreds for the model.
+    A frame is sent to the model when any of these crosses its threshold:
+
+    - change: fraction of pixels that differ from the last frame sent to the model
+    - fire_ratio: fraction of pixels with a flame-like hue, saturation and brightness
+    - flicker: frame-to-frame jitter of the brightness of those flame-coloured pixels
+
+    A heartbeat still runs the model every ``max_skip_seconds`` so slow changes
+    that never trip a threshold are eventually looked at.
+    """
+
+    def __init__(self, size=(160, 120), color_order='rgb', pixel_threshold=25,
+                 change_threshold=0.02, fire_ratio_threshold=0.005,
+                 flicker_threshold=6.0, history=8, max_skip_seconds=30):
+        self.size = size
+        self.hsv_code = cv2.COLOR_RGB2HSV if color_order == 'rgb' else cv2.COLOR_BGR2HSV
+        self.pixel_threshold = pixel_threshold
+        self.change_threshold = change_threshold
+        self.fire_ratio_threshold = fire_ratio_threshold
+        self.flicker_threshold = flicker_threshold
+        self.max_skip_seconds = max_skip_seconds
+        self.fire_brightness = deque(maxlen=history)
+        self.reference = None
+        self.last_inference = 0.0
+        self.frames_seen = 0
+        self.frames_passed = 0
+
+    def score(self, frame):
+        """Compute the change, fire-colour and flicker scores of a frame"""
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, self.hsv_code)
+        hue, saturation, value = hsv[:, :, 0], hsv[:, :, 1], hsv[:, :, 2]
+        gray = value  # HSV value is max(R, G, B), good enough for differencing
+
+        # Scene change against the last frame the model looked at
+        if self.reference is None:
+            change = 1.0
+        else:
+            diff = cv2.absdiff(gray, self.reference)
+            change = float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+
+        # Flame colours: red to yellow hues (OpenCV hue is 0-179), saturated and bright
+        fire_mask = ((hue <= 35) | (hue >= 170)) & (saturation >= 100) & (value >= 180)
+        fire_ratio = float(np.count_nonzero(fire_mask)) / fire_mask.size
+
+        # Flames flicker; sun glare and red rocks hold steady
+        self.fire_brightness.append(float(value[fire_mask].mean()) if fire_ratio else 0.0)
+        flicker = float(np.abs(np.diff(self.fire_brightness)).mean()) if len(self.fire_brightness) > 1 else 0.0
+
+        return {'change': change, 'fire_ratio': fire_ratio, 'flicker': flicker}, gray
+
+    def should_infer(self, frame, now=None):
+        """Decide whether the model needs to look at this frame"""
+        now = time.monotonic() if now is None else now
+        scores, gray = self.score(frame)
+        self.frames_seen += 1
+
+        run = (scores['change'] >= self.change_threshold
+               or scores['fire_ratio'] >= self.fire_ratio_threshold
+               or scores['flicker'] >= self.flicker_threshold
+               or now - self.last_inference >= self.max_skip_seconds)
+        if run:
+            self.reference = gray
+            self.last_inference = now
+            self.frames_passed += 1
+        return run, scores
+
+    def pass_rate(self):
+        return self.frames_passed / self.frames_seen if self.frames_seen else 1.0
@@ -0,0 +1,134 @@
+import os
+import re
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from alert_spool import AlertSpool, SpoolFlusher
+
+
+class StubBackend:
+    """Local HTTP server standing in for the Django backend; can be stopped and restarted"""
+
+    def __init__(self):
+        self.received = []
+        self.requests = 0
+        self.status = 201
+        self.server = None
+        self.port = None
+
+    def start(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                seqs = re.findall(rb'name="seq"\r\n\r\n(\d+)', body)
+                if backend.status == 201:
+                    backend.requests += 1
+                    backend.received.extend(int(seq) for seq in seqs)
+                self.send_response(backend.status)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'{}')
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', self.port or 0), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}/api"
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class AlertSpoolTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.image = os.path.join(self.tmp.name, 'fire.jpg')
+        with open(self.image, 'wb') as f:
+            f.write(b'\xff\xd8 not really a jpeg \xff\xd9')
+        self.spool = AlertSpool(os.path.join(self.tmp.name, 'spool.db'))
+        self.addCleanup(self.spool.close)
+
+        self.backend = StubBackend()
+        self.backend.start()
+        self.addCleanup(lambda: self.backend.server and self.backend.stop())
+
+    def make_flusher(self, **kwargs):
+        flusher = SpoolFlusher(self.spool, self.backend.url, fields=lambda: {'camera': 1},
+                               base_delay=0.05, max_delay=0.2, timeout=2, **kwargs)
+        flusher.start()
+        self.addCleanup(flusher.stop, 5)
+        return flusher
+
+    def spool_alerts(self, flusher, seqs):
+        for seq in seqs:
+            self.spool.append(self.image, {'seq': seq})
+            flusher.wake()
+
+    def test_alerts_survive_outage_and_flush_in_order(self):
+        flusher = self.make_flusher()
+        self.spool_alerts(flusher, [1, 2])
+        self.assertTrue(wait_for(lambda: self.backend.received == [1, 2]))
+
+        # Backend goes away: alerts stay on disk and the flusher backs off
+        self.backend.stop()
+        self.backend.server = None
+        self.spool_alerts(flusher, [3, 4, 5])
+        self.assertTrue(wait_for(lambda: flusher.failures >= 2))
+        self.assertEqual(len(self.spool), 3)
+
+        # Backend comes back on the same port: the queue drains in order
+        self.backend.start()
+        self.assertTrue(wait_for(lambda: len(self.spool) == 0))
+        self.assertEqual(self.backend.received, [1, 2, 3, 4, 5])
+
+    def test_server_errors_are_retried(self):
+        self.backend.status = 503
+        flusher = self.make_flusher()
+        self.spool_alerts(flusher, [1])
+        self.assertTrue(wait_for(lambda: flusher.failures >= 1))
+        self.assertEqual(len(self.spool), 1)
+
+        self.backend.status = 201
+        self.assertTrue(wait_for(lambda: self.backend.received == [1]))
+
+    def test_bulk_mode_drains_backlog_in_bundles(self):
+        for seq in range(1, 8):
+            self.spool.append(self.image, {'seq': seq})
+
+        self.make_flusher(bulk=True, batch_size=5)
+        self.assertTrue(wait_for(lambda: len(self.spool) == 0))
+        self.assertEqual(self.backend.received, [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(self.backend.requests, 2)
+
+    def test_spool_persists_across_restarts(self):
+        self.spool.append(self.image, {'seq': 7})
+        self.spool.close()
+
+        reopened = AlertSpool(os.path.join(self.tmp.name, 'spool.db'))
+        self.addCleanup(reopened.close)
+        self.assertEqual([entry['payload']['seq'] for entry in reopened.pending()], [7])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from fire_tracker import FireTracker
+
+
+def box(x, y, w=40, h=40):
+    return [x, y, x + w, y + h]
+
+
+class FireTrackerTests(unittest.TestCase):
+    def run_frames(self, tracker, frames):
+        """Feed a list of per-frame detection lists; returns (frame index, summary) for each alert"""
+        alerts = []
+        for index, detections in enumerate(frames):
+            for track in tracker.update(detections, now=float(index)):
+                alerts.append((index, track.summary()))
+        return alerts
+
+    def test_single_frame_flicker_never_alerts(self):
+        tracker = FireTracker(k=3, n=5)
+        frames = [[], [(box(100, 100), 0.9)], [], [], [(box(400, 50), 0.8)], [], []]
+        self.assertEqual(self.run_frames(tracker, frames), [])
+        self.assertEqual(tracker.tracks_started, 2)
+
+    def test_persistent_fire_alerts_once_on_kth_frame(self):
+        tracker = FireTracker(k=3, n=5)
+        # Drifting smoke, missed once by the model
+        frames = [[(box(100 + 4 * i, 100), 0.7)] if i != 1 else [] for i in range(8)]
+
+        alerts = self.run_frames(tracker, frames)
+
+        self.assertEqual(len(alerts), 1)
+        index, summary = alerts[0]
+        self.assertEqual(index, 3)
+        self.assertEqual(summary['confirmed_by'], 'persistence')
+        self.assertEqual(summary['hits'], 3)
+        self.assertEqual(summary['duration_seconds'], 3.0)
+
+    def test_growing_fire_alerts_before_persistence(self):
+        tracker = FireTracker(k=4, n=5, growth=1.5)
+        frames = [[(box(100, 100, 40, 40), 0.6)], [(box(95, 90, 55, 55), 0.7)]]
+
+        alerts = self.run_frames(tracker, frames)
+
+        self.assertEqual([(i, s['confirmed_by']) for i, s in alerts], [(1, 'growth')])
+
+    def test_low_confidence_tracks_do_not_alert(self):
+        tracker = FireTracker(k=3, n=5, alert_confidence=0.5)
+        frames = [[(box(100, 100), 0.3)] for _ in range(6)]
+        self.assertEqual(self.run_frames(tracker, frames), [])
+
+    def test_separate_fires_get_separate_tracks(self):
+        tracker = FireTracker(k=2, n=3)
+        frames = [[(box(100, 100), 0.8), (box(500, 300), 0.6)]] * 2
+
+        alerts = self.run_frames(tracker, frames)
+
+        self.assertEqual(sorted(s['track_id'] for _, s in alerts), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
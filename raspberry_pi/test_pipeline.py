@@ -0,0 +1,91 @@
+import threading
+import time
+import unittest
+
+from pipeline import DropOldestQueue, LatestFrameSlot, PipelineStats
+
+
+class LatestFrameSlotTests(unittest.TestCase):
+    def test_newer_frame_replaces_waiting_one(self):
+        slot = LatestFrameSlot()
+        for frame in ('first', 'second', 'third'):
+            slot.put(frame)
+
+        self.assertEqual(slot.get(timeout=0), 'third')
+        self.assertEqual(slot.dropped, 2)
+        self.assertIsNone(slot.get(timeout=0.01))
+
+    def test_get_wakes_when_a_frame_arrives(self):
+        slot = LatestFrameSlot()
+        threading.Timer(0.05, slot.put, args=('frame',)).start()
+
+        start = time.monotonic()
+        self.assertEqual(slot.get(timeout=2), 'frame')
+        self.assertLess(time.monotonic() - start, 1)
+
+
+class DropOldestQueueTests(unittest.TestCase):
+    def test_full_queue_drops_oldest(self):
+        uploads = DropOldestQueue(maxsize=2)
+        for alert in range(4):
+            uploads.put(alert)
+
+        self.assertEqual(uploads.dropped, 2)
+        self.assertEqual([uploads.get(timeout=0), uploads.get(timeout=0)], [2, 3])
+        self.assertIsNone(uploads.get(timeout=0.01))
+        self.assertEqual(len(uploads), 0)
+
+
+class PipelineShutdownTests(unittest.TestCase):
+    def test_stages_exit_promptly_once_stopped(self):
+        """Capture, inference and upload threads wired like FireDetector.run"""
+        frames, uploads, stats = LatestFrameSlot(), DropOldestQueue(maxsize=4), PipelineStats()
+        stop = threading.Event()
+        uploaded = []
+
+        def capture():
+            index = 0
+            while not stop.is_set():
+                frames.put((time.monotonic(), index))
+                stats.captured()
+                index += 1
+                time.sleep(0.005)
+
+        def inference():
+            while not stop.is_set():
+                item = frames.get(timeout=1.0)
+                if item is None:
+                    continue
+                stats.inferred()
+                if item[1] % 5 == 0:
+                    uploads.put(item)
+
+        def upload():
+            while not stop.is_set():
+                item = uploads.get(timeout=1.0)
+                if item is None:
+                    continue
+                uploaded.append(item[1])
+                stats.alert_done(item[0], True)
+
+        threads = [threading.Thread(target=stage, daemon=True) for stage in (capture, inference, upload)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+
+        stop.set()
+        start = time.monotonic()
+        for thread in threads:
+            thread.join(timeout=3)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        # Blocked get() calls time out, so nobody waits for a frame that never comes
+        self.assertLess(time.monotonic() - start, 2.5)
+
+        snapshot = stats.snapshot()
+        self.assertGreater(snapshot['frames_inferred'], 0)
+        self.assertEqual(snapshot['alerts_sent'], len(uploaded))
+        self.assertEqual(uploaded, sorted(uploaded))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from scene_prefilter import ScenePrefilter
+
+
+def quiet_scene():
+    """A textured grey/green RGB frame with no flame colours"""
+    rng = np.random.default_rng(0)
+    frame = np.empty((240, 320, 3), dtype=np.uint8)
+    frame[:, :, 0] = 90
+    frame[:, :, 1] = rng.integers(100, 140, size=(240, 320))
+    frame[:, :, 2] = 80
+    return frame
+
+
+class ScenePrefilterTests(unittest.TestCase):
+    def setUp(self):
+        self.prefilter = ScenePrefilter(color_order='rgb', max_skip_seconds=30)
+        self.scene = quiet_scene()
+        # The first frame always goes to the model and becomes the reference
+        self.assertTrue(self.prefilter.should_infer(self.scene, now=0.0)[0])
+
+    def test_static_scene_is_skipped(self):
+        decisions = [self.prefilter.should_infer(self.scene.copy(), now=float(t))[0] for t in range(1, 10)]
+
+        self.assertEqual(decisions, [False] * 9)
+        self.assertAlmostEqual(self.prefilter.pass_rate(), 0.1)
+
+    def test_fire_coloured_motion_passes(self):
+        for t, x in enumerate([100, 104, 108], start=1):
+            frame = self.scene.copy()
+            frame[100:140, x:x + 40] = (255, 110 + 20 * t, 0)  # Orange, changing brightness
+            run, scores = self.prefilter.should_infer(frame, now=float(t))
+            self.assertTrue(run)
+            self.assertGreater(scores['fire_ratio'], self.prefilter.fire_ratio_threshold)
+
+    def test_heartbeat_forces_a_recheck(self):
+        decisions = {t: self.prefilter.should_infer(self.scene, now=float(t))[0] for t in (10, 29, 30, 31, 59, 60)}
+
+        self.assertEqual(decisions, {10: False, 29: False, 30: True, 31: False, 59: False, 60: True})
+
+
+if __name__ == '__main__':
+    unittest.main()
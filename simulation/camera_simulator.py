@@ -2,13 +2,19 @@ import cv2
 import time
 import requests
 import json
-from ultralytics import YOLO
 import numpy as np
 import os
+import sys
 from datetime import datetime
 
+# The offline alert spool is shared with the Raspberry Pi detector
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'raspberry_pi'))
+from alert_spool import AlertSpool, SpoolFlusher
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from fire_inference import load_backend
+
 class FireDetectorSimulator:
-    def __init__(self):
+    def __init__(self, model_path='fire_s.pt', backend='auto'):
         # Initialize camera
         self.camera = cv2.VideoCapture(0)  # Use laptop's camera
         
@@ -16,8 +22,8 @@ class FireDetectorSimulator:
         self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
         self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
         
-        # Load YOLO model
-        self.model = YOLO('fire_s.pt')
+        # Load the detector (.pt through ultralytics, exported .onnx through ONNX Runtime)
+        self.model = load_backend(model_path, backend)
         
         # Backend configuration
         self.backend_url = "http://localhost:8000/api"
@@ -31,6 +37,12 @@ class FireDetectorSimulator:
         self.image_dir = "captured_images"
         os.makedirs(self.image_dir, exist_ok=True)
         
+        # Alerts are spooled to disk and delivered in order by a background flusher
+        self.spool = AlertSpool(os.path.join(self.image_dir, "alert_spool.db"))
+        self.flusher = SpoolFlusher(self.spool, self.backend_url, fields=self.alert_fields,
+                                    on_sent=lambda entry: print(f"📤 Alert {entry['id']} delivered"),
+                                    bulk=True)
+        
         # Alert cooldown
         self.last_alert_time = 0
         self.alert_cooldown = 500  # seconds
@@ -59,43 +71,27 @@ class FireDetectorSimulator:
             return False
 
     def send_alert(self, image_path, confidence):
-        """Send fire alert to backend"""
-        if not self.camera_id:
-            print("Camera not registered!")
-            return False
+        """Spool a fire alert; the flusher delivers it once the backend is reachable"""
+        self.spool.append(image_path, {
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+        })
+        self.flusher.wake()
+        print(f"🔥 Alert queued for upload ({len(self.spool)} pending). Confidence: {confidence:.2f}")
+        return True
 
-        try:
-            with open(image_path, 'rb') as img:
-                files = {'image': ('fire.jpg', img, 'image/jpeg')}
-                data = {
-                    'camera': self.camera_id,
-                    'latitude': self.latitude,
-                    'longitude': self.longitude,
-                }
-                
-                response = requests.post(
-                    f"{self.backend_url}/fire-alerts/",
-                    files=files,
-                    data=data
-                )
-                
-                if response.status_code == 201:
-                    print(f"🔥 Alert sent successfully! Confidence: {confidence:.2f}")
-                    return True
-                else:
-                    print(f"Failed to send alert: {response.text}")
-                    return False
-        except requests.exceptions.RequestException as e:
-            print(f"Error sending alert: {e}")
-            return False
+    def alert_fields(self):
+        """Fields added to every spooled alert at send time"""
+        if not self.camera_id:
+            return None
+        return {'camera': self.camera_id}
 
-    def draw_detection(self, frame, results):
+    def draw_detection(self, frame, detections):
         """Draw detection boxes and info on frame"""
         annotated = frame.copy()
         
         # Draw boxes
-        boxes = results.boxes.xyxy.cpu().numpy()
-        for box, conf in zip(boxes, results.boxes.conf):
+        for box, conf, _ in detections:
             x1, y1, x2, y2 = map(int, box[:4])
             cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 0, 255), 2)
             
@@ -116,6 +112,7 @@ class FireDetectorSimulator:
         if not self.register_camera():
             print("Failed to register camera. Exiting...")
             return
+        self.flusher.start()
 
         print("\n📋 Instructions:")
         print("- Press 'q' to quit")
@@ -132,14 +129,14 @@ class FireDetectorSimulator:
                     break
 
                 # Run detection
-                results = self.model(frame)[0]
+                detections = self.model(frame)
                 
                 # Process results
-                if len(results.boxes) > 0:
-                    confidence = float(results.boxes.conf[0])
+                if len(detections) > 0:
+                    confidence = detections.max_confidence
                     
                     # Draw detection on frame
-                    frame = self.draw_detection(frame, results)
+                    frame = self.draw_detection(frame, detections)
                     
                     # Add confidence display
                     cv2.putText(frame, f"Confidence: {confidence:.2f}", (10, 60),
@@ -173,6 +170,7 @@ class FireDetectorSimulator:
                 time.sleep(1)
 
         # Cleanup
+        self.flusher.stop(timeout=5)
         self.camera.release()
         cv2.destroyAllWindows()
 
@@ -1,13 +1,26 @@
 #!/bin/bash
 
-# Start Django server
+# Start Django server under ASGI so verification streams are pushed as they happen
 echo "Starting Django server..."
-python ../manage.py runserver &
+(cd .. && uvicorn firewatch.asgi:application --port 8000) &
 DJANGO_PID=$!
 
+# Start background fire detection workers
+echo "Starting inference workers..."
+python ../manage.py run_inference_workers &
+WORKERS_PID=$!
+
+# Start the verification wave scheduler
+echo "Starting verification scheduler..."
+python ../manage.py run_verification_scheduler &
+SCHEDULER_PID=$!
+
 # Wait for Django to start
 sleep 5
 
+# Create the ranked test guardians
+python ../manage.py seed_guardians
+
 # Start user simulator
 echo "Starting user simulator..."
 python user_simulator.py &
@@ -19,4 +32,6 @@ python camera_simulator.py
 
 # Cleanup when camera simulator exits
 kill $DJANGO_PID
+kill $WORKERS_PID
+kill $SCHEDULER_PID
 kill $USER_SIM_PID
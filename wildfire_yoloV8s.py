@@ -1,12 +1,15 @@
-from ultralytics import YOLO
-from PIL import Image
+# Interactive viewer for one clip. To process footage headless and in bulk:
+#   python -m fire_inference.video_batch <videos or directories> --output results.jsonl
+import sys
+
 import cv2
+from fire_inference import load_backend
 
-# Load the model
-model = YOLO('fire_m.pt')
+# Load the model (fire_m.onnx runs on ONNX Runtime without torch)
+model = load_backend('fire_m.pt', conf=0.2, iou=0.1)
 
 # Open the video file
-video_path = '130076-746154338_tiny.mp4'
+video_path = sys.argv[1] if len(sys.argv) > 1 else '130076-746154338_tiny.mp4'
 cap = cv2.VideoCapture(video_path)
 
 # Define the desired window size
@@ -19,10 +22,15 @@ while cap.isOpened():
         break
 
     # Run inference on the frame
-    results = model(frame, conf=0.2, iou=0.1)
+    detections = model(frame)
 
     # Display the results on the frame
-    annotated_frame = results[0].plot()
+    annotated_frame = frame.copy()
+    for box, conf, _ in detections:
+        x1, y1, x2, y2 = map(int, box)
+        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        cv2.putText(annotated_frame, f"fire {conf:.2f}", (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
 
     # Resize the frame to fit the window
     resized_frame = cv2.resize(annotated_frame, (window_width, window_height))